@@ -1,6 +1,20 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
 
 
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .jobs import start_worker_pool
+
+        # Workers start with the first request and resume what a previous process left
+        request_started.connect(start_worker_pool)
+
+        # Off by default: heavy libraries load on first use (see app/preload.py)
+        if getattr(settings, 'PRELOAD_MODULES', False):
+            from .preload import preload
+            preload()
@@ -0,0 +1,131 @@
+"""JWT authentication that resolves users from a short-lived in-process cache.
+
+simplejwt's JWTAuthentication loads the token's user from auth_user on every
+request. CachedJWTAuthentication keeps loaded users for AUTH_USER_CACHE['TTL']
+seconds instead. Saving or deleting a user drops their entry (see signals.py),
+so a deactivation or password change applies at once in this process; changes
+made by other processes, or by QuerySet.update(), which sends no signals, apply
+once the entry expires.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_key(user_id):
+    return str(user_id)
+
+
+class UserCache:
+    """LRU of users by their token id, with a time-to-live.
+
+    Values derived from a user (e.g. a serialized profile) can be kept with
+    their entry through memoize, so they are dropped together.
+    """
+
+    def __init__(self, ttl=60, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (stored_at, user, derived values)
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a user loaded before one is not stored after it
+        self.generation = 0
+        self.counters = dict.fromkeys(['hits', 'misses', 'invalidations', 'evictions'], 0)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(**{key.lower(): value for key, value in getattr(settings, 'AUTH_USER_CACHE', {}).items()})
+
+    def _entry(self, key):
+        """The live entry for key; call with the lock held"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, user_id):
+        """A copy of the cached user, or None"""
+        with self._lock:
+            entry = self._entry(user_key(user_id))
+            self.counters['hits' if entry else 'misses'] += 1
+        # Each request gets its own instance, so changes to request.user stay local
+        return copy.copy(entry[1]) if entry else None
+
+    def set(self, user, generation=None):
+        """Cache user, unless an invalidation happened since `generation` was read"""
+        key = user_key(getattr(user, api_settings.USER_ID_FIELD))
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic(), copy.copy(user), {})
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+
+    def memoize(self, user, name, build):
+        """build(user), computed once per cache entry of the user"""
+        key = user_key(getattr(user, api_settings.USER_ID_FIELD))
+        with self._lock:
+            entry = self._entry(key)
+            if entry is not None and name in entry[2]:
+                return entry[2][name]
+            generation = self.generation
+        value = build(user)
+        with self._lock:
+            # Not kept if the user was invalidated while it was built
+            entry = self._entry(key)
+            if entry is not None and generation == self.generation:
+                entry[2][name] = value
+        return value
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_key(user_id), None)
+            self.generation += 1
+            self.counters['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {**self.counters, 'entries': len(self._entries), 'ttl': self.ttl}
+
+
+user_cache = UserCache.from_settings()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication with users served from user_cache"""
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = None if user_id is None else user_cache.get(user_id)
+        if user is None:
+            # Loads and checks the user, or raises like JWTAuthentication
+            generation = user_cache.generation
+            user = super().get_user(validated_token)
+            user_cache.set(user, generation)
+            return user
+
+        # Cached users were active when loaded; the password check depends on the token
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
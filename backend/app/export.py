@@ -0,0 +1,165 @@
+"""Bulk export of a user's summaries as a streamed ZIP archive.
+
+Rows are read in id order, EXPORT_BATCH_ROWS at a time. Renderings already in
+the render cache are copied from disk; the others are rendered on a process
+pool of EXPORT_WORKERS, at most EXPORT_WORKERS * 2 ahead of the entry being
+written, and are not added to the cache so a large export does not push out
+the files of single downloads. Entries are written in id order whichever
+rendering finishes first, and the archive is handed to the response as it
+grows, so memory stays flat however many items are exported.
+"""
+import logging
+import multiprocessing
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import metrics
+from .models import Content
+from .rendering import RENDERED_FIELDS, render_cache, render_fields, sanitize_filename
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Cheap enough to render in the calling thread
+INLINE_FORMATS = ('txt',)
+
+_export_pool = None
+
+
+def export_worker_count():
+    return getattr(settings, 'EXPORT_WORKERS', None) or os.cpu_count() or 1
+
+
+def get_export_pool():
+    """Process pool for PDF and DOCX renderings, created on first export"""
+    global _export_pool
+    if _export_pool is None:
+        # spawn rather than fork: the web process runs threads
+        _export_pool = ProcessPoolExecutor(
+            max_workers=export_worker_count(),
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _export_pool
+
+
+def export_queryset(user, ids=None):
+    """The user's summarized content, optionally narrowed to ids"""
+    queryset = Content.objects.filter(user=user).exclude(summary='')
+    if ids is not None:
+        queryset = queryset.filter(pk__in=ids)
+    return queryset.only('id', 'updated_at', *RENDERED_FIELDS)
+
+
+def iter_rows(queryset, batch_size=None):
+    """Yield the rows of queryset in id order, one keyset batch at a time"""
+    batch_size = batch_size or getattr(settings, 'EXPORT_BATCH_ROWS', 200)
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_id).order_by('pk')[:batch_size])
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1].pk
+
+
+def entry_name(content, fmt):
+    # The id keeps names unique when titles repeat
+    return f"{content.pk}-{sanitize_filename(content.auto_title) or 'Summary'}.{fmt}"
+
+
+def iter_renderings(rows, fmt, workers=None):
+    """Yield (content, open file, bytes or None on failure) for each row, in row order"""
+    workers = workers or export_worker_count()
+    pool = get_export_pool() if workers > 1 and fmt not in INLINE_FORMATS else None
+    pending = deque()
+
+    def finish(content, cached, future):
+        if cached is not None:
+            return content, cached, None
+        try:
+            if future is None:
+                data, seconds = render_fields(fmt, {field: getattr(content, field) for field in RENDERED_FIELDS})
+            else:
+                data, seconds = future.result()
+        except Exception:
+            logger.exception("Export rendering of content %s as %s failed", content.pk, fmt)
+            return content, None, None
+        metrics.record_stage(f'render_{fmt}', seconds)
+        return content, None, data
+
+    try:
+        for content in rows:
+            cached = render_cache.lookup(content, fmt)
+            metrics.render_requests.inc(1, fmt, 'hit' if cached is not None else 'miss')
+            future = None
+            if cached is None and pool is not None:
+                future = pool.submit(render_fields, fmt, {field: getattr(content, field) for field in RENDERED_FIELDS})
+            pending.append((content, cached, future))
+            while len(pending) > workers * 2:
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+    finally:
+        # The client went away: drop work that has not started and close cached files
+        for _content, cached, future in pending:
+            if cached is not None:
+                cached.close()
+            if future is not None:
+                future.cancel()
+
+
+class ArchiveBuffer:
+    """Write-only file that collects what zipfile writes until the response takes it"""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        self.size = 0
+        return data
+
+
+def export_archive(rows, fmt, workers=None):
+    """Yield the bytes of a ZIP archive with one rendering of each row"""
+    buffer = ArchiveBuffer()
+    # PDF and DOCX files are compressed already
+    compression = zipfile.ZIP_DEFLATED if fmt in INLINE_FORMATS else zipfile.ZIP_STORED
+    failed = []
+    with zipfile.ZipFile(buffer, 'w', compression) as archive:
+        for content, cached, data in iter_renderings(rows, fmt, workers):
+            if cached is None and data is None:
+                failed.append(content.pk)
+                continue
+            # Stamped with the summary's own time, so the same summaries give the same archive
+            info = zipfile.ZipInfo(entry_name(content, fmt), timezone.localtime(content.updated_at).timetuple()[:6])
+            info.compress_type = compression
+            with archive.open(info, 'w') as entry:
+                if data is not None:
+                    entry.write(data)
+                else:
+                    with cached:
+                        for chunk in iter(lambda: cached.read(EXPORT_CHUNK_BYTES), b''):
+                            entry.write(chunk)
+                            if buffer.size >= EXPORT_CHUNK_BYTES:
+                                yield buffer.take()
+            if buffer.size >= EXPORT_CHUNK_BYTES:
+                yield buffer.take()
+        if failed:
+            archive.writestr('errors.txt', 'Could not render content ' + ', '.join(map(str, failed)) + '\n')
+    yield buffer.take()
@@ -0,0 +1,286 @@
+"""Streaming text extractors for uploaded documents.
+
+Extractors are generators, so callers can stop reading as soon as they have
+enough text and the rest of the document is never parsed.
+"""
+import codecs
+import logging
+import multiprocessing
+import os
+import shutil
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def extraction_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def file_size(file):
+    """Size in bytes of an uploaded file, stored file or path"""
+    if isinstance(file, (str, os.PathLike)):
+        return os.path.getsize(file)
+    size = getattr(file, 'size', None)
+    if size is None:
+        position = file.tell()
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(position)
+    return size
+
+
+def check_size(file, max_bytes):
+    if max_bytes and file_size(file) > max_bytes:
+        raise ValueError(f"File is larger than the {max_bytes} byte limit")
+
+
+@contextmanager
+def local_path(file):
+    """Yield a filesystem path for the file, spooling it to disk if needed.
+
+    Worker processes reopen the document by path instead of receiving its
+    bytes, so this avoids copying large files when they are already on disk.
+    """
+    if isinstance(file, (str, os.PathLike)):
+        yield os.fspath(file)
+        return
+    for attribute in ('temporary_file_path', 'path'):
+        try:
+            value = getattr(file, attribute)
+            path = value() if callable(value) else value
+        except (AttributeError, NotImplementedError, ValueError):
+            continue
+        if path and os.path.exists(path):
+            yield path
+            return
+
+    with tempfile.NamedTemporaryFile(suffix='.upload', delete=False) as spool:
+        file.seek(0)
+        shutil.copyfileobj(file, spool)
+    try:
+        yield spool.name
+    finally:
+        os.unlink(spool.name)
+
+
+# Readers opened by a pool worker, reused across the page batches it gets
+_worker_readers = {}
+
+
+def _extract_page_range(path, start, stop):
+    """Pool task: return the text of pages [start, stop) of the PDF at path"""
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    reader = _worker_readers.get(key)
+    if reader is None:
+        import PyPDF2
+
+        _worker_readers.clear()
+        reader = _worker_readers[key] = PyPDF2.PdfReader(path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+
+_pdf_pool = None
+
+
+def pdf_worker_count():
+    return extraction_setting('PDF_WORKERS', None) or os.cpu_count() or 1
+
+
+def get_pdf_pool():
+    """Process pool for page extraction, created on first large PDF"""
+    global _pdf_pool
+    if _pdf_pool is None:
+        # spawn rather than fork: the web process runs threads
+        _pdf_pool = ProcessPoolExecutor(
+            max_workers=pdf_worker_count(),
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _pdf_pool
+
+
+def iter_pdf_pages(file, max_pages=None, max_bytes=None, parallel_min_pages=None):
+    """Yield the text of each page of a PDF, in page order.
+
+    Files over max_bytes are rejected and pages past max_pages are skipped.
+    PDFs with at least parallel_min_pages pages are split into batches that
+    are extracted on a process pool, with only a few batches in flight so
+    memory stays bounded and an early stop by the caller wastes little work.
+    """
+    max_pages = max_pages if max_pages is not None else extraction_setting('EXTRACT_MAX_PAGES', 2000)
+    max_bytes = max_bytes if max_bytes is not None else extraction_setting('EXTRACT_MAX_BYTES', 50 * 1024 * 1024)
+    if parallel_min_pages is None:
+        parallel_min_pages = extraction_setting('PDF_PARALLEL_MIN_PAGES', 40)
+    check_size(file, max_bytes)
+    import PyPDF2
+
+    with local_path(file) as path:
+        reader = PyPDF2.PdfReader(path)
+        page_count = len(reader.pages)
+        if max_pages and page_count > max_pages:
+            logger.warning("PDF has %s pages; extracting the first %s", page_count, max_pages)
+            page_count = max_pages
+        metrics.pdf_pages.inc(page_count)
+
+        if page_count < parallel_min_pages:
+            for index in range(page_count):
+                yield reader.pages[index].extract_text() or ""
+            return
+        del reader
+
+        pool = get_pdf_pool()
+        batch_size = extraction_setting('PDF_PAGES_PER_TASK', 16)
+        in_flight = max(2, pdf_worker_count() * 2)
+        batches = iter(range(0, page_count, batch_size))
+        pending = []
+        try:
+            for start in batches:
+                pending.append(pool.submit(_extract_page_range, path, start, min(start + batch_size, page_count)))
+                if len(pending) >= in_flight:
+                    yield from pending.pop(0).result()
+            while pending:
+                yield from pending.pop(0).result()
+        finally:
+            # The caller stopped early; drop batches that have not started
+            for future in pending:
+                future.cancel()
+
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+W_P, W_TC, W_TBL, W_T, W_TAB = W + 'p', W + 'tc', W + 'tbl', W + 't', W + 'tab'
+W_BREAKS = (W + 'br', W + 'cr')
+DOCX_TAGS = (W_P, W_TC, W_TBL, W_T, W_TAB) + W_BREAKS
+
+# Parts read after the main body: notes first, then headers and footers
+DOCX_EXTRA_PARTS = (
+    re.compile(r'^word/(footnotes|endnotes)\.xml$'),
+    re.compile(r'^word/header\d*\.xml$'),
+    re.compile(r'^word/footer\d*\.xml$'),
+)
+
+
+def _release(elem):
+    """Free a processed element and the already processed siblings before it"""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+
+def iter_docx_part(stream, include_empty=False):
+    """Yield paragraph and table cell text from one WordprocessingML part.
+
+    Uses an incremental parser and frees each paragraph or table once it has
+    been emitted, so memory use does not grow with the document.
+    """
+    from lxml import etree
+
+    paragraphs = []  # text buffers; text boxes can nest paragraphs
+    cells = []  # paragraphs of the table cells being read, innermost last
+    for event, elem in etree.iterparse(stream, events=('start', 'end'), tag=DOCX_TAGS, huge_tree=True):
+        tag = elem.tag
+        if event == 'start':
+            if tag == W_P:
+                paragraphs.append([])
+            elif tag == W_TC:
+                cells.append([])
+            continue
+
+        if tag == W_T:
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag == W_TAB:
+            if paragraphs:
+                paragraphs[-1].append('\t')
+        elif tag in W_BREAKS:
+            if paragraphs:
+                paragraphs[-1].append('\n')
+        elif tag == W_P:
+            text = ''.join(paragraphs.pop())
+            if paragraphs:
+                # Text box inside a paragraph: keep it with the outer one
+                paragraphs[-1].append(text)
+            elif cells:
+                cells[-1].append(text)
+            else:
+                if text or include_empty:
+                    yield text
+                _release(elem)
+        elif tag == W_TC:
+            text = '\n'.join(part for part in cells.pop() if part)
+            if text:
+                yield text
+            _release(elem)
+        elif tag == W_TBL and not cells:
+            _release(elem)
+
+
+def iter_docx_blocks(file, max_bytes=None, max_xml_bytes=None):
+    """Yield the text of a .docx body, notes, headers and footers.
+
+    Body paragraphs and table cells come first, in document order. Empty
+    body paragraphs are kept so paragraph breaks survive; repeated header
+    and footer text is only emitted once.
+    """
+    max_bytes = max_bytes if max_bytes is not None else extraction_setting('EXTRACT_MAX_BYTES', 50 * 1024 * 1024)
+    if max_xml_bytes is None:
+        max_xml_bytes = extraction_setting('DOCX_MAX_XML_BYTES', 512 * 1024 * 1024)
+    check_size(file, max_bytes)
+
+    with zipfile.ZipFile(file) as archive:
+        names = archive.namelist()
+        parts = ['word/document.xml']
+        for pattern in DOCX_EXTRA_PARTS:
+            parts.extend(sorted(name for name in names if pattern.match(name)))
+
+        seen = set()
+        for part in parts:
+            info = archive.getinfo(part)
+            if max_xml_bytes and info.file_size > max_xml_bytes:
+                raise ValueError(f"{part} expands beyond the {max_xml_bytes} byte limit")
+            body = part == 'word/document.xml'
+            with archive.open(info) as stream:
+                for block in iter_docx_part(stream, include_empty=body):
+                    if not body:
+                        if block in seen:
+                            continue
+                        seen.add(block)
+                    yield block
+
+
+def iter_text_chunks(file, encoding, chunk_bytes=64 * 1024):
+    """Yield the decoded text of a plain text file a chunk at a time"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    while True:
+        data = file.read(chunk_bytes)
+        if not data:
+            break
+        yield decoder.decode(data)
+    yield decoder.decode(b'', final=True)
+
+
+def collect_text(pieces, separator, max_chars=None):
+    """Join text pieces, stopping once max_chars characters are collected"""
+    max_chars = max_chars if max_chars is not None else extraction_setting('EXTRACT_MAX_CHARS', 1_000_000)
+    collected = []
+    total = 0
+    for piece in pieces:
+        collected.append(piece)
+        total += len(piece) + len(separator)
+        if max_chars and total >= max_chars:
+            # Closing the generator lets the extractor release its resources
+            if hasattr(pieces, 'close'):
+                pieces.close()
+            break
+    text = separator.join(collected)
+    return text[:max_chars] if max_chars else text
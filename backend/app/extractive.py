@@ -0,0 +1,156 @@
+"""Extractive pre-compression of long documents.
+
+Sentences are ranked with TextRank over TF-IDF vectors: the similarity of
+every pair of sentences is one matrix product, and the ranking a few dozen
+power-iteration steps on the normalized similarity matrix. The best sentences
+are kept, in their original order, up to a token budget. The document is cut
+into SEGMENTS parts that each get a share of the budget in proportion to
+their length, so the extract covers the whole text instead of only its most
+self-similar section.
+"""
+import re
+
+import numpy as np
+
+from .metrics import CHARS_PER_TOKEN
+SEGMENTS = 8
+MAX_SENTENCE_CHARS = 600  # longer runs without punctuation are cut at a space
+MAX_UNITS = 1500  # past this many sentences, neighbours are ranked together
+VOCABULARY_SIZE = 2048  # terms in the most sentences; rarer ones add little similarity
+DAMPING = 0.85
+ITERATIONS = 100
+TOLERANCE = 1e-5  # on the L1 change of scores that sum to 1; float32 gets no closer
+
+_BOUNDARY = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])\s*|\n\s*\n\s*')
+_WORD = re.compile(r'\w+')
+# Words of two or more characters that are not plain numbers
+_TERM = re.compile(r'\b(?!\d+\b)\w\w+')
+# Han and kana runs have no spaces between words; they are indexed as bigrams
+_IDEOGRAPHS = re.compile('[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]')
+
+
+def split_sentences(text):
+    """Sentences and paragraphs of text, none longer than MAX_SENTENCE_CHARS"""
+    sentences = []
+    for piece in _BOUNDARY.split(text):
+        piece = piece.strip()
+        while len(piece) > MAX_SENTENCE_CHARS:
+            cut = piece.rfind(' ', 0, MAX_SENTENCE_CHARS)
+            if cut <= 0:
+                cut = MAX_SENTENCE_CHARS
+            sentences.append(piece[:cut].strip())
+            piece = piece[cut:].strip()
+        if piece:
+            sentences.append(piece)
+    return sentences
+
+
+def sentence_terms(sentence):
+    if not _IDEOGRAPHS.search(sentence):
+        return _TERM.findall(sentence.lower())
+    terms = []
+    for word in _WORD.findall(sentence.lower()):
+        if _IDEOGRAPHS.search(word):
+            terms.extend(word[i:i + 2] for i in range(max(len(word) - 1, 1)))
+        elif len(word) > 1 and not word.isdigit():
+            terms.append(word)
+    return terms
+
+
+def tfidf_matrix(units):
+    """L2-normalized TF-IDF rows of the units, over the VOCABULARY_SIZE most common terms"""
+    vocabulary = {}
+    terms = [sentence_terms(unit) for unit in units]
+    columns = np.array([vocabulary.setdefault(term, len(vocabulary)) for unit in terms for term in unit], dtype=np.int64)
+    rows = np.repeat(np.arange(len(units)), [len(unit) for unit in terms])
+    count, size = len(units), len(vocabulary)
+    if not size:
+        return np.zeros((count, 1), dtype=np.float32)
+
+    pairs, frequencies = np.unique(rows * size + columns, return_counts=True)
+    rows, columns = pairs // size, pairs % size
+    document_frequency = np.bincount(columns, minlength=size)
+    if size > VOCABULARY_SIZE:
+        kept = np.argsort(-document_frequency, kind='stable')[:VOCABULARY_SIZE]
+        index = np.full(size, -1)
+        index[kept] = np.arange(len(kept))
+        columns = index[columns]
+        mask = columns >= 0
+        rows, columns, frequencies = rows[mask], columns[mask], frequencies[mask]
+        document_frequency = document_frequency[kept]
+        size = len(kept)
+
+    matrix = np.zeros((count, size), dtype=np.float32)
+    idf = np.log((1 + count) / (1 + document_frequency)) + 1
+    matrix[rows, columns] = (1 + np.log(frequencies)) * idf[columns]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def textrank(vectors):
+    """Stationary scores of a random walk over the cosine similarity graph"""
+    count = len(vectors)
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0)
+    totals = similarity.sum(axis=1, keepdims=True)
+    # Units sharing no terms with any other link to all of them evenly
+    transition = np.where(totals > 0, similarity / np.maximum(totals, 1e-12), 1 / count)
+    incoming = np.ascontiguousarray(transition.T)
+    scores = np.full(count, 1 / count, dtype=np.float32)
+    for _ in range(ITERATIONS):
+        updated = (1 - DAMPING) / count + DAMPING * (incoming @ scores)
+        if np.abs(updated - scores).sum() < TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+
+def choose(scores, lengths, budget):
+    """Indexes of the units to keep: the best of each segment within its share, then the best overall"""
+    offsets = np.cumsum(lengths) - lengths
+    total = int(lengths.sum())
+    segments = np.minimum(offsets * SEGMENTS // max(total, 1), SEGMENTS - 1)
+    by_score = np.argsort(-scores, kind='stable')
+    chosen = np.zeros(len(scores), dtype=bool)
+
+    spare = budget
+    for segment in range(SEGMENTS):
+        members = by_score[segments[by_score] == segment]
+        share = budget * int(lengths[members].sum()) // max(total, 1)
+        for index in members:
+            if lengths[index] <= share:
+                chosen[index] = True
+                share -= lengths[index]
+                spare -= lengths[index]
+    # What the segments left unused goes to the best remaining units anywhere
+    for index in by_score:
+        if not chosen[index] and lengths[index] <= spare:
+            chosen[index] = True
+            spare -= lengths[index]
+    return np.flatnonzero(chosen)
+
+
+def select_sentences(text, max_tokens):
+    """The highest-ranked sentences of text, in their original order, within max_tokens.
+
+    Sentences that were not next to each other are put on separate lines.
+    """
+    budget = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= budget:
+        return text
+    sentences = split_sentences(text)
+    size = -(-len(sentences) // MAX_UNITS)
+    units = [' '.join(sentences[i:i + size]) for i in range(0, len(sentences), size)]
+    if len(units) < 2:
+        return text[:budget]
+
+    # The +1 pays for the separator each kept unit adds
+    lengths = np.array([len(unit) + 1 for unit in units])
+    chosen = choose(textrank(tfidf_matrix(units)), lengths, budget)
+    if not len(chosen):
+        return text[:budget]
+
+    parts = [units[chosen[0]]]
+    for previous, index in zip(chosen, chosen[1:]):
+        parts.append(('\n' if index > previous + 1 else ' ') + units[index])
+    return ''.join(parts)
@@ -0,0 +1,412 @@
+"""Background summarization jobs.
+
+Jobs live in the SummaryJob table so they survive restarts and can be shared
+between the in-process worker pool and dedicated `run_summary_workers`
+processes. Workers claim a job with a conditional UPDATE, which is safe even
+when several processes poll the same database.
+
+Under ASGI the async views hand new jobs to aenqueue instead, which runs them
+as tasks on the event loop, so a summarization waiting on the model holds no
+thread.
+
+Every job running in a process has its heartbeat_at renewed by that
+process's JobMonitor; a running job whose heartbeat stops for
+SUMMARY_JOB_TIMEOUT, because its process died, goes back to the queue.
+
+Changing the summary length of a finished row (resummarize) restores a kept
+SummaryVersion at once when there is one, and otherwise queues a job that
+derives the new summary from the stored text and summaries.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+from .models import Content, ExtractedText, SummaryJob, SummaryVersion
+from .utils import asummarize_text, extract_text, resummarize_text, summarize_text, summary_cache, summary_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def process_content(instance):
+    """Extract and summarize a Content row in place"""
+    # Extract text from file if provided
+    if instance.original_file:
+        instance.extracted_text = extract_text(instance.original_file, instance.original_file.name)
+    else:
+        instance.extracted_text = instance.original_text or ''
+
+    # Process with Gemini, reusing a cached result for identical input
+    results = summarize_text(
+        instance.extracted_text,
+        instance.summary_length
+    )
+    if 'error' in results:
+        raise RuntimeError(results['error'])
+    apply_results(instance, results)
+
+
+async def aprocess_content(instance):
+    """Async process_content; extraction runs on a thread"""
+    if instance.original_file:
+        instance.extracted_text = await sync_to_async(extract_text, thread_sensitive=False)(
+            instance.original_file, instance.original_file.name
+        )
+    else:
+        instance.extracted_text = instance.original_text or ''
+
+    results = await asummarize_text(instance.extracted_text, instance.summary_length)
+    if 'error' in results:
+        raise RuntimeError(results['error'])
+    apply_results(instance, results)
+
+
+def process_resummary(instance, length):
+    """Summarize an already summarized Content row at another length.
+
+    Nothing is extracted again and the keywords and title are kept; see
+    resummarize_text for what the new summary is made from.
+    """
+    summaries = list(
+        SummaryVersion.objects.filter(content=instance).exclude(summary_length=length).values_list('summary', flat=True)
+    )
+    stored = ExtractedText.load_condensed(instance.pk)
+    results, condensed = resummarize_text(instance.extracted_text, length, summaries, stored)
+    if condensed is not None and stored is None:
+        ExtractedText.store_condensed(instance.pk, condensed)
+    if 'error' in results:
+        raise RuntimeError(results['error'])
+    instance.summary = results['summary']
+    instance.summary_length = length
+
+
+def resummarize(content, length):
+    """Switch a summarized Content row to another length; True when done at once.
+
+    The current summary is kept as a SummaryVersion first. A length with a
+    kept version, or whose summary of the same text is cached, is applied
+    right away; any other is queued for process_resummary.
+    """
+    SummaryVersion.store(content)
+    summary = SummaryVersion.objects.filter(content=content, summary_length=length).values_list('summary', flat=True).first()
+    if summary is None:
+        cached = summary_cache.get(summary_cache_key(content.extracted_text, length))
+        summary = cached['summary'] if cached is not None else None
+
+    content.error = ''
+    if summary is not None:
+        content.summary, content.summary_length, content.status = summary, length, Content.STATUS_DONE
+        content.save(update_fields=['summary', 'summary_length', 'status', 'error', 'updated_at'])
+        return True
+    content.status = Content.STATUS_PENDING
+    content.save(update_fields=['status', 'error', 'updated_at'])
+    enqueue(content, summary_length=length)
+    return False
+
+
+def apply_results(instance, results):
+    """Copy summarization results onto a Content row"""
+    instance.summary = results.get('summary', '')
+    instance.keywords = results.get('keywords', '')
+    instance.auto_title = results.get('title', 'Content Summary')
+
+
+def enqueue(content, summary_length=''):
+    """Queue a Content row for processing and wake the in-process workers"""
+    job = SummaryJob.objects.create(content=content, summary_length=summary_length)
+    if getattr(settings, 'SUMMARY_WORKERS_IN_PROCESS', True):
+        transaction.on_commit(get_worker_pool().wake)
+    return job
+
+
+# Jobs running on the event loop, referenced so they are not garbage collected
+_async_jobs = set()
+
+
+async def aenqueue(content):
+    """Queue a Content row from async code, running it on the event loop if there is room.
+
+    Up to SUMMARY_ASYNC_MAX_JOBS jobs run as tasks at once; past that, or when
+    workers run out of process, the job waits in the queue like any other.
+    """
+    if not getattr(settings, 'SUMMARY_WORKERS_IN_PROCESS', True):
+        return await SummaryJob.objects.acreate(content=content)
+    if len(_async_jobs) >= getattr(settings, 'SUMMARY_ASYNC_MAX_JOBS', 500):
+        job = await SummaryJob.objects.acreate(content=content)
+        get_worker_pool().wake()
+        return job
+
+    # Created already claimed, so no worker thread picks it up as well
+    now = timezone.now()
+    job = await SummaryJob.objects.acreate(
+        content=content,
+        status=Content.STATUS_RUNNING,
+        started_at=now,
+        heartbeat_at=now,
+        attempts=1,
+    )
+    # Start from an empty context: the request's would tie the task's
+    # sync_to_async calls to a per-request thread that outlives the request
+    task = contextvars.Context().run(asyncio.get_running_loop().create_task, arun_job(job))
+    _async_jobs.add(task)
+    task.add_done_callback(_async_jobs.discard)
+    return job
+
+
+def claim_next_job():
+    """Atomically move the oldest pending job to running and return it"""
+    candidates = (
+        SummaryJob.objects
+        .filter(status=Content.STATUS_PENDING)
+        .order_by('created_at')
+        .values_list('pk', flat=True)[:10]
+    )
+    for job_id in candidates:
+        now = timezone.now()
+        claimed = SummaryJob.objects.filter(pk=job_id, status=Content.STATUS_PENDING).update(
+            status=Content.STATUS_RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return SummaryJob.objects.select_related('content').get(pk=job_id)
+    return None
+
+
+# Ids of the jobs running in this process, whose heartbeats JobMonitor renews
+_running_jobs = set()
+_running_lock = threading.Lock()
+
+
+@contextmanager
+def heartbeat(job):
+    """Keep job's heartbeat renewed while the block runs"""
+    with _running_lock:
+        _running_jobs.add(job.pk)
+    try:
+        yield
+    finally:
+        with _running_lock:
+            _running_jobs.discard(job.pk)
+
+
+def renew_heartbeats():
+    """Mark every job running in this process as alive; return how many"""
+    with _running_lock:
+        job_ids = list(_running_jobs)
+    if job_ids:
+        SummaryJob.objects.filter(pk__in=job_ids, status=Content.STATUS_RUNNING).update(heartbeat_at=timezone.now())
+    return len(job_ids)
+
+
+def run_job(job):
+    """Process a claimed job and record the outcome on the job and its content"""
+    with heartbeat(job):
+        return _run_job(job)
+
+
+def _run_job(job):
+    content = job.content
+    content.status = Content.STATUS_RUNNING
+    content.error = ''
+    content.save(update_fields=['status', 'error', 'updated_at'])
+
+    try:
+        if job.summary_length:
+            process_resummary(content, job.summary_length)
+        else:
+            process_content(content)
+    except Exception as e:
+        logger.exception("Summary job %s failed", job.pk)
+        finished = Content.STATUS_FAILED
+        content.error = str(e)
+    else:
+        finished = Content.STATUS_DONE
+
+    content.status = finished
+    with metrics.stage_timer('db_save'):
+        content.save()
+
+    job.status = finished
+    job.error = content.error
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+    return job
+
+
+async def arun_job(job):
+    """Async run_job for a job claimed by aenqueue"""
+    with heartbeat(job):
+        return await _arun_job(job)
+
+
+async def _arun_job(job):
+    content = job.content
+    content.status = Content.STATUS_RUNNING
+    content.error = ''
+    await content.asave(update_fields=['status', 'error', 'updated_at'])
+
+    try:
+        if job.summary_length:
+            await sync_to_async(process_resummary, thread_sensitive=False)(content, job.summary_length)
+        else:
+            await aprocess_content(content)
+    except Exception as e:
+        logger.exception("Summary job %s failed", job.pk)
+        finished = Content.STATUS_FAILED
+        content.error = str(e)
+    else:
+        finished = Content.STATUS_DONE
+
+    content.status = finished
+    with metrics.stage_timer('db_save'):
+        await content.asave()
+
+    job.status = finished
+    job.error = content.error
+    job.finished_at = timezone.now()
+    await job.asave(update_fields=['status', 'error', 'finished_at'])
+    return job
+
+
+def requeue_stale_jobs():
+    """Return jobs whose heartbeat stopped (e.g. after a crash) to the queue"""
+    timeout = getattr(settings, 'SUMMARY_JOB_TIMEOUT', 600)
+    max_attempts = getattr(settings, 'SUMMARY_JOB_MAX_ATTEMPTS', 3)
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    stale = SummaryJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=Content.STATUS_RUNNING,
+    )
+
+    exhausted = stale.filter(attempts__gte=max_attempts)
+    Content.objects.filter(jobs__in=exhausted).update(
+        status=Content.STATUS_FAILED,
+        error='Processing timed out',
+        updated_at=timezone.now(),
+    )
+    exhausted.update(status=Content.STATUS_FAILED, error='Processing timed out', finished_at=timezone.now())
+    return stale.update(status=Content.STATUS_PENDING)
+
+
+def drain_queue():
+    """Process pending jobs until the queue is empty; return how many ran"""
+    processed = 0
+    while True:
+        close_old_connections()
+        job = claim_next_job()
+        if job is None:
+            return processed
+        run_job(job)
+        processed += 1
+
+
+class WorkerPool:
+    """Bounded pool of threads draining the job queue inside a web process"""
+
+    def __init__(self, size):
+        self.size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='summary-worker')
+        self._lock = threading.Lock()
+        self._active = 0
+        self._pending_wakeups = 0
+
+    def wake(self):
+        """Start a drain pass if a slot is free, otherwise flag a running one"""
+        with self._lock:
+            self._pending_wakeups += 1
+            if self._active >= self.size:
+                return
+            self._active += 1
+        self._executor.submit(self._run)
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    self._pending_wakeups = 0
+                try:
+                    # Jobs a crashed process left running go back to the queue first
+                    requeue_stale_jobs()
+                    drain_queue()
+                except Exception:
+                    logger.exception("Summary worker crashed while draining the queue")
+                with self._lock:
+                    # A job may have been queued after our last claim attempt
+                    if not self._pending_wakeups:
+                        self._active -= 1
+                        return
+        finally:
+            close_old_connections()
+
+
+class JobMonitor(threading.Thread):
+    """Renews the heartbeats of this process's jobs every SUMMARY_JOB_HEARTBEAT seconds.
+
+    With a pool it also wakes the pool, whose drain pass requeues stale jobs
+    first, so jobs a crashed process left are recovered without a new upload.
+    """
+
+    def __init__(self, pool=None, interval=None):
+        super().__init__(name='summary-job-monitor', daemon=True)
+        self.pool = pool
+        self.interval = interval or getattr(settings, 'SUMMARY_JOB_HEARTBEAT', 60)
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.tick()
+
+    def tick(self):
+        try:
+            renew_heartbeats()
+            if self.pool is not None:
+                self.pool.wake()
+        except Exception:
+            logger.exception("Summary job monitor failed")
+        finally:
+            close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_worker_pool():
+    """Return the process-wide worker pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = WorkerPool(getattr(settings, 'SUMMARY_WORKER_THREADS', 4))
+                # Pick up anything left over from a previous process, then check again on a timer
+                _pool.wake()
+                JobMonitor(_pool).start()
+    return _pool
+
+
+def start_worker_pool(sender=None, **kwargs):
+    """request_started receiver that starts the in-process workers with the first request.
+
+    The queue left by a previous process is then drained without waiting for a
+    new upload. Management commands and `gunicorn --preload` masters serve no
+    requests, so they never start worker threads.
+    """
+    request_started.disconnect(start_worker_pool)
+    if getattr(settings, 'SUMMARY_WORKERS_IN_PROCESS', True):
+        get_worker_pool()
@@ -0,0 +1,264 @@
+"""Language identification from character n-grams.
+
+Texts in a distinctive script (Chinese, Japanese, Korean, Arabic, Cyrillic,
+Greek, Hebrew, Devanagari, Thai) are recognized by the share of their letters
+in that script. Cyrillic, Arabic and Devanagari are written in several
+languages, which are told apart by letters only some of them use (see
+SHARED_SCRIPTS); without such a letter the guess is reported with at most
+SHARED_SCRIPT_CONFIDENCE, which leaves the call to the model. Latin-script
+texts are scored against per-language profiles
+of 1- to 3-character n-gram frequencies, built from the sample texts in
+data/langid_corpus by `manage.py build_language_profiles` and stored in
+data/langid_profiles.json.
+
+N-grams are hashed into a fixed number of buckets, so scoring a batch is one
+gather from a (buckets x languages) matrix of log-frequencies followed by a
+segmented sum, with no per-n-gram Python work.
+"""
+import json
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+PROFILE_PATH = DATA_DIR / 'langid_profiles.json'
+CORPUS_DIR = DATA_DIR / 'langid_corpus'
+
+ORDERS = (1, 2, 3)
+HASH_BITS = 16
+PROFILE_SIZE = 300  # most frequent n-grams kept per order and language
+SAMPLE_CHARS = 1000  # characters of each text that are looked at
+FLOOR = 1e-5  # relative frequency assumed for n-grams missing from a profile
+EVIDENCE_CAP = 10  # n-grams beyond this do not make the confidence any higher
+DEFAULT_LANGUAGE = 'en'
+
+_PRIME = np.uint64(0x100000001B3)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_SHIFT = np.uint64(64 - HASH_BITS)
+_SPACE = 0x20
+_NON_LETTERS = re.compile(r'[\W\d_]+')
+
+# Unicode ranges of the scripts that identify a language on their own.
+# Japanese is kana, plus any Han characters that appear alongside kana.
+LATIN = 'latin'
+SCRIPT_RANGES = (
+    (0x0041, 0x024F, LATIN),
+    (0x0370, 0x03FF, 'el'),
+    (0x0400, 0x04FF, 'ru'),
+    (0x0590, 0x05FF, 'he'),
+    (0x0600, 0x06FF, 'ar'),
+    (0x0750, 0x077F, 'ar'),
+    (0x0900, 0x097F, 'hi'),
+    (0x0E00, 0x0E7F, 'th'),
+    (0x1100, 0x11FF, 'ko'),
+    (0x3040, 0x30FF, 'ja'),
+    (0x3130, 0x318F, 'ko'),
+    (0x3400, 0x4DBF, 'zh'),
+    (0x4E00, 0x9FFF, 'zh'),
+    (0xAC00, 0xD7A3, 'ko'),
+)
+# Languages that share the script of another language's code, each with letters
+# it uses and the ones checked before it do not, in the order they are checked.
+# The script's own language is last.
+SHARED_SCRIPTS = {
+    'ru': (
+        ('be', 'ў'),
+        ('uk', 'іїєґ'),
+        ('mk', 'ѓќѕ'),
+        ('sr', 'ђћјљњџ'),
+        ('ru', 'ыэ'),
+        ('bg', 'ъ'),
+    ),
+    'ar': (
+        ('ur', 'ٹڈڑںے'),
+        ('fa', 'پچژگکی'),
+        ('ar', 'ةيك'),
+    ),
+    'hi': (
+        ('mr', 'ळ'),
+    ),
+}
+# Below any sensible LANGUAGE_CONFIDENCE_THRESHOLD
+SHARED_SCRIPT_CONFIDENCE = 0.5
+SCRIPTS = [LATIN] + sorted({script for _, _, script in SCRIPT_RANGES} - {LATIN})
+_RANGE_STARTS = np.array([start for start, _, _ in SCRIPT_RANGES], dtype=np.uint64)
+_RANGE_ENDS = np.array([end for _, end, _ in SCRIPT_RANGES], dtype=np.uint64)
+_RANGE_SCRIPTS = np.array([SCRIPTS.index(script) for _, _, script in SCRIPT_RANGES])
+_LATIN, _JA, _ZH = (SCRIPTS.index(script) for script in (LATIN, 'ja', 'zh'))
+
+
+def clean(text, limit=SAMPLE_CHARS):
+    """Lowercase text with every run of non-letters collapsed to one space"""
+    if limit:
+        text = text[:limit]
+    return ' ' + _NON_LETTERS.sub(' ', text.lower()).strip() + ' '
+
+
+def codepoints(text):
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+
+def _mix(hashes):
+    return ((hashes * _MIX) >> _SHIFT).astype(np.intp)
+
+
+def _ngram_hashes(codes):
+    """Hashes of the n-grams starting at each position, one array per order"""
+    hashes = [codes]
+    for _ in ORDERS[1:]:
+        shorter = hashes[-1]
+        hashes.append(shorter[:-1] * _PRIME + codes[len(codes) - len(shorter) + 1:])
+    return hashes
+
+
+def gram_buckets(grams, n):
+    """Buckets of a list of n-character strings"""
+    if not grams:
+        return np.empty(0, dtype=np.intp)
+    codes = codepoints(''.join(grams)).reshape(len(grams), n)
+    hashes = codes[:, 0]
+    for offset in range(1, n):
+        hashes = hashes * _PRIME + codes[:, offset]
+    return _mix(hashes)
+
+
+class LanguageModel:
+    """Log-frequency matrix (buckets x languages) of the Latin-script profiles"""
+
+    def __init__(self, profiles):
+        self.languages = sorted(profiles)
+        weights = np.full((1 << HASH_BITS, len(self.languages)), np.log(FLOOR), dtype=np.float32)
+        for column, language in enumerate(self.languages):
+            profile = profiles[language]
+            for n in ORDERS:
+                grams = [gram for gram in profile['ngrams'] if len(gram) == n]
+                counts = np.array([profile['ngrams'][gram] for gram in grams], dtype=np.float64)
+                frequencies = counts / profile['totals'][str(n)]
+                weights[gram_buckets(grams, n), column] = np.log(frequencies + FLOOR)
+        self.weights = weights
+
+    @classmethod
+    def load(cls, path=PROFILE_PATH):
+        with open(path, encoding='utf-8') as file:
+            return cls(json.load(file)['languages'])
+
+    def identify(self, texts):
+        """(language, confidence) for each text.
+
+        The cleaned texts are joined into one code point array. N-grams are
+        laid out by start position, so those of one text stay contiguous;
+        n-grams that would span two texts are dropped.
+        """
+        if not texts:
+            return []
+        cleaned = [clean(text) for text in texts]
+        lengths = np.array([len(text) for text in cleaned])
+        text_starts = np.cumsum(lengths) - lengths
+        codes = codepoints(''.join(cleaned))
+        owners = np.repeat(np.arange(len(cleaned)), lengths)
+
+        grid = np.zeros((len(codes), len(ORDERS)), dtype=np.uint64)
+        keep = np.zeros(grid.shape, dtype=bool)
+        for column, (n, hashes) in enumerate(zip(ORDERS, _ngram_hashes(codes))):
+            grid[:len(hashes), column] = hashes
+            if n == 1:
+                # A lone space carries no information
+                keep[:, column] = codes != _SPACE
+            else:
+                keep[:len(hashes), column] = owners[:len(hashes)] == owners[n - 1:]
+        buckets = _mix(grid[keep])
+
+        # Every cleaned text is at least two spaces long, so each one has at
+        # least one n-gram and no reduceat segment is empty
+        evidence = np.add.reduceat(keep.sum(axis=1), text_starts)
+        scores = np.add.reduceat(self.weights.take(buckets, axis=0), np.cumsum(evidence) - evidence, axis=0)
+        # Average log-likelihood scaled to a capped amount of evidence, so
+        # long texts are not reported as infinitely certain
+        scores *= (np.minimum(evidence, EVIDENCE_CAP) / evidence)[:, None]
+        probabilities = np.exp(scores - scores.max(axis=1, keepdims=True))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        best = probabilities.argmax(axis=1)
+        best_probability = probabilities.max(axis=1)
+
+        counts = _script_counts(codes, owners, len(cleaned))
+        # Kanji in Japanese text would otherwise count as Chinese
+        japanese = counts[:, _JA] > 0
+        counts[japanese, _JA] += counts[japanese, _ZH]
+        counts[japanese, _ZH] = 0
+        letters = counts.sum(axis=1)
+        scripts = counts.argmax(axis=1)
+        shares = counts.max(axis=1) / np.maximum(letters, 1)
+
+        results = []
+        for index in range(len(cleaned)):
+            if not letters[index]:
+                results.append((DEFAULT_LANGUAGE, 0.0))
+            elif scripts[index] == _LATIN:
+                confidence = best_probability[index] * shares[index]
+                results.append((self.languages[best[index]], round(float(confidence), 3)))
+            else:
+                language, confidence = script_language(cleaned[index], SCRIPTS[scripts[index]], float(shares[index]))
+                results.append((language, round(confidence, 3)))
+        return results
+
+
+def script_language(text, language, share):
+    """(language, confidence) of a text written mostly in the script of `language`"""
+    if language not in SHARED_SCRIPTS:
+        return language, share
+    for candidate, letters in SHARED_SCRIPTS[language]:
+        if any(letter in text for letter in letters):
+            return candidate, share
+    return language, min(share, SHARED_SCRIPT_CONFIDENCE)
+
+
+def _script_counts(codes, owners, size):
+    """Letters per script (columns in SCRIPTS order) for each text"""
+    index = np.maximum(np.searchsorted(_RANGE_STARTS, codes, side='right') - 1, 0)
+    inside = (codes >= _RANGE_STARTS[index]) & (codes <= _RANGE_ENDS[index])
+    width = len(SCRIPTS)
+    cells = owners[inside] * width + _RANGE_SCRIPTS[index[inside]]
+    return np.bincount(cells, minlength=size * width).reshape(size, width)
+
+
+def build_profiles(corpus_dir=CORPUS_DIR, size=PROFILE_SIZE):
+    """N-gram counts of each <language>.txt file in corpus_dir"""
+    languages = {}
+    for path in sorted(Path(corpus_dir).glob('*.txt')):
+        text = clean(path.read_text(encoding='utf-8'), limit=None)
+        ngrams = {}
+        totals = {}
+        for n in ORDERS:
+            counts = Counter(text[i:i + n] for i in range(len(text) - n + 1))
+            counts.pop(' ', None)
+            totals[str(n)] = sum(counts.values())
+            ngrams.update(counts.most_common(size))
+        languages[path.stem] = {'totals': totals, 'ngrams': ngrams}
+    return {'orders': list(ORDERS), 'languages': languages}
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Return the process-wide model, loading the profiles on first use"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = LanguageModel.load()
+    return _model
+
+
+def identify_language(text):
+    """(language code, confidence between 0 and 1) for one text"""
+    return get_model().identify([text])[0]
+
+
+def identify_languages(texts):
+    """(language code, confidence) for each of many texts, scored together"""
+    return get_model().identify(list(texts))
@@ -0,0 +1,390 @@
+"""Model access behind a small backend interface.
+
+The backend is chosen with the LLM_BACKEND setting, in the same shape as
+Django's CACHES entries:
+
+    LLM_BACKEND = {
+        'BACKEND': 'app.llm.FakeBackend',
+        'OPTIONS': {'latency': 0.5, 'tokens_per_second': 80},
+    }
+
+All model calls in the app go through get_backend(), so load tests and
+benchmarks can swap in FakeBackend and measure our own overhead without a
+live model.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+
+class LLMError(Exception):
+    """A model call failed"""
+    retryable = False
+
+
+class TransientLLMError(LLMError):
+    """A failure worth retrying: overload, timeout or a server error"""
+    retryable = True
+
+
+class RateLimitError(TransientLLMError):
+    """The provider asked us to slow down (HTTP 429)"""
+
+
+class CircuitOpenError(LLMError):
+    """Calls are being refused after repeated provider failures"""
+
+
+# HTTP statuses of provider errors that may succeed when retried
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_rate_limit(error):
+    return isinstance(error, RateLimitError) or getattr(error, 'code', None) == 429
+
+
+def is_retryable(error):
+    if isinstance(error, LLMError):
+        return error.retryable
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return getattr(error, 'code', None) in RETRYABLE_STATUS_CODES
+
+
+class LLMBackend:
+    """Base class for model backends.
+
+    Subclasses implement _generate and optionally _stream. Every call goes
+    through the shared guard from app.resilience, which limits concurrency,
+    retries transient errors and fails fast while the provider is down. Call
+    time is accumulated in `stats` so callers can separate model latency
+    from their own overhead.
+    """
+    model_name = ''
+
+    @classmethod
+    def configured_model(cls, options):
+        """Name of the model an instance created with `options` would call"""
+        return options.get('model', cls.model_name)
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.stats = {'calls': 0, 'errors': 0, 'model_seconds': 0.0}
+
+    def _record(self, started, prompt, reply_chars=0, failed=False):
+        with self._stats_lock:
+            self.stats['calls'] += 1
+            self.stats['errors'] += int(failed)
+            self.stats['model_seconds'] += time.perf_counter() - started
+        if metrics.state.enabled:
+            metrics.llm_calls.inc(1, 'error' if failed else 'ok')
+            metrics.llm_tokens.inc(metrics.estimate_tokens(prompt), 'prompt')
+            metrics.llm_tokens.inc((reply_chars + 3) // 4, 'completion')
+
+    def generate(self, prompt, schema=None):
+        """Return the complete reply text for a prompt.
+
+        With a `schema` (an OpenAPI-style dict) the reply is requested as a
+        JSON object of that shape; backends without a JSON mode of their own
+        rely on the prompt asking for it.
+        """
+        return call_guard().call(self._generate_once, prompt, schema)
+
+    def stream(self, prompt):
+        """Yield the reply text in pieces as it is generated"""
+        yield from call_guard().stream(self._stream_once, prompt)
+
+    async def agenerate(self, prompt, schema=None):
+        """Async variant of generate"""
+        return await call_guard().acall(self._agenerate_once, prompt, schema)
+
+    def _generate_once(self, prompt, schema=None):
+        started = time.perf_counter()
+        try:
+            text = self._generate(prompt) if schema is None else self._generate_json(prompt, schema)
+        except Exception:
+            self._record(started, prompt, failed=True)
+            raise
+        self._record(started, prompt, len(text))
+        return text
+
+    def _stream_once(self, prompt):
+        started = time.perf_counter()
+        reply_chars = 0
+        try:
+            for piece in self._stream(prompt):
+                reply_chars += len(piece)
+                yield piece
+        except Exception:
+            self._record(started, prompt, reply_chars, failed=True)
+            raise
+        self._record(started, prompt, reply_chars)
+
+    async def _agenerate_once(self, prompt, schema=None):
+        started = time.perf_counter()
+        try:
+            if schema is None:
+                text = await self._agenerate(prompt)
+            else:
+                text = await self._agenerate_json(prompt, schema)
+        except Exception:
+            self._record(started, prompt, failed=True)
+            raise
+        self._record(started, prompt, len(text))
+        return text
+
+    def _generate(self, prompt):
+        raise NotImplementedError
+
+    async def _agenerate(self, prompt):
+        # Blocking backends run in a thread by default
+        return await asyncio.to_thread(self._generate, prompt)
+
+    def _stream(self, prompt):
+        # Backends without native streaming deliver the reply in one piece
+        yield self._generate(prompt)
+
+    def _generate_json(self, prompt, schema):
+        return self._generate(prompt)
+
+    async def _agenerate_json(self, prompt, schema):
+        return await self._agenerate(prompt)
+
+
+class GeminiBackend(LLMBackend):
+    """Google Gemini through the google-generativeai client"""
+    model_name = 'gemini-1.5-flash'
+
+    def __init__(self, model=model_name, api_key=None):
+        api_key = api_key or getattr(settings, 'GEMINI_API_KEY', None)
+        if not api_key:
+            raise ImproperlyConfigured("GeminiBackend needs an API key: set GEMINI_API_KEY or OPTIONS['api_key']")
+        # The client library takes about a second to import; only model calls need it
+        import google.generativeai as genai
+
+        super().__init__()
+        self.model_name = model
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model)
+
+    def _generate(self, prompt):
+        try:
+            return self.model.generate_content(prompt).text
+        except Exception as e:
+            raise self.translate_error(e) from e
+
+    async def _agenerate(self, prompt):
+        try:
+            response = await self.model.generate_content_async(prompt)
+            return response.text
+        except Exception as e:
+            raise self.translate_error(e) from e
+
+    def _stream(self, prompt):
+        try:
+            for chunk in self.model.generate_content(prompt, stream=True):
+                if chunk.text:
+                    yield chunk.text
+        except Exception as e:
+            raise self.translate_error(e) from e
+
+    def _generate_json(self, prompt, schema):
+        try:
+            return self.model.generate_content(prompt, generation_config=self.json_config(schema)).text
+        except Exception as e:
+            raise self.translate_error(e) from e
+
+    async def _agenerate_json(self, prompt, schema):
+        try:
+            response = await self.model.generate_content_async(prompt, generation_config=self.json_config(schema))
+            return response.text
+        except Exception as e:
+            raise self.translate_error(e) from e
+
+    @staticmethod
+    def json_config(schema):
+        """Gemini's structured output: a JSON reply constrained to schema"""
+        import google.generativeai as genai
+
+        return genai.GenerationConfig(response_mime_type='application/json', response_schema=schema)
+
+    @staticmethod
+    def translate_error(error):
+        """Map google.api_core errors, which carry an HTTP `code`, onto LLMError"""
+        if is_rate_limit(error):
+            return RateLimitError(str(error))
+        if is_retryable(error):
+            return TransientLLMError(str(error))
+        return LLMError(str(error))
+
+
+class FakeBackend(LLMBackend):
+    """Deterministic in-process stand-in for a real model.
+
+    Replies are built from the words of the prompt, so the same prompt always
+    gets the same reply. Each call waits `latency` seconds before the first
+    token and then emits `tokens_per_second` words per second (0 disables
+    the delays). `failure_rate` of the calls raise LLMError and
+    `throttle_rate` of them raise RateLimitError, drawn from a random
+    generator seeded with `seed`. JSON replies are built from the schema's
+    fields, and `malformed_rate` of them come back cut off.
+    """
+    model_name = 'fake'
+
+    def __init__(self, latency=0.0, tokens_per_second=0, failure_rate=0.0, throttle_rate=0.0,
+                 malformed_rate=0.0, seed=0):
+        super().__init__()
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.malformed_rate = malformed_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _maybe_fail(self):
+        if not (self.failure_rate or self.throttle_rate):
+            return
+        with self._random_lock:
+            draw = self._random.random()
+        if draw < self.throttle_rate:
+            raise RateLimitError("Injected rate limit from FakeBackend")
+        if draw < self.throttle_rate + self.failure_rate:
+            raise LLMError("Injected failure from FakeBackend")
+
+    def _reply(self, prompt, schema=None):
+        """Build a plausible reply for the prompts used by app.utils"""
+        source = prompt.split('Text:', 1)[-1]
+        words = re.findall(r'\w+', source) or ['empty']
+        offset = int(hashlib.sha1(prompt.encode('utf-8')).hexdigest(), 16) % len(words)
+        words = words[offset:] + words[:offset]
+
+        if schema is not None:
+            return self._json_reply(prompt, schema, words)
+        if 'KEYWORDS:' in prompt:
+            keywords = self._keywords(words)
+            return (
+                f"KEYWORDS: {', '.join(keywords)}\n"
+                f"TITLE: {' '.join(w.capitalize() for w in keywords[:4])}\n"
+                "TYPE: document\n"
+                "LANGUAGE: en"
+            )
+        return self._summary(prompt, words)
+
+    def _json_reply(self, prompt, schema, words):
+        keywords = self._keywords(words)
+        fields = {
+            'keywords': keywords,
+            'title': ' '.join(w.capitalize() for w in keywords[:4]),
+            'type': 'document',
+            'language': 'en',
+            'summary': self._summary(prompt, words),
+        }
+        reply = json.dumps({
+            name: fields.get(name, [] if spec.get('type') == 'array' else ' '.join(words[:5]))
+            for name, spec in schema.get('properties', {}).items()
+        }, ensure_ascii=False)
+        if self.malformed_rate:
+            with self._random_lock:
+                malformed = self._random.random() < self.malformed_rate
+            if malformed:
+                reply = reply[:len(reply) // 2]
+        return reply
+
+    @staticmethod
+    def _keywords(words):
+        return list(dict.fromkeys(w.lower() for w in words if len(w) > 3))[:8] or ['document']
+
+    @staticmethod
+    def _summary(prompt, words):
+        target = re.search(r'(?:exactly|about) (\d+) words', prompt)
+        count = int(target.group(1)) if target else 50
+        return ' '.join(words[i % len(words)] for i in range(max(count, 1)))
+
+    def _tokens(self, prompt, schema=None):
+        if self.latency:
+            time.sleep(self.latency)
+        self._maybe_fail()
+        for word in self._reply(prompt, schema).split(' '):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield word
+
+    def _generate(self, prompt):
+        return ' '.join(self._tokens(prompt))
+
+    def _generate_json(self, prompt, schema):
+        return ' '.join(self._tokens(prompt, schema))
+
+    def _stream(self, prompt):
+        for index, token in enumerate(self._tokens(prompt)):
+            yield token if index == 0 else ' ' + token
+
+    async def _agenerate(self, prompt, schema=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._maybe_fail()
+        reply = self._reply(prompt, schema)
+        if self.tokens_per_second:
+            await asyncio.sleep(len(reply.split(' ')) / self.tokens_per_second)
+        return reply
+
+    async def _agenerate_json(self, prompt, schema):
+        return await self._agenerate(prompt, schema)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the process-wide backend configured in settings.LLM_BACKEND, created on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = getattr(settings, 'LLM_BACKEND', {})
+                backend_class = import_string(config.get('BACKEND', 'app.llm.GeminiBackend'))
+                _backend = backend_class(**config.get('OPTIONS', {}))
+    return _backend
+
+
+def configured_backend():
+    """(backend path, model name) from settings.LLM_BACKEND, without creating the backend"""
+    config = getattr(settings, 'LLM_BACKEND', {})
+    path = config.get('BACKEND', 'app.llm.GeminiBackend')
+    return path, import_string(path).configured_model(config.get('OPTIONS', {}))
+
+
+def call_guard():
+    # Imported here because app.resilience imports the error classes above
+    from .resilience import get_guard
+    return get_guard()
+
+
+def reset_backend():
+    """Forget the current backend so the next call re-reads the settings"""
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def _forget_backend_in_child():
+    # A forked worker builds its own client instead of sharing the parent's connections
+    global _backend, _backend_lock
+    _backend = None
+    _backend_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_backend_in_child)
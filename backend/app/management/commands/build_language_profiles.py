@@ -0,0 +1,37 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from app.langid import CORPUS_DIR, PROFILE_PATH, PROFILE_SIZE, build_profiles
+
+
+class Command(BaseCommand):
+    help = "Build the n-gram language profiles from the sample texts in app/data/langid_corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--corpus', type=Path, default=CORPUS_DIR,
+            help="Directory of <language code>.txt sample texts",
+        )
+        parser.add_argument(
+            '--output', type=Path, default=PROFILE_PATH,
+            help="Profile file to write",
+        )
+        parser.add_argument(
+            '--size', type=int, default=PROFILE_SIZE,
+            help="Most frequent n-grams kept per order and language",
+        )
+
+    def handle(self, *args, **options):
+        profiles = build_profiles(options['corpus'], options['size'])
+        if not profiles['languages']:
+            self.stderr.write(f"No sample texts found in {options['corpus']}")
+            return
+        options['output'].write_text(
+            json.dumps(profiles, ensure_ascii=False, sort_keys=True, indent=1) + '\n',
+            encoding='utf-8',
+        )
+        self.stdout.write(
+            f"Wrote profiles for {', '.join(sorted(profiles['languages']))} to {options['output']}"
+        )
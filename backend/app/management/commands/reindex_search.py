@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.search import reindex
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of content titles, keywords and summaries"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Rows indexed per transaction",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        verbose = options['verbosity'] > 1
+        count = reindex(
+            batch_size=options['batch_size'],
+            progress=(lambda done: self.stdout.write(f"{done} rows indexed")) if verbose else None,
+        )
+        self.stdout.write(f"Indexed {count} rows in {time.monotonic() - started:.1f}s")
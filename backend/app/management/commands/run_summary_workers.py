@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.jobs import JobMonitor, drain_queue, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Run dedicated worker threads that process queued summarization jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int,
+            default=getattr(settings, 'SUMMARY_WORKER_THREADS', 4),
+            help="Number of jobs processed concurrently",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=getattr(settings, 'SUMMARY_WORKER_POLL_INTERVAL', 2),
+            help="Seconds to sleep when the queue is empty",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Drain the queue once and exit",
+        )
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        self.stdout.write(f"Processing summary jobs with {threads} worker(s)")
+
+        # Keeps the jobs of this process from looking stale to the others
+        monitor = JobMonitor()
+        monitor.start()
+        try:
+            with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='summary-worker') as executor:
+                workers = [executor.submit(self.work, options) for _ in range(threads)]
+                processed = sum(worker.result() for worker in workers)
+        finally:
+            monitor.stop()
+        self.stdout.write(f"Processed {processed} job(s)")
+
+    def work(self, options):
+        processed = 0
+        while True:
+            requeue_stale_jobs()
+            processed += drain_queue()
+            if options['once']:
+                return processed
+            time.sleep(options['poll_interval'])
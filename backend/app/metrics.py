@@ -0,0 +1,274 @@
+"""Process-local counters and histograms for the summarization pipeline.
+
+Stages are timed with `stage_timer`:
+
+    with stage_timer('extract'):
+        text = extract_text(file, name)
+
+which records the duration in the `summarizer_stage_seconds` histogram, counts
+exceptions in `summarizer_stage_errors_total`, and, when Server-Timing is on,
+adds the stage to the header of the current response. Everything is exported
+in the Prometheus text format by `render_prometheus`.
+
+With METRICS_ENABLED = False the helpers return before touching any lock, so
+instrumented code pays about one attribute lookup per call.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.decorators import sync_and_async_middleware
+
+CHARS_PER_TOKEN = 4  # of estimate_tokens; the model's own tokenizer is never loaded
+
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class State:
+    enabled = True
+    server_timing = False
+
+
+state = State()
+
+
+def configure():
+    state.enabled = getattr(settings, 'METRICS_ENABLED', True)
+    state.server_timing = state.enabled and getattr(settings, 'METRICS_SERVER_TIMING', False)
+
+
+@receiver(setting_changed)
+def _reconfigure(setting, **kwargs):
+    if setting in ('METRICS_ENABLED', 'METRICS_SERVER_TIMING'):
+        configure()
+
+
+def _label_text(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def inc(self, amount=1, *label_values):
+        if not state.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return self._values.get(label_values, 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield self.name, _label_text(self.labels, label_values), value
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=STAGE_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def observe(self, value, *label_values):
+        if not state.enabled:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *label_values):
+        series = self._series.get(label_values)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        for label_values, series in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series[:-1]):
+                cumulative += count
+                labels = _label_text((*self.labels, 'le'), (*label_values, bound))
+                yield f'{self.name}_bucket', labels, cumulative
+            labels = _label_text(self.labels, label_values)
+            yield f'{self.name}_sum', labels, series[-1]
+            yield f'{self.name}_count', labels, cumulative
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+registry = []
+
+stage_seconds = Histogram(
+    'summarizer_stage_seconds', 'Time spent in each pipeline stage', labels=('stage',)
+)
+stage_errors = Counter(
+    'summarizer_stage_errors_total', 'Pipeline stages that raised an exception', labels=('stage',)
+)
+documents = Counter(
+    'summarizer_documents_total', 'Documents extracted, by file type', labels=('type',)
+)
+document_bytes = Counter('summarizer_document_bytes_total', 'Bytes of documents extracted')
+pdf_pages = Counter('summarizer_pdf_pages_total', 'PDF pages read')
+words = Counter('summarizer_words_total', 'Words of text prepared for summarization')
+llm_calls = Counter(
+    'summarizer_llm_calls_total', 'Model calls by outcome', labels=('outcome',)
+)
+llm_tokens = Counter(
+    'summarizer_llm_tokens_total', 'Model tokens, estimated at four characters per token',
+    labels=('direction',)
+)
+structured_replies = Counter(
+    'summarizer_structured_replies_total',
+    'Single-call JSON replies, by whether they parsed or fell back to two calls',
+    labels=('outcome',)
+)
+render_requests = Counter(
+    'summarizer_render_requests_total', 'Download renderings by format and cache outcome',
+    labels=('format', 'outcome')
+)
+
+# Stages of the current request, for the Server-Timing header
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class _StageTimer:
+    __slots__ = ('stage', 'started')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_stage(self.stage, time.perf_counter() - self.started, failed=exc_type is not None)
+        return False
+
+
+_disabled_timer = nullcontext()
+
+
+def stage_timer(stage):
+    """Context manager that times one pipeline stage"""
+    if not state.enabled:
+        return _disabled_timer
+    return _StageTimer(stage)
+
+
+def record_stage(stage, seconds, failed=False):
+    """Record a stage duration measured by the caller"""
+    if not state.enabled:
+        return
+    stage_seconds.observe(seconds, stage)
+    if failed:
+        stage_errors.inc(1, stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def render_prometheus(extra=()):
+    """All metrics in the Prometheus text exposition format.
+
+    `extra` is an iterable of (name, kind, documentation, value) tuples for
+    values read at scrape time.
+    """
+    lines = []
+    for metric in registry:
+        lines.append(f'# HELP {metric.name} {metric.documentation}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        for name, labels, value in metric.samples():
+            lines.append(f'{name}{labels} {value}')
+    for name, kind, documentation, value in extra:
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def server_timing_header(timings, total):
+    parts = [f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in timings]
+    parts.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(parts)
+
+
+@sync_and_async_middleware
+def server_timing_middleware(get_response):
+    """Add a Server-Timing header with the stages run while handling the request"""
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            if not state.server_timing:
+                return await get_response(request)
+            started = time.perf_counter()
+            token = _request_timings.set([])
+            try:
+                response = await get_response(request)
+                response['Server-Timing'] = server_timing_header(_request_timings.get(), time.perf_counter() - started)
+            finally:
+                _request_timings.reset(token)
+            return response
+    else:
+        def middleware(request):
+            if not state.server_timing:
+                return get_response(request)
+            started = time.perf_counter()
+            token = _request_timings.set([])
+            try:
+                response = get_response(request)
+                response['Server-Timing'] = server_timing_header(_request_timings.get(), time.perf_counter() - started)
+            finally:
+                _request_timings.reset(token)
+            return response
+
+    return middleware
+
+
+configure()
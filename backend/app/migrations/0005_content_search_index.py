@@ -0,0 +1,65 @@
+from django.db import migrations
+
+# FTS5 index of Content titles, keywords and summaries; see app/search.py.
+# The update trigger only fires when an indexed column actually changed.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE app_content_fts USING fts5(
+        owner, auto_title, keywords, summary,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER app_content_fts_insert AFTER INSERT ON app_content BEGIN
+        INSERT INTO app_content_fts (rowid, owner, auto_title, keywords, summary)
+        VALUES (new.id, 'u' || new.user_id, new.auto_title, new.keywords, new.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER app_content_fts_update AFTER UPDATE OF user_id, auto_title, keywords, summary ON app_content
+    WHEN old.user_id IS NOT new.user_id OR old.auto_title IS NOT new.auto_title
+        OR old.keywords IS NOT new.keywords OR old.summary IS NOT new.summary
+    BEGIN
+        DELETE FROM app_content_fts WHERE rowid = old.id;
+        INSERT INTO app_content_fts (rowid, owner, auto_title, keywords, summary)
+        VALUES (new.id, 'u' || new.user_id, new.auto_title, new.keywords, new.summary);
+    END
+    """,
+    """
+    CREATE TRIGGER app_content_fts_delete AFTER DELETE ON app_content BEGIN
+        DELETE FROM app_content_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    INSERT INTO app_content_fts (rowid, owner, auto_title, keywords, summary)
+    SELECT id, 'u' || user_id, auto_title, keywords, summary FROM app_content
+    """,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS app_content_fts_insert",
+    "DROP TRIGGER IF EXISTS app_content_fts_update",
+    "DROP TRIGGER IF EXISTS app_content_fts_delete",
+    "DROP TABLE IF EXISTS app_content_fts",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        # FTS5 is SQLite only; other backends simply have no search index
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_content_user_created_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(CREATE_SQL), run(DROP_SQL)),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 5.2 on 2026-10-18 04:15
+
+import zlib
+from importlib import import_module
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def move_text_out(apps, schema_editor):
+    """Copy each non-empty extracted_text, compressed, into ExtractedText"""
+    Content = apps.get_model('app', 'Content')
+    ExtractedText = apps.get_model('app', 'ExtractedText')
+    db = schema_editor.connection.alias
+    last_id = 0
+    while True:
+        rows = list(
+            Content.objects.using(db)
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'extracted_text')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        ExtractedText.objects.using(db).bulk_create([
+            ExtractedText(content_id=pk, data=zlib.compress(text.encode('utf-8'), 6), size=len(text))
+            for pk, text in rows if text
+        ])
+        last_id = rows[-1][0]
+
+
+def move_text_back(apps, schema_editor):
+    Content = apps.get_model('app', 'Content')
+    ExtractedText = apps.get_model('app', 'ExtractedText')
+    db = schema_editor.connection.alias
+    last_id = 0
+    while True:
+        rows = list(
+            ExtractedText.objects.using(db)
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'data')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        for pk, data in rows:
+            Content.objects.using(db).filter(pk=pk).update(extracted_text=zlib.decompress(data).decode('utf-8'))
+        last_id = rows[-1][0]
+
+
+def restore_search_triggers(apps, schema_editor):
+    """Re-create the FTS triggers of 0005, which SQLite drops when re-adding the column rebuilds app_content"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    search_index = import_module('app.migrations.0005_content_search_index')
+    for statement in search_index.CREATE_SQL:
+        if 'CREATE TRIGGER' in statement:
+            schema_editor.execute(statement.replace('CREATE TRIGGER', 'CREATE TRIGGER IF NOT EXISTS'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_content_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExtractedText',
+            fields=[
+                ('content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stored_text', serialize=False, to='app.content')),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.RunPython(move_text_out, move_text_back),
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.RemoveField(
+            model_name='content',
+            name='extracted_text',
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2 on 2026-10-18 05:28
+
+import app.storage
+import django.db.models.deletion
+import uuid
+from importlib import import_module
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def restore_search_index(apps, schema_editor):
+    """Re-create the FTS triggers of 0005, which SQLite drops when altering original_file rebuilds app_content,
+    and re-index the rows written while they were missing"""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    search_index = import_module('app.migrations.0005_content_search_index')
+    for statement in search_index.CREATE_SQL:
+        if 'CREATE TRIGGER' in statement:
+            schema_editor.execute(statement.replace('CREATE TRIGGER', 'CREATE TRIGGER IF NOT EXISTS'))
+    schema_editor.execute("DELETE FROM app_content_fts")
+    schema_editor.execute(search_index.CREATE_SQL[-1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0007_summary_versions'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Unapplying the AlterField rebuilds the table too
+        migrations.RunPython(migrations.RunPython.noop, restore_search_index),
+        migrations.AlterField(
+            model_name='content',
+            name='original_file',
+            field=models.FileField(blank=True, null=True, storage=app.storage.get_document_storage, upload_to='documents/'),
+        ),
+        migrations.RunPython(restore_search_index, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255)),
+                ('size', models.PositiveBigIntegerField()),
+                ('offset', models.PositiveBigIntegerField(default=0)),
+                ('writing_since', models.DateTimeField(blank=True, null=True)),
+                ('file', models.FileField(blank=True, storage=app.storage.get_document_storage, upload_to='documents/')),
+                ('sha256', models.CharField(blank=True, max_length=64)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
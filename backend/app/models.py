@@ -1,15 +1,43 @@
-from django.db import models
+import uuid
+import zlib
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
+from .storage import get_document_storage
+
+# zlib level for stored extracted text; 6 is the usual speed/size balance
+TEXT_COMPRESSION_LEVEL = 6
+
+
+def compress_text(text):
+    return zlib.compress(text.encode('utf-8'), TEXT_COMPRESSION_LEVEL)
+
+
+def decompress_text(data):
+    return zlib.decompress(data).decode('utf-8')
+
+
 class Content(models.Model):
     SUMMARY_LENGTH_CHOICES = [
         ('short', 'Short'),
         ('medium', 'Medium'),
         ('long', 'Long'),
     ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
-    original_file = models.FileField(upload_to='documents/', null=True, blank=True)
+    original_file = models.FileField(upload_to='documents/', storage=get_document_storage, null=True, blank=True)
     original_text = models.TextField(null=True, blank=True)
     summary_length = models.CharField(
         max_length=10,
@@ -17,12 +45,196 @@ class Content(models.Model):
         default='medium'
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Processing state
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    error = models.TextField(blank=True)
     
-    # Processed content
-    extracted_text = models.TextField(blank=True)
+    # Processed content; the extracted text lives in ExtractedText
     summary = models.TextField(blank=True)
     keywords = models.TextField(blank=True)
     auto_title = models.CharField(max_length=255, blank=True)
+
+    class Meta:
+        indexes = [
+            # Serves the per-user, newest-first list without a sort step
+            models.Index(fields=['user', '-created_at']),
+        ]
     
     def __str__(self):
-        return self.auto_title or "Content Summary"
\ No newline at end of file
+        return self.auto_title or "Content Summary"
+
+    @property
+    def extracted_text(self):
+        """Text extracted from the document, loaded and decompressed on first access"""
+        if not hasattr(self, '_extracted_text'):
+            rows = []
+            if self.pk is not None:
+                rows = ExtractedText.objects.filter(content_id=self.pk).values_list('data', flat=True)[:1]
+            self._extracted_text = decompress_text(rows[0]) if rows else ''
+        return self._extracted_text
+
+    @extracted_text.setter
+    def extracted_text(self, value):
+        self._extracted_text = value or ''
+        self._extracted_text_changed = True
+
+    async def aload_extracted_text(self):
+        """Load extracted_text from async code, where the property cannot query"""
+        if not hasattr(self, '_extracted_text'):
+            rows = []
+            if self.pk is not None:
+                queryset = ExtractedText.objects.filter(content_id=self.pk).values_list('data', flat=True)[:1]
+                rows = [data async for data in queryset]
+            self._extracted_text = decompress_text(rows[0]) if rows else ''
+        return self._extracted_text
+
+    def save(self, *args, **kwargs):
+        # extracted_text is not a column; it is written to ExtractedText after the row
+        changed = getattr(self, '_extracted_text_changed', False)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            changed = changed and 'extracted_text' in update_fields
+            update_fields.discard('extracted_text')
+            kwargs['update_fields'] = update_fields
+        if not changed:
+            adding = self._state.adding
+            super().save(*args, **kwargs)
+            if adding and not hasattr(self, '_extracted_text'):
+                # A new row has no stored text, so there is nothing to look up
+                self._extracted_text = ''
+            return
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            ExtractedText.store(self, self._extracted_text)
+        self._extracted_text_changed = False
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.__dict__.pop('_extracted_text', None)
+        self._extracted_text_changed = False
+
+
+class ExtractedText(models.Model):
+    """zlib-compressed extracted text of a Content row, kept out of the main table"""
+    content = models.OneToOneField(
+        Content, on_delete=models.CASCADE, primary_key=True, related_name='stored_text'
+    )
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()  # characters before compression
+    # The text condensed section by section by the model, for long documents;
+    # kept once a summary length change needs it (see jobs.process_resummary)
+    condensed = models.BinaryField(null=True, blank=True)
+
+    @classmethod
+    def store(cls, content, text):
+        if text:
+            cls.objects.update_or_create(
+                content_id=content.pk, defaults={'data': compress_text(text), 'size': len(text), 'condensed': None}
+            )
+        else:
+            cls.objects.filter(content_id=content.pk).delete()
+
+    @classmethod
+    def load_condensed(cls, content_id):
+        rows = cls.objects.filter(content_id=content_id, condensed__isnull=False).values_list('condensed', flat=True)[:1]
+        return decompress_text(rows[0]) if rows else None
+
+    @classmethod
+    def store_condensed(cls, content_id, text):
+        cls.objects.filter(content_id=content_id).update(condensed=compress_text(text))
+
+    def __str__(self):
+        return f"Extracted text of content {self.content_id} ({self.size} characters)"
+
+
+class SummaryVersion(models.Model):
+    """The summary of a Content row at one length, kept so switching back to it is free"""
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='summary_versions')
+    summary_length = models.CharField(max_length=10, choices=Content.SUMMARY_LENGTH_CHOICES)
+    summary = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content', 'summary_length'], name='unique_summary_version'),
+        ]
+
+    @classmethod
+    def store(cls, content):
+        """Keep the current summary of content under its summary_length"""
+        if content.summary:
+            cls.objects.update_or_create(
+                content_id=content.pk, summary_length=content.summary_length,
+                defaults={'summary': content.summary}
+            )
+
+    def __str__(self):
+        return f"{self.summary_length} summary of content {self.content_id}"
+
+
+class SummaryJob(models.Model):
+    """A queued request to extract and summarize one Content row.
+
+    With summary_length set, the row is already summarized and the job only
+    derives its summary at that length.
+    """
+    content = models.ForeignKey(Content, on_delete=models.CASCADE, related_name='jobs')
+    summary_length = models.CharField(max_length=10, choices=Content.SUMMARY_LENGTH_CHOICES, blank=True)
+    status = models.CharField(
+        max_length=10,
+        choices=Content.STATUS_CHOICES,
+        default=Content.STATUS_PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Renewed while the job runs; a running job without one for SUMMARY_JOB_TIMEOUT is stale
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Job {self.pk} ({self.status}) for content {self.content_id}"
+
+
+class ChunkedUpload(models.Model):
+    """A file sent over several requests; see app/uploads.py"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()  # declared when the upload is created
+    offset = models.PositiveBigIntegerField(default=0)  # bytes received so far
+    # Set while a request writes a chunk, so two writers never interleave
+    writing_since = models.DateTimeField(null=True, blank=True)
+    # The stored document and its hash, once all bytes have arrived
+    file = models.FileField(upload_to='documents/', storage=get_document_storage, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    @property
+    def complete(self):
+        return bool(self.file)
+
+    def __str__(self):
+        return f"Upload {self.pk} of {self.filename} ({self.offset}/{self.size} bytes)"
+
+
+class SummaryCacheEntry(models.Model):
+    """Persistent tier of the summary cache, keyed by a digest of the input"""
+    key = models.CharField(max_length=64, primary_key=True)
+    value = models.JSONField()
+    size = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    accessed_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.key
@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ContentCursorPagination(CursorPagination):
+    """Newest first; cursors keep pages stable while new content is added"""
+    ordering = '-created_at'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class SearchPagination(PageNumberPagination):
+    """Pages of search hits, which are ordered by rank rather than by a column"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
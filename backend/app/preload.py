@@ -0,0 +1,48 @@
+"""Optional warm-up of the libraries that requests otherwise load on first use.
+
+Extraction, rendering, language identification, sentence extraction and the
+Gemini client need PyPDF2, lxml, python-docx, reportlab, numpy and
+google-generativeai. They are imported inside the functions that use them, so
+a web process starts without them and requests that need none of them, such
+as authentication, never pay for them. The first request of each kind loads
+its own.
+
+With PRELOAD_MODULES (DJANGO_PRELOAD=1) everything is loaded as Django starts
+instead. Under a pre-forking server that loads the application in its master,
+e.g. `gunicorn --preload core.wsgi`, that happens once, and the workers share
+the modules and language profiles copy-on-write. The model client is still
+created by each worker on its first call (see app/llm.py), since its
+connections do not survive a fork.
+"""
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = (
+    'PyPDF2',
+    'lxml.etree',
+    'docx',
+    'reportlab.platypus',
+    'numpy',
+    'google.generativeai',
+    'app.extractive',
+)
+
+
+def preload(modules=HEAVY_MODULES):
+    """Import modules, load the language profiles and render once; return the seconds taken"""
+    from .langid import get_model
+    from .rendering import RENDERED_FIELDS, RENDERERS, render_fields
+
+    started = time.perf_counter()
+    for name in modules:
+        importlib.import_module(name)
+    get_model()
+    # The first rendering also loads fonts and document templates
+    for fmt in RENDERERS:
+        render_fields(fmt, dict.fromkeys(RENDERED_FIELDS, ''))
+    seconds = time.perf_counter() - started
+    logger.info("Preloaded %s modules in %.2fs", len(modules), seconds)
+    return seconds
@@ -0,0 +1,227 @@
+"""Downloadable renderings of a summary, cached on local disk.
+
+Each rendering is stored as `<content id>-<format>-<version>.<format>` under
+RENDER_CACHE_DIR, where the version is a hash of the fields that appear in the
+file. A changed summary therefore never serves a stale file, and entries for
+older versions are removed when the Content row is saved. The directory is
+kept under RENDER_CACHE_MAX_BYTES by deleting the least recently used files.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Fields of a Content row that end up in a rendered file
+RENDERED_FIELDS = ('auto_title', 'summary', 'keywords')
+
+
+def render_docx(content):
+    """Render a summary as .docx bytes"""
+    from docx import Document as DocxDocument
+
+    doc = DocxDocument()
+    doc.add_heading(content.auto_title or 'Summary', level=1)
+    if content.summary:
+        for para in content.summary.split('\n'):
+            doc.add_paragraph(para)
+    if content.keywords:
+        doc.add_paragraph()  # blank line
+        doc.add_paragraph(f"Keywords: {content.keywords}")
+
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def render_pdf(content):
+    """Render a summary as .pdf bytes"""
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+
+    title_style = ParagraphStyle(
+        'Title', parent=styles['Heading1'], fontSize=18,
+        alignment=TA_CENTER, spaceAfter=20
+    )
+    body_style = ParagraphStyle(
+        'Body', parent=styles['BodyText'], fontSize=12,
+        leading=14, spaceAfter=12
+    )
+    keyword_style = ParagraphStyle(
+        'Keywords', parent=styles['BodyText'], fontSize=12,
+        textColor='#555555', spaceBefore=20
+    )
+
+    story = []
+    story.append(Paragraph(content.auto_title or 'Summary', title_style))
+    story.append(Spacer(1, 12))
+
+    if content.summary:
+        for para in content.summary.split('\n'):
+            story.append(Paragraph(para, body_style))
+
+    if content.keywords:
+        story.append(Spacer(1, 12))
+        story.append(Paragraph(f"<b>Keywords:</b> {content.keywords}", keyword_style))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_txt(content):
+    """Render a summary as UTF-8 text bytes"""
+    parts = [content.auto_title or 'Summary', '']
+    if content.summary:
+        parts.append(content.summary)
+    if content.keywords:
+        parts.extend(['', f"Keywords: {content.keywords}"])
+    return '\n'.join(parts).encode('utf-8')
+
+
+# format -> (renderer, content type)
+RENDERERS = {
+    'pdf': (render_pdf, 'application/pdf'),
+    'docx': (render_docx, 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    'txt': (render_txt, 'text/plain'),
+}
+
+
+def render_fields(fmt, fields):
+    """(bytes, seconds) of rendering a dict of RENDERED_FIELDS; runs on the export pool"""
+    started = time.perf_counter()
+    data = RENDERERS[fmt][0](SimpleNamespace(**fields))
+    return data, time.perf_counter() - started
+
+
+def sanitize_filename(filename):
+    """Remove special characters and collapse spaces to underscores"""
+    filename = re.sub(r'[^\w\s-]', '', filename or '').strip()
+    return re.sub(r'[-\s]+', '_', filename)[:50]
+
+
+def content_version(content):
+    """Short hash of the fields that appear in a rendered file"""
+    digest = hashlib.sha256()
+    for field in RENDERED_FIELDS:
+        digest.update((getattr(content, field) or '').encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:16]
+
+
+class RenderCache:
+    """Directory of rendered files with a total size cap"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            getattr(settings, 'RENDER_CACHE_DIR', Path(settings.BASE_DIR) / 'render_cache'),
+            getattr(settings, 'RENDER_CACHE_MAX_BYTES', 256 * 1024 * 1024),
+        )
+
+    def path_for(self, content_id, fmt, version):
+        return self.directory / f"{content_id}-{fmt}-{version}.{fmt}"
+
+    def lookup(self, content, fmt):
+        """Return an open binary file with the cached rendering, or None"""
+        path = self.path_for(content.pk, fmt, content_version(content))
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        # Bump the modification time so eviction sees this entry as recent
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return file
+
+    def open(self, content, fmt):
+        """Return an open binary file with the rendering, creating it on a miss"""
+        file = self.lookup(content, fmt)
+        if file is not None:
+            metrics.render_requests.inc(1, fmt, 'hit')
+            return file
+
+        metrics.render_requests.inc(1, fmt, 'miss')
+        path = self.path_for(content.pk, fmt, content_version(content))
+        renderer = RENDERERS[fmt][0]
+        with metrics.stage_timer(f'render_{fmt}'):
+            data = renderer(content)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary name first so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.render-')
+        with os.fdopen(fd, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, path)
+        file = open(path, 'rb')
+        self.evict()
+        return file
+
+    def invalidate(self, content_id, keep_version=None):
+        """Delete the renderings of a content row, except those of keep_version"""
+        if not self.directory.is_dir():
+            return
+        for path in self.directory.glob(f"{content_id}-*"):
+            if keep_version and path.stem.endswith(f"-{keep_version}"):
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        """Delete least recently used files until the directory fits max_bytes"""
+        if not self.max_bytes:
+            return
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+            if total <= self.max_bytes:
+                return
+            entries.sort()
+            for _mtime, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            logger.info("Render cache trimmed to %s bytes", total)
+
+    def clear(self):
+        if self.directory.is_dir():
+            for path in self.directory.iterdir():
+                if path.is_file():
+                    path.unlink()
+
+
+render_cache = RenderCache.from_settings()
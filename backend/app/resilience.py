@@ -0,0 +1,434 @@
+"""Flow control shared by every model call in the process.
+
+Calls pass through three layers, configured by settings.LLM_RESILIENCE:
+
+* AdaptiveLimiter caps requests in flight and, optionally, requests per
+  second (a token bucket). The in-flight cap follows AIMD: it grows by about
+  one per round of successful calls and is halved when the provider answers
+  429 or latency goes over LATENCY_TARGET.
+* CircuitBreaker opens after BREAKER_THRESHOLD transient failures in a row
+  and fails fast for BREAKER_RESET seconds, then lets one trial call through.
+* CallGuard retries transient failures with jittered exponential backoff.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+from .llm import CircuitOpenError, LLMError, is_rate_limit, is_retryable
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_CONCURRENCY': None,  # defaults to LLM_MAX_CONCURRENCY
+    'MIN_CONCURRENCY': 1,
+    'RATE': None,  # requests per second; None disables the token bucket
+    'BURST': 10,
+    'LATENCY_TARGET': 30.0,  # seconds
+    'ACQUIRE_TIMEOUT': 120.0,
+    'MAX_ATTEMPTS': 4,
+    'BACKOFF_BASE': 0.5,
+    'BACKOFF_MAX': 20.0,
+    'BREAKER_THRESHOLD': 5,
+    'BREAKER_RESET': 30.0,
+}
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Take a token and return 0, or return the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that adapts to throttling, plus an optional rate limit"""
+
+    def __init__(self, max_concurrency, min_concurrency=1, rate=None, burst=10,
+                 latency_target=None, decrease_interval=1.0):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.limit = float(max_concurrency)
+        self.latency_target = latency_target
+        self.decrease_interval = decrease_interval
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.in_flight = 0
+        self.stats = {'acquired': 0, 'throttled': 0, 'slow': 0, 'decreases': 0, 'timeouts': 0}
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        # (loop, future) of coroutines in aacquire, woken like the waiting threads
+        self._async_waiters = deque()
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                wait = None
+                if self.in_flight < int(self.limit):
+                    wait = self.bucket.take() if self.bucket else 0
+                    if not wait:
+                        self.in_flight += 1
+                        self.stats['acquired'] += 1
+                        return
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise LLMError("Timed out waiting for a free model request slot")
+                    wait = min(wait, remaining) if wait else remaining
+                self._condition.wait(wait)
+
+    async def aacquire(self, timeout=None):
+        """acquire for coroutines; waiting holds no thread"""
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                wait = None
+                if self.in_flight < int(self.limit):
+                    wait = self.bucket.take() if self.bucket else 0
+                    if not wait:
+                        self.in_flight += 1
+                        self.stats['acquired'] += 1
+                        return
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.stats['timeouts'] += 1
+                        raise LLMError("Timed out waiting for a free model request slot")
+                    wait = min(wait, remaining) if wait else remaining
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            try:
+                await asyncio.wait_for(waiter, wait)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                with self._condition:
+                    self._discard_waiter(waiter)
+                    # Pass on a wake-up that arrived just before the cancellation
+                    if waiter.done() and not waiter.cancelled():
+                        self._wake_async(1)
+                raise
+            with self._condition:
+                self._discard_waiter(waiter)
+
+    def _discard_waiter(self, waiter):
+        for entry in self._async_waiters:
+            if entry[1] is waiter:
+                self._async_waiters.remove(entry)
+                return
+
+    def _wake_async(self, count=None):
+        """Wake up to `count` coroutines in aacquire (all when None); call with the lock held"""
+        while self._async_waiters and (count is None or count > 0):
+            loop, waiter = self._async_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                # The waiter's event loop is closed
+                continue
+            if count is not None:
+                count -= 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+            self._wake_async(1)
+
+    def on_success(self, latency):
+        with self._condition:
+            if self.latency_target and latency > self.latency_target:
+                self.stats['slow'] += 1
+                self._decrease()
+            elif self.limit < self.max_concurrency:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+                self._condition.notify_all()
+                self._wake_async()
+
+    def on_rate_limited(self):
+        with self._condition:
+            self.stats['throttled'] += 1
+            self._decrease()
+
+    def _decrease(self):
+        # Calls in flight together tend to fail together; count them as one signal
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_interval:
+            return
+        self._last_decrease = now
+        self.limit = max(self.min_concurrency, self.limit / 2)
+        self.stats['decreases'] += 1
+        logger.warning("Model concurrency limit lowered to %d", int(self.limit))
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class CircuitBreaker:
+    """Stops sending requests to a provider that keeps failing"""
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.stats = {'opened': 0, 'rejected': 0}
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now; return True for the half-open trial"""
+        if not self.threshold:
+            return False
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.stats['rejected'] += 1
+        raise CircuitOpenError("Model provider is failing; not sending requests for now")
+
+    def on_success(self):
+        with self._lock:
+            self.failures = 0
+            self._trial_running = False
+            if self.state != self.CLOSED:
+                logger.info("Model circuit breaker closed")
+            self.state = self.CLOSED
+
+    def abandon_trial(self):
+        """The trial call ended without an answer; let the next call be the trial"""
+        with self._lock:
+            self._trial_running = False
+
+    def on_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.threshold):
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self.stats['opened'] += 1
+                logger.warning("Model circuit breaker opened after %d failures", self.failures)
+
+
+class CallGuard:
+    """Runs model calls through the limiter and breaker, retrying transient errors"""
+
+    def __init__(self, limiter, breaker, max_attempts=4, backoff_base=0.5, backoff_max=20.0,
+                 acquire_timeout=None):
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.acquire_timeout = acquire_timeout
+        self.stats = {'calls': 0, 'retries': 0, 'failures': 0}
+        self._random = random.Random()
+
+    @classmethod
+    def from_settings(cls):
+        config = {**DEFAULTS, **getattr(settings, 'LLM_RESILIENCE', {})}
+        max_concurrency = config['MAX_CONCURRENCY'] or getattr(settings, 'LLM_MAX_CONCURRENCY', 8)
+        limiter = AdaptiveLimiter(
+            max_concurrency,
+            min_concurrency=config['MIN_CONCURRENCY'],
+            rate=config['RATE'],
+            burst=config['BURST'],
+            latency_target=config['LATENCY_TARGET'],
+        )
+        breaker = CircuitBreaker(config['BREAKER_THRESHOLD'], config['BREAKER_RESET'])
+        return cls(
+            limiter,
+            breaker,
+            max_attempts=config['MAX_ATTEMPTS'],
+            backoff_base=config['BACKOFF_BASE'],
+            backoff_max=config['BACKOFF_MAX'],
+            acquire_timeout=config['ACQUIRE_TIMEOUT'],
+        )
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number `attempt` (1-based)"""
+        return self._random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _record(self, error, latency):
+        """Feed the outcome of one attempt to the limiter and breaker"""
+        if error is None:
+            self.limiter.on_success(latency)
+            self.breaker.on_success()
+            return
+        if is_rate_limit(error):
+            self.limiter.on_rate_limited()
+        if is_retryable(error):
+            self.breaker.on_failure()
+        else:
+            # The provider answered; a bad request says nothing about its health
+            self.breaker.on_success()
+
+    def _give_up(self, error, attempt):
+        if not is_retryable(error) or attempt >= self.max_attempts:
+            self.stats['failures'] += 1
+            return True
+        self.stats['retries'] += 1
+        logger.info("Model call failed (%s); retry %d of %d", error, attempt, self.max_attempts - 1)
+        return False
+
+    def _enter(self):
+        # Take the slot first, so a half-open trial is never stuck in the queue
+        self.limiter.acquire(self.acquire_timeout)
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self.limiter.release()
+            raise
+        return time.monotonic()
+
+    async def _aenter(self):
+        """_enter for coroutines; also returns whether this call is the half-open trial"""
+        await self.limiter.aacquire(self.acquire_timeout)
+        try:
+            trial = self.breaker.before_call()
+        except CircuitOpenError:
+            self.limiter.release()
+            raise
+        return time.monotonic(), trial
+
+    def call(self, func, *args):
+        """Call func(*args), retrying transient failures"""
+        self.stats['calls'] += 1
+        attempt = 0
+        while True:
+            attempt += 1
+            started = self._enter()
+            try:
+                result = func(*args)
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                self.limiter.release()
+
+            self._record(error, time.monotonic() - started)
+            if error is None:
+                return result
+            if self._give_up(error, attempt):
+                raise error
+            time.sleep(self.backoff(attempt))
+
+    def stream(self, func, *args):
+        """Yield from func(*args); retries only happen before the first piece"""
+        self.stats['calls'] += 1
+        attempt = 0
+        while True:
+            attempt += 1
+            self._enter()
+            yielded = False
+            try:
+                for piece in func(*args):
+                    yielded = True
+                    yield piece
+            except GeneratorExit:
+                # The consumer stopped reading; the provider was answering fine
+                self.breaker.on_success()
+                raise
+            except Exception as e:
+                error = e
+            else:
+                error = None
+            finally:
+                self.limiter.release()
+
+            # Stream length depends on the reply, so it is not a latency signal
+            self._record(error, 0)
+            if error is None:
+                return
+            if yielded or self._give_up(error, attempt):
+                raise error
+            time.sleep(self.backoff(attempt))
+
+    async def acall(self, func, *args):
+        """Async variant of call for coroutine functions"""
+        self.stats['calls'] += 1
+        attempt = 0
+        while True:
+            attempt += 1
+            started, trial = await self._aenter()
+            try:
+                result = await func(*args)
+            except Exception as e:
+                error = e
+            except asyncio.CancelledError:
+                # The task was cancelled mid-call, which says nothing about the provider
+                if trial:
+                    self.breaker.abandon_trial()
+                raise
+            else:
+                error = None
+            finally:
+                self.limiter.release()
+
+            self._record(error, time.monotonic() - started)
+            if error is None:
+                return result
+            if self._give_up(error, attempt):
+                raise error
+            await asyncio.sleep(self.backoff(attempt))
+
+    def snapshot(self):
+        """Counters and current state, for monitoring"""
+        return {
+            **self.stats,
+            'concurrency_limit': int(self.limiter.limit),
+            'in_flight': self.limiter.in_flight,
+            'limiter': dict(self.limiter.stats),
+            'circuit': self.breaker.state,
+            'breaker': dict(self.breaker.stats),
+        }
+
+
+_guard = None
+_guard_lock = threading.Lock()
+
+
+def get_guard():
+    """Return the process-wide CallGuard configured in settings.LLM_RESILIENCE"""
+    global _guard
+    if _guard is None:
+        with _guard_lock:
+            if _guard is None:
+                _guard = CallGuard.from_settings()
+    return _guard
+
+
+def reset_guard():
+    """Forget the current guard so the next call re-reads the settings"""
+    global _guard
+    with _guard_lock:
+        _guard = None
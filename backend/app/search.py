@@ -0,0 +1,182 @@
+"""Full-text search over the titles, keywords and summaries of Content rows.
+
+The index is the SQLite FTS5 table app_content_fts, created by migration 0005
+together with triggers that copy every insert, update and delete of
+app_content into it, so it also follows QuerySet.update() and raw SQL.
+
+Each indexed row carries an `owner` token (u<user id>). Queries always AND
+the owner into the MATCH expression, so FTS5 intersects the owner's posting
+list with the search terms instead of ranking every user's documents.
+
+bm25 reads the whole posting list of every query word to weigh it, which for
+a word in most of a million documents takes around 100 ms. Words estimated to
+occur in more than SEARCH_MAX_TERM_DOCUMENTS documents are therefore left out
+of the query, as stop words; a query made only of such words is answered
+newest first without a score, which needs no full scan.
+"""
+import html
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+
+FTS_TABLE = 'app_content_fts'
+INDEXED_FIELDS = ('auto_title', 'keywords', 'summary')
+# bm25 weights of the owner, auto_title, keywords and summary columns
+COLUMN_WEIGHTS = (0.0, 10.0, 5.0, 1.0)
+MAX_TERMS = 16
+# Newest rows counted to estimate how many documents contain a word
+SAMPLE_ROWS = 10000
+
+# Private-use characters mark matches in snippets until the text is escaped
+_OPEN, _CLOSE = '\ue000', '\ue001'
+_WORD = re.compile(r'\w+')
+
+
+def owner_token(user_id):
+    return f'u{user_id}'
+
+
+def query_terms(text):
+    """Distinct words of a search query, in order"""
+    return list(dict.fromkeys(word.lower() for word in _WORD.findall(text or '')))[:MAX_TERMS]
+
+
+def match_expression(user_id, terms):
+    """FTS5 MATCH expression requiring all terms in one of the user's documents.
+
+    Terms are quoted, so FTS5 operators in the input are searched as plain text.
+    """
+    fields = ' '.join(INDEXED_FIELDS)
+    phrases = ' AND '.join(f'"{term}"' for term in terms)
+    return f'owner:{owner_token(user_id)} AND {{{fields}}}: ({phrases})'
+
+
+def estimated_documents(cursor, term, newest_id):
+    """Documents containing term, extrapolated from the newest SAMPLE_ROWS rows"""
+    fields = ' '.join(INDEXED_FIELDS)
+    cursor.execute(
+        f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid > %s",
+        [f'{{{fields}}}: "{term}"', max(newest_id - SAMPLE_ROWS, 0)],
+    )
+    return cursor.fetchone()[0] * max(newest_id / SAMPLE_ROWS, 1)
+
+
+def highlight(snippet):
+    """HTML-escape a snippet and turn its match markers into <mark> tags"""
+    return html.escape(snippet or '').replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+class SearchResults:
+    """Hits of one query, sliced lazily so a paginator can page through them.
+
+    Ranked by bm25, or newest first with a score of None when `ranked` is off.
+    With summary_length, only rows summarized at that length are hits.
+    """
+
+    def __init__(self, match, ranked=True, summary_length=None):
+        self.match = match
+        self.ranked = ranked
+        self.where, self.params = f"{FTS_TABLE} MATCH %s", [match]
+        if summary_length:
+            self.where += " AND rowid IN (SELECT id FROM app_content WHERE summary_length = %s)"
+            self.params.append(summary_length)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT count(*) FROM {FTS_TABLE} WHERE {self.where}", self.params
+                )
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        offset = index.start or 0
+        limit = -1 if index.stop is None else max(index.stop - offset, 0)
+        if self.ranked:
+            weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+            score, order = f"bm25({FTS_TABLE}, {weights})", 'score'
+        else:
+            score, order = 'NULL', 'rowid DESC'
+        snippets = ', '.join(
+            f"snippet({FTS_TABLE}, {column}, %s, %s, '…', {tokens})"
+            for column, tokens in ((1, 16), (2, 16), (3, 32))
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, {score} AS score, {snippets} "
+                f"FROM {FTS_TABLE} WHERE {self.where} "
+                f"ORDER BY {order} LIMIT %s OFFSET %s",
+                [_OPEN, _CLOSE] * 3 + self.params + [limit, offset],
+            )
+            rows = cursor.fetchall()
+        return [
+            {
+                'id': row[0],
+                # bm25 is lower for better matches; flip it so higher is better
+                'score': None if row[1] is None else round(-row[1], 4),
+                'highlights': dict(zip(INDEXED_FIELDS, (highlight(text) for text in row[2:]))),
+            }
+            for row in rows
+        ]
+
+
+def search(user_id, text, summary_length=None):
+    """SearchResults for a query, or None when it contains no words"""
+    terms = query_terms(text)
+    if not terms:
+        return None
+    limit = getattr(settings, 'SEARCH_MAX_TERM_DOCUMENTS', 50000)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT max(id) FROM app_content")
+        newest_id = cursor.fetchone()[0] or 0
+        selective = [term for term in terms if estimated_documents(cursor, term, newest_id) <= limit]
+    if selective:
+        return SearchResults(match_expression(user_id, selective), summary_length=summary_length)
+    return SearchResults(match_expression(user_id, terms), ranked=False, summary_length=summary_length)
+
+
+def reindex(batch_size=5000, progress=None):
+    """Rebuild the index from app_content in id ranges, one transaction each.
+
+    Each range is deleted and re-inserted together, so searches keep working
+    while the rebuild runs.
+    """
+    last_id = 0
+    indexed = 0
+    with connection.cursor() as cursor:
+        while True:
+            with transaction.atomic():
+                cursor.execute(
+                    "SELECT max(id), count(*) FROM "
+                    "(SELECT id FROM app_content WHERE id > %s ORDER BY id LIMIT %s)",
+                    [last_id, batch_size],
+                )
+                batch_last, count = cursor.fetchone()
+                if not count:
+                    # Entries of rows deleted since they were indexed
+                    cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid > %s", [last_id])
+                    break
+                cursor.execute(
+                    f"DELETE FROM {FTS_TABLE} WHERE rowid > %s AND rowid <= %s", [last_id, batch_last]
+                )
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, owner, auto_title, keywords, summary) "
+                    "SELECT id, 'u' || user_id, auto_title, keywords, summary FROM app_content "
+                    "WHERE id > %s AND id <= %s",
+                    [last_id, batch_last],
+                )
+            last_id = batch_last
+            indexed += count
+            if progress:
+                progress(indexed)
+        # Merge the b-trees written by the batches into one
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return indexed
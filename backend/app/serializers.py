@@ -3,14 +3,23 @@ from .models import Content
 from django.contrib.auth.models import User
 
 class ContentSerializer(serializers.ModelSerializer):
+    # Stored compressed outside the Content table; read on demand
+    extracted_text = serializers.CharField(read_only=True)
+    # A finished chunked upload, attached as original_file (see uploads.attach_upload)
+    upload = serializers.UUIDField(write_only=True, required=False)
+
     class Meta:
         model = Content
         fields = [
             'id',
             'original_file',
             'original_text',
+            'upload',
             'summary_length',
             'created_at',
+            'updated_at',
+            'status',
+            'error',
             'extracted_text',
             'summary',
             'keywords',
@@ -18,18 +27,64 @@ class ContentSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = [
             'created_at',
-            'extracted_text',
+            'updated_at',
+            'status',
+            'error',
             'summary',
             'keywords',
             'auto_title'
         ]
     
     def validate(self, data):
-        if not data.get('original_file') and not data.get('original_text'):
-            raise serializers.ValidationError("Either file or text must be provided")
+        if not data.get('original_file') and not data.get('original_text') and not data.get('upload'):
+            raise serializers.ValidationError("Either file, upload or text must be provided")
         return data
 
 
+class ContentListSerializer(serializers.ModelSerializer):
+    """Compact list representation; the large text columns are detail-only.
+
+    A comma-separated `fields` query parameter narrows the output further,
+    e.g. ?fields=id,auto_title,created_at.
+    """
+
+    class Meta:
+        model = Content
+        fields = (
+            'id',
+            'auto_title',
+            'keywords',
+            'summary_length',
+            'status',
+            'created_at',
+            'updated_at',
+        )
+        read_only_fields = fields
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        """Valid field names from the `fields` query parameter, or None for all"""
+        if request is None or not request.query_params.get('fields'):
+            return None
+        requested = {name.strip() for name in request.query_params['fields'].split(',')}
+        # The cursor paginator orders by created_at, so it is always loaded
+        return (requested & set(cls.Meta.fields)) | {'id'}
+
+
+class ContentStatusSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Content
+        fields = ('id', 'status', 'error', 'updated_at')
+        read_only_fields = fields
+
+
 class GetUser(serializers.ModelSerializer):
     class Meta:
         model = User
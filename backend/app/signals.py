@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import user_cache
+from .models import Content
+from .rendering import RENDERED_FIELDS, content_version, render_cache
+
+
+@receiver(post_save, sender=Content)
+def drop_stale_renderings(sender, instance, created, update_fields=None, **kwargs):
+    """Remove cached downloads made from an older version of the summary"""
+    if created:
+        return
+    if update_fields is not None and not set(update_fields) & set(RENDERED_FIELDS):
+        return
+    render_cache.invalidate(instance.pk, keep_version=content_version(instance))
+
+
+@receiver(post_delete, sender=Content)
+def drop_renderings(sender, instance, **kwargs):
+    """Remove cached downloads of a deleted content row"""
+    render_cache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def drop_cached_user(sender, instance, **kwargs):
+    """Make the next request of a changed or deleted user load it again"""
+    user_cache.invalidate(getattr(instance, api_settings.USER_ID_FIELD))
@@ -0,0 +1,66 @@
+"""Content-addressed storage for uploaded documents.
+
+Documents are stored as `documents/<aa>/<sha256><ext>`, named after the
+SHA-256 of their bytes, so identical files are kept once however often they
+are uploaded. Files are never deleted when a Content row goes away, since
+other rows may share them.
+"""
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK_BYTES = 1024 * 1024
+MAX_EXTENSION_CHARS = 10  # keeps names within the FileField's 100 characters
+
+
+def file_sha256(content):
+    """Hex SHA-256 of a Django File, read in chunks"""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_BYTES):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class HashedFile(File):
+    """A complete file on local disk whose SHA-256 is already known.
+
+    Like an uploaded temporary file, it exposes temporary_file_path, so the
+    storage moves it into place instead of copying it.
+    """
+
+    def __init__(self, path, name, sha256):
+        super().__init__(open(path, 'rb'), name)
+        self.sha256 = sha256
+        self._path = path
+
+    def temporary_file_path(self):
+        return self._path
+
+
+class DocumentStorage(FileSystemStorage):
+    """FileSystemStorage that names files by their SHA-256 and stores each one once"""
+
+    def save(self, name, content, max_length=None):
+        # Upload handlers and HashedFile hash while the data arrives; anything else is read here
+        digest = getattr(content, 'sha256', None) or file_sha256(content)
+        extension = os.path.splitext(name)[1].lower()[:MAX_EXTENSION_CHARS]
+        name = posixpath.join(posixpath.dirname(name), digest[:2], digest + extension)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+_document_storage = None
+
+
+def get_document_storage():
+    """Storage of uploaded documents; passed as a callable so migrations refer to it by name"""
+    global _document_storage
+    if _document_storage is None:
+        _document_storage = DocumentStorage()
+    return _document_storage
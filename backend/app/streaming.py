@@ -0,0 +1,136 @@
+"""Server-Sent Events stream of a summary while the model generates it.
+
+The summary prompt is sent with streaming generation and each piece of text is
+forwarded to the client as a `token` event. The analysis prompt runs next to it
+on the model pool, and the finished result is saved on the Content row before
+the closing `done` event.
+"""
+import asyncio
+import functools
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+
+from . import metrics
+from .jobs import apply_results, enqueue
+from .models import Content
+from .utils import (
+    empty_document_results, extract_text, llm_executor, parse_analysis,
+    prepare_prompts, stream_generate, summary_cache, summary_cache_key,
+    timed_generate,
+)
+
+logger = logging.getLogger(__name__)
+
+_EXHAUSTED = object()
+
+# Keep references to requeue tasks so they are not garbage collected
+_background_tasks = set()
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def iterate_in_thread(iterator, uses_db=False):
+    """Consume a blocking iterator from async code without stalling the event loop.
+
+    Iterators that query the database are stepped with sync_to_async, on the
+    request's database thread, whose connection Django closes with the request.
+    """
+    iterator = iter(iterator)
+    step = sync_to_async(next) if uses_db else functools.partial(asyncio.to_thread, next)
+    while True:
+        item = await step(iterator, _EXHAUSTED)
+        if item is _EXHAUSTED:
+            return
+        yield item
+
+
+def requeue(content_id):
+    """Hand a stream abandoned by its client to the background workers"""
+    content = Content.objects.get(pk=content_id)
+    content.status = Content.STATUS_PENDING
+    content.save(update_fields=['status', 'updated_at'])
+    enqueue(content)
+
+
+async def stream_summary(instance):
+    """Async generator of SSE messages that processes a saved Content row"""
+    started = time.perf_counter()
+    finished = False
+    yield sse_event('created', {'id': instance.pk, 'status': instance.status})
+
+    try:
+        if instance.original_file:
+            text = await asyncio.to_thread(extract_text, instance.original_file, instance.original_file.name)
+        else:
+            text = instance.original_text or ''
+        instance.extracted_text = text
+
+        key = summary_cache_key(text, instance.summary_length)
+        results = await sync_to_async(summary_cache.get)(key)
+        if results is None and not text.strip():
+            results = empty_document_results()
+
+        if results is None:
+            prompts = await asyncio.to_thread(prepare_prompts, text, instance.summary_length)
+            analysis = asyncio.wrap_future(llm_executor.submit(timed_generate, prompts['analysis'], 'analysis'))
+
+            ttft_ms = None
+            pieces = []
+            summary_started = time.perf_counter()
+            async for piece in iterate_in_thread(stream_generate(prompts['summary'])):
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+                    logger.info("First summary token for content %s after %.0f ms", instance.pk, ttft_ms)
+                pieces.append(piece)
+                yield sse_event('token', {'text': piece})
+            metrics.record_stage('llm_summary', time.perf_counter() - summary_started)
+
+            analysis_text, analysis_ms = await analysis
+            results = parse_analysis(analysis_text, prompts['language'], prompts['language_known'])
+            results['summary'] = ''.join(pieces).strip()
+            results['original_word_count'] = prompts['word_count']
+            results['summary_word_count'] = len(results['summary'].split())
+            results['timings'] = {
+                'analysis': analysis_ms,
+                'time_to_first_token': ttft_ms,
+                'summary': round((time.perf_counter() - started) * 1000, 1),
+            }
+            await sync_to_async(summary_cache.set)(key, results)
+        else:
+            yield sse_event('token', {'text': results['summary']})
+
+        apply_results(instance, results)
+        instance.status = Content.STATUS_DONE
+        with metrics.stage_timer('db_save'):
+            await sync_to_async(instance.save)()
+        finished = True
+        yield sse_event('done', {
+            'id': instance.pk,
+            'status': instance.status,
+            'summary': instance.summary,
+            'keywords': instance.keywords,
+            'auto_title': instance.auto_title,
+            'timings': results.get('timings', {}),
+        })
+    except Exception as e:
+        logger.exception("Streaming summary for content %s failed", instance.pk)
+        instance.status = Content.STATUS_FAILED
+        instance.error = str(e)
+        await sync_to_async(instance.save)()
+        finished = True
+        yield sse_event('error', {'id': instance.pk, 'status': instance.status, 'error': instance.error})
+    finally:
+        if not finished:
+            # The client disconnected mid-stream; finish the summary in the background.
+            # The requeue is awaited, and shielded so that cancelling this stream does not
+            # drop it; the reference keeps it running if the wait is cancelled anyway.
+            task = asyncio.get_running_loop().create_task(sync_to_async(requeue)(instance.pk))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+            await asyncio.shield(task)
@@ -0,0 +1,8 @@
+"""URL conf with the async content views, as served under ASGI"""
+from django.urls import include, path
+
+from app.urls import api_patterns
+
+urlpatterns = [
+    path('api/', include(api_patterns(async_views=True))),
+]
@@ -0,0 +1,63 @@
+"""Shared setup of the API tests.
+
+Model calls go to FakeBackend without delays, jobs are run explicitly with
+drain_queue instead of by in-process worker threads, and uploaded, rendered
+and partial files land in a scratch directory.
+"""
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from app.jobs import drain_queue
+from app.llm import reset_backend
+from app.rendering import render_cache
+from app.utils import summary_cache
+
+
+class SummarizerTestCase(APITestCase):
+    backend_options = {}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scratch = Path(tempfile.mkdtemp(prefix='summarizer-tests-'))
+        cls.addClassCleanup(shutil.rmtree, cls.scratch, ignore_errors=True)
+        cls.settings_override = override_settings(
+            LLM_BACKEND={'BACKEND': 'app.llm.FakeBackend', 'OPTIONS': cls.backend_options},
+            SUMMARY_WORKERS_IN_PROCESS=False,
+            MEDIA_ROOT=str(cls.scratch / 'media'),
+            UPLOAD_PARTS_DIR=cls.scratch / 'upload_parts',
+        )
+        cls.settings_override.enable()
+        cls.addClassCleanup(cls.settings_override.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        reset_backend()
+        self.addCleanup(reset_backend)
+        summary_cache.clear()
+        # The render cache is created at import; keep its files in the scratch directory
+        directory = render_cache.directory
+        render_cache.directory = self.scratch / 'render_cache'
+        self.addCleanup(setattr, render_cache, 'directory', directory)
+        self.addCleanup(render_cache.clear)
+        self.user = self.create_user('alice')
+        self.authenticate(self.user)
+
+    def create_user(self, username):
+        return User.objects.create_user(username, password='secret')
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def create_text(self, text, summary_length='medium', process=True):
+        """POST a text to content/ and, unless process is False, run its job; return the response"""
+        response = self.client.post('/api/content/', {'original_text': text, 'summary_length': summary_length},
+                                    format='json')
+        if process:
+            drain_queue()
+        return response
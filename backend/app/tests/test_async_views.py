@@ -0,0 +1,137 @@
+import io
+import zipfile
+
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import resolve
+
+from app.jobs import drain_queue
+from app.models import Content, SummaryJob
+from app.views import AsyncContentDetailView, AsyncContentExportView, AsyncContentListView, AsyncDownloadContentView
+
+from .base import SummarizerTestCase
+
+TEXT = 'Migrating birds cross the desert at night and rest in oases by day. ' * 10
+
+
+@override_settings(ASYNC_VIEWS=True, ROOT_URLCONF='app.tests.async_urls')
+class AsyncViewTests(SummarizerTestCase):
+
+    def create(self, text=TEXT, **data):
+        response = self.client.post('/api/content/', {'original_text': text, 'summary_length': 'short', **data},
+                                    format='json')
+        drain_queue()
+        return response
+
+    def sync_json(self, url):
+        """The same request answered by the sync views"""
+        with override_settings(ROOT_URLCONF='core.urls'):
+            return self.client.get(url).json()
+
+    def test_content_urls_route_to_the_async_views(self):
+        for url, view in (('/api/content/', AsyncContentListView), ('/api/content/1/', AsyncContentDetailView),
+                          ('/api/content/1/download/pdf', AsyncDownloadContentView),
+                          ('/api/content/export/pdf', AsyncContentExportView)):
+            self.assertIs(resolve(url).func.view_class, view)
+
+    def test_create_queues_the_summary(self):
+        response = self.client.post('/api/content/', {'original_text': TEXT, 'summary_length': 'short'},
+                                    format='json')
+        self.assertEqual(response.status_code, 202)
+        content_id = response.json()['id']
+        self.assertEqual(response['Location'], f'/api/content/{content_id}/status/')
+        self.assertEqual(SummaryJob.objects.get(content_id=content_id).status, Content.STATUS_PENDING)
+        drain_queue()
+        self.assertEqual(Content.objects.get(pk=content_id).status, Content.STATUS_DONE)
+
+        # The same text again is answered from the summary cache
+        response = self.create()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['status'], Content.STATUS_DONE)
+
+    def test_create_accepts_files_and_rejects_invalid_data(self):
+        response = self.client.post('/api/content/', {
+            'original_file': SimpleUploadedFile('birds.txt', TEXT.encode('utf-8')), 'summary_length': 'long',
+        }, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['summary_length'], 'long')
+
+        response = self.client.post('/api/content/', {'summary_length': 'short'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/content/', 'not json', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_list_is_filtered_paginated_and_private(self):
+        first = self.create().json()['id']
+        second = self.create('Coral reefs grow slowly in warm shallow seas. ' * 10, summary_length='long').json()['id']
+        self.authenticate(self.create_user('bob'))
+        self.create('Deserts get less than ten inches of rain a year. ' * 10)
+        self.authenticate(self.user)
+
+        response = self.client.get('/api/content/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['id'] for item in response.json()['results']], [second, first])
+        self.assertEqual(response.json(), self.sync_json('/api/content/'))
+
+        response = self.client.get('/api/content/', {'summary_length': 'long', 'fields': 'id,auto_title'})
+        self.assertEqual([set(item) for item in response.json()['results']], [{'id', 'auto_title'}])
+        self.assertEqual(response.json()['results'][0]['id'], second)
+
+        page = self.client.get('/api/content/', {'page_size': 1}).json()
+        self.assertEqual([item['id'] for item in page['results']], [second])
+        page = self.client.get(page['next']).json()
+        self.assertEqual([item['id'] for item in page['results']], [first])
+
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/content/').status_code, 401)
+
+    def test_detail_answers_conditional_requests(self):
+        content_id = self.create().json()['id']
+        url = f'/api/content/{content_id}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), self.sync_json(url))
+        self.assertTrue(response.json()['extracted_text'])
+        self.assertIn('Last-Modified', response)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        content = Content.objects.get(pk=content_id)
+        content.summary = 'Birds rest by day.'
+        content.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['summary'], 'Birds rest by day.')
+
+        self.authenticate(self.create_user('bob'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_download_renders_and_revalidates(self):
+        content = Content.objects.get(pk=self.create().json()['id'])
+        url = f'/api/content/{content.pk}/download/txt'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertTrue(b''.join(response.streaming_content).startswith(content.auto_title.encode('utf-8')))
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        self.authenticate(self.create_user('bob'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_export_streams_the_users_archive(self):
+        content_id = self.create().json()['id']
+        self.authenticate(self.create_user('bob'))
+        self.create('Deserts get less than ten inches of rain a year. ' * 10)
+        self.authenticate(self.user)
+
+        response = self.client.get('/api/content/export/txt')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+
+        async def read():
+            return b''.join([piece async for piece in response.streaming_content])
+
+        archive = zipfile.ZipFile(io.BytesIO(async_to_sync(read)()))
+        self.assertEqual(len(archive.namelist()), 1)
+        self.assertTrue(archive.namelist()[0].startswith(f'{content_id}-'))
+        self.assertEqual(self.client.get('/api/content/export/txt', {'ids': 'x'}).status_code, 400)
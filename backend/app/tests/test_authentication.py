@@ -0,0 +1,67 @@
+from app.authentication import user_cache
+
+from .base import SummarizerTestCase
+
+
+class CachedAuthenticationTests(SummarizerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+
+    def test_users_are_served_from_the_cache(self):
+        self.assertEqual(self.client.get('/api/user/').status_code, 200)
+        hits = user_cache.stats()['hits']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/user/').status_code, 200)
+        self.assertEqual(user_cache.stats()['hits'], hits + 1)
+
+    def test_deactivated_user_is_rejected_on_the_next_request(self):
+        self.assertEqual(self.client.get('/api/user/').status_code, 200)
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get('/api/user/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'user_inactive')
+
+    def test_password_change_rejects_older_tokens(self):
+        old_token = self.client._credentials['HTTP_AUTHORIZATION']
+        self.assertEqual(self.client.get('/api/user/').status_code, 200)
+        self.user.set_password('changed')
+        self.user.save()
+        response = self.client.get('/api/user/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'password_changed')
+
+        # Once reloaded, the cached user rejects the old token too
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get('/api/user/').status_code, 200)
+        self.client.credentials(HTTP_AUTHORIZATION=old_token)
+        self.assertEqual(self.client.get('/api/user/').status_code, 401)
+
+    def test_profile_is_not_shared_between_users(self):
+        bob = self.create_user('bob')
+        for user in (self.user, bob, self.user, bob):
+            self.authenticate(user)
+            response = self.client.get('/api/user/')
+            self.assertEqual((response.data['id'], response.data['username']), (user.pk, user.username))
+
+    def test_profile_follows_changes_of_the_user(self):
+        self.assertEqual(self.client.get('/api/user/').data['email'], '')
+        self.user.email = 'alice@example.com'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/user/').data['email'], 'alice@example.com')
+
+    def test_profile_built_during_an_invalidation_is_not_kept(self):
+        self.client.get('/api/user/')
+        cached = user_cache.get(self.user.pk)
+
+        def build(user):
+            user_cache.invalidate(user.pk)
+            user_cache.set(user)
+            return 'stale'
+
+        self.assertEqual(user_cache.memoize(cached, 'name', build), 'stale')
+        self.assertEqual(user_cache.memoize(cached, 'name', lambda user: 'fresh'), 'fresh')
+
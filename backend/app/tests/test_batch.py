@@ -0,0 +1,50 @@
+import json
+
+from asgiref.sync import async_to_sync
+from django.test import override_settings
+
+from app.jobs import drain_queue
+from app.views import ContentBatchView
+
+from .base import SummarizerTestCase
+
+
+def parse_lines(body):
+    return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+
+class ContentBatchTests(SummarizerTestCase):
+
+    def post_batch(self, texts):
+        return self.client.post('/api/content/batch/', {'texts': texts, 'summary_length': 'short'}, format='json')
+
+    def test_wsgi_response_does_not_wait_for_items(self):
+        response = self.post_batch(['Tides follow the moon. ' * 20, ''])
+        self.assertEqual(response.status_code, 202)
+        lines = parse_lines(response.content)
+        self.assertEqual([line['event'] for line in lines], ['accepted', 'rejected', 'timeout'])
+        self.assertEqual(lines[2]['id'], lines[0]['id'])
+
+    def test_batch_without_valid_items_is_rejected(self):
+        response = self.post_batch([''])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['items'][0]['event'], 'rejected')
+
+    def test_async_stream_reports_finished_items(self):
+        ids = [line['id'] for line in parse_lines(self.post_batch(['First text. ' * 20, 'Second text. ' * 20]).content)
+               if line['event'] == 'accepted']
+        drain_queue()
+        accepted = {pk: (index, f'text-{index + 1}') for index, pk in enumerate(ids)}
+
+        async def collect():
+            return [json.loads(line) async for line in ContentBatchView().stream_results([], accepted)]
+
+        lines = async_to_sync(collect)()
+        self.assertEqual({line['id'] for line in lines}, set(ids))
+        self.assertTrue(all(line['event'] == 'finished' and line['status'] == 'done' for line in lines))
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_asgi_response_is_streamed(self):
+        response = self.post_batch(['Tides follow the moon. ' * 20])
+        self.assertTrue(response.streaming)
+        self.assertTrue(response.is_async)
@@ -0,0 +1,77 @@
+import io
+import zipfile
+from unittest import mock
+
+from django.test import override_settings
+
+from app.export import export_archive
+from app.models import Content
+from app.rendering import render_fields, render_txt, sanitize_filename
+
+from .base import SummarizerTestCase
+
+TEXTS = [
+    'Glaciers store most of the fresh water on the planet and shape valleys as they move. ' * 5,
+    'Coral reefs grow slowly from the skeletons of tiny animals in warm shallow seas. ' * 5,
+]
+
+
+@override_settings(EXPORT_WORKERS=1)
+class ExportTests(SummarizerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.contents = [Content.objects.get(pk=self.create_text(text).data['id']) for text in TEXTS]
+        self.authenticate(self.create_user('bob'))
+        self.other = Content.objects.get(pk=self.create_text(TEXTS[1], summary_length='short').data['id'])
+        self.authenticate(self.user)
+        # Not summarized yet, so not exported
+        self.create_text('Deserts cover a third of the land and get less than ten inches of rain. ' * 5, process=False)
+
+    def export(self, fmt='txt', **params):
+        response = self.client.get(f'/api/content/export/{fmt}', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="summaries-{fmt}.zip"')
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def entry_names(self, contents, fmt='txt'):
+        return [f'{content.pk}-{sanitize_filename(content.auto_title)}.{fmt}' for content in contents]
+
+    def test_archive_holds_only_the_users_summaries(self):
+        archive = self.export()
+        self.assertEqual(archive.namelist(), self.entry_names(self.contents))
+        for name, content in zip(archive.namelist(), self.contents):
+            self.assertEqual(archive.read(name), render_txt(content))
+        self.assertIsNone(archive.testzip())
+
+    def test_ids_narrow_the_export(self):
+        archive = self.export(ids=f'{self.contents[1].pk},{self.other.pk}')
+        self.assertEqual(archive.namelist(), self.entry_names(self.contents[1:]))
+        self.assertEqual(self.client.get('/api/content/export/txt', {'ids': 'one,two'}).status_code, 400)
+
+    def test_cached_and_rendered_entries_are_the_same(self):
+        fresh = self.export('pdf')
+        self.client.get(f'/api/content/{self.contents[0].pk}/download/pdf')
+        cached = self.export('pdf')
+        self.assertEqual(cached.namelist(), self.entry_names(self.contents, 'pdf'))
+        for name in cached.namelist():
+            self.assertTrue(cached.read(name).startswith(b'%PDF'))
+        # Entries carry the summary's time, so the same summaries give the same archive
+        self.assertEqual([info.date_time for info in cached.infolist()], [info.date_time for info in fresh.infolist()])
+
+    def test_nothing_to_export_gives_an_empty_archive(self):
+        self.assertEqual(self.export(ids=str(self.other.pk)).namelist(), [])
+        self.authenticate(self.create_user('carol'))
+        self.assertEqual(self.export().namelist(), [])
+
+    def test_failed_renderings_are_listed(self):
+        def render(fmt, fields):
+            if fields['auto_title'] == self.contents[0].auto_title:
+                raise ValueError('unrenderable')
+            return render_fields(fmt, fields)
+
+        with mock.patch('app.export.render_fields', render), self.assertLogs('app.export', 'ERROR'):
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(export_archive(self.contents, 'pdf', workers=1))))
+        self.assertEqual(archive.namelist(), self.entry_names(self.contents[1:], 'pdf') + ['errors.txt'])
+        self.assertEqual(archive.read('errors.txt'), f'Could not render content {self.contents[0].pk}\n'.encode())
@@ -0,0 +1,102 @@
+import zlib
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from app.models import Content, ExtractedText, compress_text
+
+from .base import SummarizerTestCase
+
+TEXT = 'Ocean tides are caused by the gravitational pull of the moon. ' * 20
+
+
+class ExtractedTextTests(SummarizerTestCase):
+
+    def create_content(self, text=TEXT):
+        content = Content(user=self.user, original_text='', status=Content.STATUS_DONE)
+        content.extracted_text = text
+        content.save()
+        return content
+
+    def test_text_is_stored_compressed_and_read_back(self):
+        content = self.create_content()
+        stored = ExtractedText.objects.get(content=content)
+        self.assertEqual(stored.size, len(TEXT))
+        self.assertLess(len(stored.data), len(TEXT))
+        self.assertEqual(zlib.decompress(stored.data).decode('utf-8'), TEXT)
+
+        # Loaded once, on first access
+        loaded = Content.objects.get(pk=content.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(loaded.extracted_text, TEXT)
+            self.assertEqual(loaded.extracted_text, TEXT)
+        loaded = Content.objects.get(pk=content.pk)
+        self.assertEqual(async_to_sync(loaded.aload_extracted_text)(), TEXT)
+
+    def test_saving_through_the_property(self):
+        content = self.create_content()
+        content.extracted_text = 'Moon and tides.'
+        # Not written unless extracted_text is among the updated fields
+        content.save(update_fields=['status'])
+        self.assertEqual(Content.objects.get(pk=content.pk).extracted_text, TEXT)
+
+        content.save(update_fields=['status', 'extracted_text'])
+        self.assertEqual(Content.objects.get(pk=content.pk).extracted_text, 'Moon and tides.')
+        self.assertEqual(ExtractedText.objects.get(content=content).data, compress_text('Moon and tides.'))
+
+        # Saving without touching the text leaves it alone
+        with self.assertNumQueries(1):
+            content.save()
+        content.refresh_from_db()
+        self.assertEqual(content.extracted_text, 'Moon and tides.')
+
+    def test_empty_text_has_no_row(self):
+        content = self.create_content()
+        content.extracted_text = ''
+        content.save()
+        self.assertFalse(ExtractedText.objects.filter(content=content).exists())
+        self.assertEqual(Content.objects.get(pk=content.pk).extracted_text, '')
+        self.assertEqual(self.create_content('').extracted_text, '')
+
+
+class ExtractedTextMigrationTests(TransactionTestCase):
+    before = [('app', '0005_content_search_index')]
+    after = [('app', '0006_extracted_text_table')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def setUp(self):
+        self.addCleanup(self.migrate, MigrationExecutor(connection).loader.graph.leaf_nodes())
+        apps = self.migrate(self.before)
+        User = apps.get_model('auth', 'User')
+        Content = apps.get_model('app', 'Content')
+        user = User.objects.create(username='alice')
+        self.filled = Content.objects.create(user=user, extracted_text=TEXT, summary='Tides')
+        self.empty = Content.objects.create(user=user, extracted_text='', summary='Moon')
+
+    def test_text_moves_to_the_compressed_table_and_back(self):
+        apps = self.migrate(self.after)
+        ExtractedText = apps.get_model('app', 'ExtractedText')
+        stored = ExtractedText.objects.get(content_id=self.filled.pk)
+        self.assertEqual((zlib.decompress(stored.data).decode('utf-8'), stored.size), (TEXT, len(TEXT)))
+        self.assertFalse(ExtractedText.objects.filter(content_id=self.empty.pk).exists())
+
+        apps = self.migrate(self.before)
+        Content = apps.get_model('app', 'Content')
+        self.assertEqual(Content.objects.get(pk=self.filled.pk).extracted_text, TEXT)
+        self.assertEqual(Content.objects.get(pk=self.empty.pk).extracted_text, '')
+
+    def test_search_index_survives_the_round_trip(self):
+        self.migrate(self.after)
+        apps = self.migrate(self.before)
+        Content = apps.get_model('app', 'Content')
+        Content.objects.filter(pk=self.filled.pk).update(summary='Currents')
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT rowid FROM app_content_fts WHERE app_content_fts MATCH %s', ['Currents'])
+            self.assertEqual(cursor.fetchall(), [(self.filled.pk,)])
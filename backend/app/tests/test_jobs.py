@@ -0,0 +1,109 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.signals import request_started
+from django.test import override_settings
+from django.utils import timezone
+
+from app import jobs
+from app.jobs import (
+    JobMonitor, WorkerPool, claim_next_job, drain_queue, enqueue, heartbeat, renew_heartbeats, requeue_stale_jobs,
+    start_worker_pool,
+)
+from app.models import Content, SummaryJob
+
+from .base import SummarizerTestCase
+
+TEXT = 'Glaciers store most of the fresh water on the planet. ' * 20
+
+
+class JobQueueTests(SummarizerTestCase):
+
+    def test_created_content_is_queued_and_processed(self):
+        response = self.create_text(TEXT, process=False)
+        self.assertEqual(response.status_code, 202)
+        content_id = response.json()['id']
+        self.assertEqual(response['Location'], f'/api/content/{content_id}/status/')
+        self.assertEqual(SummaryJob.objects.get(content=content_id).status, Content.STATUS_PENDING)
+
+        self.assertEqual(drain_queue(), 1)
+        content = Content.objects.get(pk=content_id)
+        self.assertEqual(content.status, Content.STATUS_DONE)
+        self.assertTrue(content.summary)
+        job = content.jobs.get()
+        self.assertEqual((job.status, job.attempts), (Content.STATUS_DONE, 1))
+        self.assertEqual(self.client.get(response['Location']).json()['status'], Content.STATUS_DONE)
+
+    def test_job_is_claimed_once_in_creation_order(self):
+        first = enqueue(Content.objects.create(user=self.user, original_text=TEXT))
+        second = enqueue(Content.objects.create(user=self.user, original_text=TEXT))
+        self.assertEqual(claim_next_job().pk, first.pk)
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+        self.assertEqual(SummaryJob.objects.get(pk=first.pk).status, Content.STATUS_RUNNING)
+
+    def stale_job(self, attempts, heartbeat_at=None):
+        content = Content.objects.create(user=self.user, original_text=TEXT, status=Content.STATUS_RUNNING)
+        return SummaryJob.objects.create(
+            content=content, status=Content.STATUS_RUNNING, attempts=attempts,
+            started_at=timezone.now() - timedelta(hours=1), heartbeat_at=heartbeat_at,
+        )
+
+    def test_stale_jobs_are_requeued_until_out_of_attempts(self):
+        retried = self.stale_job(attempts=1)
+        exhausted = self.stale_job(attempts=3)
+        current = enqueue(Content.objects.create(user=self.user, original_text=TEXT))
+        claim_next_job()
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(SummaryJob.objects.get(pk=retried.pk).status, Content.STATUS_PENDING)
+        self.assertEqual(SummaryJob.objects.get(pk=current.pk).status, Content.STATUS_RUNNING)
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, Content.STATUS_FAILED)
+        self.assertEqual(exhausted.content.status, Content.STATUS_FAILED)
+        self.assertEqual(exhausted.content.error, 'Processing timed out')
+
+    def test_worker_pass_recovers_jobs_left_by_a_crashed_process(self):
+        stale = self.stale_job(attempts=1)
+        pending = enqueue(Content.objects.create(user=self.user, original_text=TEXT))
+        pool = WorkerPool(1)
+        self.addCleanup(pool._executor.shutdown)
+        # Run one drain pass in this thread, as a woken worker would
+        pool._active = 1
+        pool._run()
+        for job in (stale, pending):
+            self.assertEqual(SummaryJob.objects.get(pk=job.pk).status, Content.STATUS_DONE)
+
+    def test_workers_start_with_the_first_request(self):
+        self.addCleanup(request_started.disconnect, start_worker_pool)
+        for in_process, started in ((False, 0), (True, 1)):
+            request_started.connect(start_worker_pool)
+            with override_settings(SUMMARY_WORKERS_IN_PROCESS=in_process), \
+                    mock.patch.object(jobs, 'get_worker_pool') as get_worker_pool:
+                self.client.get('/api/user/')
+                self.client.get('/api/user/')
+            self.assertEqual(get_worker_pool.call_count, started)
+
+    def test_long_job_with_a_live_heartbeat_is_not_requeued(self):
+        long_running = self.stale_job(attempts=1, heartbeat_at=timezone.now())
+        dead = self.stale_job(attempts=1, heartbeat_at=timezone.now() - timedelta(minutes=11))
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(SummaryJob.objects.get(pk=long_running.pk).status, Content.STATUS_RUNNING)
+        self.assertEqual(SummaryJob.objects.get(pk=dead.pk).status, Content.STATUS_PENDING)
+
+    def test_heartbeats_are_renewed_while_a_job_runs(self):
+        old = timezone.now() - timedelta(hours=1)
+        job = self.stale_job(attempts=1, heartbeat_at=old)
+        with heartbeat(job):
+            self.assertEqual(renew_heartbeats(), 1)
+        job.refresh_from_db()
+        self.assertGreater(job.heartbeat_at, old)
+
+        SummaryJob.objects.filter(pk=job.pk).update(heartbeat_at=old)
+        self.assertEqual(renew_heartbeats(), 0)
+        self.assertEqual(SummaryJob.objects.get(pk=job.pk).heartbeat_at, old)
+
+    def test_monitor_wakes_the_pool_on_each_tick(self):
+        pool = mock.Mock()
+        JobMonitor(pool, interval=60).tick()
+        pool.wake.assert_called_once_with()
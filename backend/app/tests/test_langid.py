@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.test import SimpleTestCase
+
+from app.langid import identify_language, identify_languages
+
+UKRAINIAN = "Київ є столицею України. Місто розташоване на річці Дніпро і має довгу історію."
+RUSSIAN = "Москва является столицей России и крупнейшим городом страны."
+PERSIAN = "تهران پایتخت ایران است و بزرگترین شهر کشور به شمار می‌رود."
+ARABIC = "القاهرة هي عاصمة مصر وأكبر مدينة في العالم العربي."
+MARATHI = "मुंबई ही महाराष्ट्राची राजधानी आहे. तिथे खूप लोक राहतात आणि काळ बदलतो."
+HINDI = "दिल्ली भारत की राजधानी है और यह एक बहुत बड़ा शहर है।"
+
+
+class LanguageIdentificationTests(SimpleTestCase):
+
+    def assertConfident(self, text, language):
+        detected, confidence = identify_language(text)
+        self.assertEqual(detected, language)
+        self.assertGreaterEqual(confidence, settings.LANGUAGE_CONFIDENCE_THRESHOLD)
+
+    def test_languages_sharing_a_script_are_told_apart_by_their_letters(self):
+        self.assertConfident(UKRAINIAN, 'uk')
+        self.assertConfident(RUSSIAN, 'ru')
+        self.assertConfident(PERSIAN, 'fa')
+        self.assertConfident(ARABIC, 'ar')
+        self.assertConfident(MARATHI, 'mr')
+
+    def test_script_alone_is_not_confident_when_several_languages_use_it(self):
+        language, confidence = identify_language(HINDI)
+        self.assertEqual(language, 'hi')
+        self.assertLess(confidence, settings.LANGUAGE_CONFIDENCE_THRESHOLD)
+
+    def test_distinctive_scripts_and_latin_profiles(self):
+        self.assertConfident("Η Αθήνα είναι η πρωτεύουσα της Ελλάδας.", 'el')
+        self.assertConfident("東京は日本の首都です。", 'ja')
+        self.assertEqual(
+            [language for language, _ in identify_languages([
+                "The weather was lovely and we walked along the river all afternoon.",
+                "Le temps était magnifique et nous avons marché le long de la rivière.",
+            ])],
+            ['en', 'fr'],
+        )
+        self.assertEqual(identify_language('1234 !!'), ('en', 0.0))
@@ -0,0 +1,12 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from app.llm import GeminiBackend
+
+
+class GeminiBackendTests(SimpleTestCase):
+
+    @override_settings(GEMINI_API_KEY=None)
+    def test_missing_api_key_is_a_configuration_error(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, 'GEMINI_API_KEY'):
+            GeminiBackend()
@@ -0,0 +1,31 @@
+from django.test import override_settings
+
+from .base import SummarizerTestCase
+
+
+class MetricsAccessTests(SummarizerTestCase):
+
+    def test_without_a_token_only_staff_can_scrape(self):
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+
+        self.user.is_staff = True
+        self.user.save()
+        self.authenticate(self.user)
+        response = self.client.get('/api/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'summarizer_summary_cache_hits_total', response.content)
+
+    @override_settings(METRICS_TOKEN='scrape')
+    def test_token_is_required_when_set(self):
+        self.user.is_staff = True
+        self.user.save()
+        # A user's JWT is not the scrape token
+        self.authenticate(self.user)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 200)
@@ -0,0 +1,40 @@
+from django.test import SimpleTestCase, override_settings
+
+from app.llm import get_backend
+from app.utils import EXTRACT_NOTE, prepare_prompts
+
+from .base import SummarizerTestCase
+
+LONG_TEXT = ' '.join(
+    f'Section {index} reports that the harbour handled more cargo than the year before.' for index in range(300)
+)
+
+
+class PromptTests(SimpleTestCase):
+
+    def test_long_document_analysis_reads_the_extract_by_default(self):
+        prompts = prepare_prompts(LONG_TEXT, 'short', condensed='Condensed sections.')
+        self.assertIn(EXTRACT_NOTE, prompts['analysis'])
+        self.assertNotIn(EXTRACT_NOTE, prompts['summary'])
+        self.assertIn('Condensed sections.', prompts['summary'])
+
+    @override_settings(SUMMARY_SINGLE_CALL=True, EXTRACTIVE_SUMMARY_PROMPT=True)
+    def test_single_call_carries_the_extract_with_the_extractive_summary_prompt(self):
+        prompts = prepare_prompts(LONG_TEXT, 'short')
+        self.assertIn(EXTRACT_NOTE, prompts['combined'])
+        self.assertIn(EXTRACT_NOTE, prompts['summary'])
+
+
+class SummaryCallTests(SummarizerTestCase):
+
+    def summarize(self, text):
+        response = self.create_text(text)
+        self.assertEqual(self.client.get(response['Location']).json()['status'], 'done')
+        return get_backend().stats['calls']
+
+    def test_analysis_and_summary_are_separate_calls_by_default(self):
+        self.assertEqual(self.summarize(LONG_TEXT[:3000]), 2)
+
+    @override_settings(SUMMARY_SINGLE_CALL=True)
+    def test_single_call_mode_makes_one_call(self):
+        self.assertEqual(self.summarize(LONG_TEXT[:3000]), 1)
@@ -0,0 +1,94 @@
+import os
+import time
+from types import SimpleNamespace
+
+from app.models import Content
+from app.rendering import RenderCache, content_version, render_cache, render_txt
+
+from .base import SummarizerTestCase
+
+TEXT = 'The tide rises and falls twice a day because of the pull of the moon. ' * 5
+
+
+class DownloadCacheTests(SummarizerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.content = Content.objects.get(pk=self.create_text(TEXT).data['id'])
+        self.url = f'/api/content/{self.content.pk}/download/txt'
+
+    def cached_files(self):
+        return sorted(path.name for path in render_cache.directory.glob(f'{self.content.pk}-*'))
+
+    def test_download_carries_validators_and_is_cached(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{self.content.pk}-txt-{content_version(self.content)}"')
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+        body = b''.join(response.streaming_content)
+        self.assertTrue(body.startswith(self.content.auto_title.encode()))
+        self.assertEqual(self.cached_files(), [f'{self.content.pk}-txt-{content_version(self.content)}.txt'])
+
+        # A second download is served from the cached file
+        self.assertEqual(b''.join(self.client.get(self.url).streaming_content), body)
+
+    def test_conditional_requests_get_not_modified(self):
+        first = self.client.get(self.url)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+        # Each format has its own validator
+        other = self.client.get(f'/api/content/{self.content.pk}/download/pdf', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(other.status_code, 200)
+
+    def test_changed_summary_drops_the_old_rendering(self):
+        first = self.client.get(self.url)
+        old_files = self.cached_files()
+
+        self.content.summary = 'The moon pulls the sea.'
+        self.content.save()
+        self.assertEqual(self.cached_files(), [])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertIn(b'The moon pulls the sea.', b''.join(response.streaming_content))
+        self.assertNotEqual(self.cached_files(), old_files)
+
+    def test_saving_other_fields_keeps_the_rendering(self):
+        self.client.get(self.url)
+        files = self.cached_files()
+        self.content.status = Content.STATUS_DONE
+        self.content.save(update_fields=['status'])
+        self.assertEqual(self.cached_files(), files)
+
+    def test_deleted_content_drops_its_renderings(self):
+        self.client.get(self.url)
+        self.content.delete()
+        self.assertEqual(self.cached_files(), [])
+
+
+class RenderCacheTests(SummarizerTestCase):
+
+    def test_least_recently_used_files_are_evicted(self):
+        contents = [SimpleNamespace(pk=pk, auto_title=f'Title {pk}', summary='Summary', keywords='') for pk in (1, 2, 3)]
+        cache = RenderCache(self.scratch / 'evicted', max_bytes=2 * len(render_txt(contents[0])))
+        for age, content in zip((20, 10), contents):
+            cache.open(content, 'txt').close()
+            path = cache.path_for(content.pk, 'txt', content_version(content))
+            os.utime(path, (time.time() - age, time.time() - age))
+
+        # Reading the oldest file makes the second one the least recently used
+        cache.lookup(contents[0], 'txt').close()
+        cache.open(contents[2], 'txt').close()
+        self.assertEqual([content.pk for content in contents if cache.lookup(content, 'txt') is None], [2])
+        for content in (contents[0], contents[2]):
+            with cache.lookup(content, 'txt') as handle:
+                self.assertEqual(handle.read(), render_txt(content))
@@ -0,0 +1,87 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from app.llm import CircuitOpenError, LLMError, TransientLLMError
+from app.resilience import AdaptiveLimiter, CallGuard, CircuitBreaker
+
+
+def failing():
+    raise TransientLLMError("overloaded")
+
+
+def rejected():
+    raise LLMError("bad prompt")
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def guard(self, reset_timeout=60.0):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=reset_timeout)
+        return CallGuard(AdaptiveLimiter(4), breaker, max_attempts=1)
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        guard = self.guard()
+        for _ in range(2):
+            with self.assertRaises(TransientLLMError):
+                guard.call(failing)
+        self.assertEqual(guard.breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpenError):
+            guard.call(lambda: 'never sent')
+        self.assertEqual(guard.breaker.stats, {'opened': 1, 'rejected': 1})
+        self.assertEqual(guard.limiter.in_flight, 0)
+
+    def test_bad_requests_do_not_open_the_circuit(self):
+        guard = self.guard()
+        for _ in range(3):
+            with self.assertRaises(LLMError):
+                guard.call(rejected)
+        self.assertEqual(guard.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_one_trial_after_reset_closes_the_circuit(self):
+        guard = self.guard(reset_timeout=0)
+        for _ in range(2):
+            with self.assertRaises(TransientLLMError):
+                guard.call(failing)
+        self.assertTrue(guard.breaker.before_call())
+        with self.assertRaises(CircuitOpenError):
+            guard.breaker.before_call()
+        guard.breaker.on_success()
+        self.assertEqual(guard.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(guard.call(lambda: 'answer'), 'answer')
+
+    def test_failed_trial_opens_the_circuit_again(self):
+        guard = self.guard(reset_timeout=0)
+        for _ in range(3):
+            with self.assertRaises(TransientLLMError):
+                guard.call(failing)
+        self.assertEqual(guard.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(guard.breaker.stats['opened'], 2)
+
+    def test_cancelled_trial_lets_the_next_call_through(self):
+        guard = self.guard(reset_timeout=0)
+        for _ in range(2):
+            with self.assertRaises(TransientLLMError):
+                guard.call(failing)
+
+        async def cancel_trial():
+            started = asyncio.Event()
+
+            async def hang():
+                started.set()
+                await asyncio.sleep(60)
+
+            task = asyncio.ensure_future(guard.acall(hang))
+            await started.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+            async def answer():
+                return 'answer'
+
+            return await guard.acall(answer)
+
+        self.assertEqual(asyncio.run(cancel_trial()), 'answer')
+        self.assertEqual(guard.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(guard.limiter.in_flight, 0)
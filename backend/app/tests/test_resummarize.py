@@ -0,0 +1,60 @@
+from app.jobs import drain_queue
+from app.llm import get_backend
+from app.models import Content, SummaryJob, SummaryVersion
+
+from .base import SummarizerTestCase
+
+TEXT = 'Coral reefs shelter a quarter of all marine species. ' * 40
+
+
+class ResummarizeTests(SummarizerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.content = Content.objects.get(pk=self.create_text(TEXT, summary_length='medium').json()['id'])
+        self.url = f'/api/content/{self.content.pk}/resummarize/'
+
+    def resummarize(self, length):
+        return self.client.post(self.url, {'summary_length': length}, format='json')
+
+    def test_new_length_is_derived_in_the_background(self):
+        calls = get_backend().stats['calls']
+        response = self.resummarize('short')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Location'], f'/api/content/{self.content.pk}/status/')
+        self.assertEqual(SummaryJob.objects.filter(content=self.content, summary_length='short').count(), 1)
+
+        drain_queue()
+        content = Content.objects.get(pk=self.content.pk)
+        self.assertEqual((content.status, content.summary_length), (Content.STATUS_DONE, 'short'))
+        self.assertNotEqual(content.summary, self.content.summary)
+        self.assertEqual((content.auto_title, content.keywords), (self.content.auto_title, self.content.keywords))
+        # One call for the new summary; nothing is extracted or analysed again
+        self.assertEqual(get_backend().stats['calls'], calls + 1)
+
+    def test_previous_length_is_restored_at_once(self):
+        self.resummarize('short')
+        drain_queue()
+        calls = get_backend().stats['calls']
+
+        response = self.resummarize('medium')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['summary'], self.content.summary)
+        self.assertEqual(get_backend().stats['calls'], calls)
+        kept = SummaryVersion.objects.filter(content=self.content).values_list('summary_length', flat=True)
+        self.assertEqual(set(kept), {'short', 'medium'})
+
+    def test_cached_summary_of_the_same_text_is_applied_at_once(self):
+        other = self.create_text(TEXT, summary_length='long').json()
+        response = self.resummarize('long')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['summary'], Content.objects.get(pk=other['id']).summary)
+
+    def test_invalid_length_or_unfinished_content_is_refused(self):
+        self.assertEqual(self.resummarize('huge').status_code, 400)
+        Content.objects.filter(pk=self.content.pk).update(status=Content.STATUS_PENDING)
+        self.assertEqual(self.resummarize('short').status_code, 409)
+
+    def test_other_users_content_is_not_found(self):
+        self.authenticate(self.create_user('bob'))
+        self.assertEqual(self.resummarize('short').status_code, 404)
@@ -0,0 +1,69 @@
+from django.db import connection
+
+from app.models import Content
+
+from .base import SummarizerTestCase
+
+
+class ContentSearchTests(SummarizerTestCase):
+
+    def add(self, user=None, **fields):
+        fields = {'auto_title': 'Harbour report', 'keywords': 'shipping, cargo',
+                  'summary': 'Cargo volumes rose in the northern harbour.', **fields}
+        return Content.objects.create(user=user or self.user, status=Content.STATUS_DONE, **fields)
+
+    def search(self, q):
+        response = self.client.get('/api/content/search/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [hit['id'] for hit in response.json()['results']]
+
+    def test_index_triggers_exist_after_all_migrations(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'app_content'")
+            triggers = {name for name, in cursor.fetchall()}
+        self.assertEqual(triggers, {'app_content_fts_insert', 'app_content_fts_update', 'app_content_fts_delete'})
+
+    def test_new_rows_are_found_and_ranked_by_title_first(self):
+        in_summary = self.add(auto_title='Quarterly figures', summary='A note on the harbour.')
+        in_title = self.add()
+        response = self.client.get('/api/content/search/', {'q': 'harbour'})
+        hits = response.json()['results']
+        self.assertEqual([hit['id'] for hit in hits], [in_title.pk, in_summary.pk])
+        self.assertEqual(response.json()['count'], 2)
+        self.assertIn('harbour', hits[0]['highlights']['auto_title'].lower())
+
+    def test_updates_and_deletes_follow_the_index(self):
+        content = self.add()
+        Content.objects.filter(pk=content.pk).update(summary='Passenger ferries were cancelled.')
+        self.assertEqual(self.search('cargo volumes'), [])
+        self.assertEqual(self.search('ferries'), [content.pk])
+
+        content.auto_title = 'Ferry timetable'
+        content.save()
+        self.assertEqual(self.search('timetable'), [content.pk])
+        content.delete()
+        self.assertEqual(self.search('ferries'), [])
+
+    def test_summarized_upload_is_searchable(self):
+        content_id = self.create_text('Volcanoes shape the islands of the southern ocean. ' * 20).json()['id']
+        summary = Content.objects.get(pk=content_id).summary
+        self.assertEqual(self.search(summary.split()[0]), [content_id])
+
+    def test_other_users_documents_are_not_searched(self):
+        self.add(user=self.create_user('bob'))
+        self.assertEqual(self.search('harbour'), [])
+
+    def test_query_without_words_is_rejected(self):
+        response = self.client.get('/api/content/search/', {'q': ' ?! '})
+        self.assertEqual(response.status_code, 400)
+
+    def test_hits_and_list_can_be_narrowed_to_one_length(self):
+        short = self.add(summary_length='short')
+        self.add(summary_length='long')
+        response = self.client.get('/api/content/search/', {'q': 'harbour', 'summary_length': 'short'})
+        self.assertEqual([hit['id'] for hit in response.json()['results']], [short.pk])
+        self.assertEqual(response.json()['count'], 1)
+
+        listed = self.client.get('/api/content/', {'summary_length': 'short'}).json()['results']
+        self.assertEqual([item['id'] for item in listed], [short.pk])
+        self.assertEqual(len(self.client.get('/api/content/', {'summary_length': 'any'}).json()['results']), 2)
@@ -0,0 +1,49 @@
+from asgiref.sync import async_to_sync
+from django.test import override_settings
+
+from app.models import Content, SummaryJob
+from app.streaming import stream_summary
+
+from .base import SummarizerTestCase
+
+TEXT = 'Migrating birds cross the desert at night. ' * 30
+
+
+class StreamSummaryTests(SummarizerTestCase):
+
+    def post_stream(self):
+        return self.client.post('/api/content/stream/', {'original_text': TEXT, 'summary_length': 'short'},
+                                format='json')
+
+    def test_wsgi_server_declines_to_stream(self):
+        response = self.post_stream()
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(Content.objects.exists())
+
+    @override_settings(ASYNC_VIEWS=True)
+    def test_asgi_server_streams_the_summary(self):
+        response = self.post_stream()
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        async def read():
+            return b''.join([piece async for piece in response.streaming_content]).decode('utf-8')
+
+        body = async_to_sync(read)()
+        self.assertTrue(body.startswith('event: created'))
+        self.assertIn('event: token', body)
+        self.assertIn('event: done', body)
+        self.assertEqual(Content.objects.get().status, Content.STATUS_DONE)
+
+    def test_abandoned_stream_is_requeued_before_it_closes(self):
+        content = Content.objects.create(user=self.user, original_text=TEXT, status=Content.STATUS_RUNNING)
+
+        async def disconnect_after_first_token():
+            stream = stream_summary(content)
+            await stream.__anext__()
+            self.assertTrue((await stream.__anext__()).startswith('event: token'))
+            await stream.aclose()
+
+        async_to_sync(disconnect_after_first_token)()
+        content.refresh_from_db()
+        self.assertEqual(content.status, Content.STATUS_PENDING)
+        self.assertEqual(SummaryJob.objects.get(content=content).status, Content.STATUS_PENDING)
@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.test import override_settings
+from django.utils import timezone
+
+from app import llm
+from app.llm import get_backend
+from app.models import Content, SummaryCacheEntry
+from app.utils import SummaryCache, summary_cache_key
+
+from .base import SummarizerTestCase
+
+RESULTS = {'summary': 'Tides follow the moon.', 'keywords': 'tides, moon', 'title': 'Tides'}
+
+
+class SummaryCacheTests(SummarizerTestCase):
+
+    def test_entries_are_read_from_memory_then_from_the_database(self):
+        cache = SummaryCache()
+        cache.set('key', RESULTS)
+        self.assertEqual(cache.get('key'), RESULTS)
+        self.assertEqual(cache.stats()['memory_hits'], 1)
+
+        # Another process only shares the table
+        other = SummaryCache()
+        self.assertEqual(other.get('key'), RESULTS)
+        self.assertEqual(other.get('key'), RESULTS)
+        self.assertEqual(other.get('missing'), None)
+        stats = other.stats()
+        self.assertEqual((stats['db_hits'], stats['memory_hits'], stats['misses']), (1, 1, 1))
+        self.assertAlmostEqual(stats['hit_ratio'], 2 / 3)
+
+    def test_memory_tier_keeps_the_most_recently_used(self):
+        cache = SummaryCache(memory_entries=2)
+        for key in ('a', 'b'):
+            cache.set(key, RESULTS)
+        cache.get('a')
+        cache.set('c', RESULTS)
+        self.assertEqual(cache.stats()['memory_evictions'], 1)
+        self.assertEqual(set(cache._entries), {'a', 'c'})
+        self.assertEqual(cache.get('b'), RESULTS)
+        self.assertEqual(cache.stats()['db_hits'], 1)
+
+    def test_database_tier_drops_least_recently_used_rows_over_its_cap(self):
+        cache = SummaryCache(db_max_bytes=250)
+        for key in ('a', 'b', 'c', 'd'):
+            cache.set(key, RESULTS)
+        remaining = set(SummaryCacheEntry.objects.values_list('key', flat=True))
+        self.assertLess(len(remaining), 4)
+        self.assertIn('d', remaining)
+        self.assertEqual(cache.stats()['db_evictions'], 4 - len(remaining))
+
+    def test_expired_entries_are_misses(self):
+        cache = SummaryCache(ttl=60)
+        cache.set('key', RESULTS)
+        cache._entries.clear()
+        SummaryCacheEntry.objects.update(created_at=timezone.now() - timedelta(minutes=2))
+        self.assertIsNone(cache.get('key'))
+        self.assertFalse(SummaryCacheEntry.objects.exists())
+        self.assertEqual(cache.stats()['expired'], 1)
+
+    def test_clear_empties_both_tiers(self):
+        cache = SummaryCache()
+        cache.set('key', RESULTS)
+        cache.clear()
+        self.assertIsNone(cache.get('key'))
+        self.assertEqual(cache.stats()['memory_entries'], 0)
+
+    def test_repeated_text_is_answered_from_the_cache(self):
+        text = 'Glaciers store most of the fresh water on the planet. ' * 20
+        self.create_text(text)
+        calls = get_backend().stats['calls']
+
+        response = self.create_text(text, process=False)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['status'], Content.STATUS_DONE)
+        self.assertEqual(get_backend().stats['calls'], calls)
+
+    def test_keys_follow_the_configured_model(self):
+        text = 'Glaciers store most of the fresh water on the planet.'
+        key = summary_cache_key(text, 'short')
+        self.assertEqual(summary_cache_key(text.replace(' ', '\n  '), 'SHORT'), key)
+        with override_settings(LLM_BACKEND={'BACKEND': 'app.llm.GeminiBackend'}):
+            flash = summary_cache_key(text, 'short')
+        with override_settings(LLM_BACKEND={'BACKEND': 'app.llm.GeminiBackend', 'OPTIONS': {'model': 'gemini-1.5-pro'}}):
+            self.assertNotEqual(summary_cache_key(text, 'short'), flash)
+
+    @override_settings(LLM_BACKEND={'BACKEND': 'app.llm.GeminiBackend', 'OPTIONS': {}}, GEMINI_API_KEY=None)
+    def test_upload_does_not_create_the_backend(self):
+        # Without an API key the backend cannot be created, but the upload is still accepted
+        response = self.create_text('Glaciers store most of the fresh water on the planet. ' * 20, process=False)
+        self.assertEqual(response.status_code, 202)
+        self.assertIsNone(llm._backend)
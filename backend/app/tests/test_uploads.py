@@ -0,0 +1,108 @@
+import hashlib
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from app import uploads
+from app.jobs import drain_queue
+from app.models import ChunkedUpload, Content
+
+from .base import SummarizerTestCase
+
+DOCUMENT = ('Rivers carve valleys through the northern mountains. ' * 40).encode('utf-8')
+
+
+class ChunkedUploadTests(SummarizerTestCase):
+
+    def start(self, size=len(DOCUMENT), filename='notes.txt'):
+        response = self.client.post('/api/uploads/', {'filename': filename, 'size': size}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response['Location']
+
+    def send(self, url, offset, data):
+        return self.client.patch(url, data, content_type='application/offset+octet-stream',
+                                 HTTP_UPLOAD_OFFSET=str(offset))
+
+    def upload(self, data=DOCUMENT):
+        url = self.start(len(data))
+        half = len(data) // 2
+        self.send(url, 0, data[:half])
+        return self.send(url, half, data[half:]).json()
+
+    def test_chunks_complete_the_upload_with_its_hash(self):
+        url = self.start()
+        response = self.send(url, 0, DOCUMENT[:100])
+        self.assertEqual(response['Upload-Offset'], '100')
+        self.assertFalse(response.json()['complete'])
+
+        state = self.send(url, 100, DOCUMENT[100:]).json()
+        self.assertTrue(state['complete'])
+        self.assertEqual(state['offset'], len(DOCUMENT))
+        self.assertEqual(state['sha256'], hashlib.sha256(DOCUMENT).hexdigest())
+        self.assertEqual(self.client.get(url).json(), state)
+
+    def test_chunk_at_the_wrong_offset_conflicts(self):
+        url = self.start()
+        self.send(url, 0, DOCUMENT[:100])
+        response = self.send(url, 50, DOCUMENT[50:150])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 100)
+        self.assertEqual(response['Upload-Offset'], '100')
+
+    def test_chunk_without_offset_or_past_the_size_is_rejected(self):
+        url = self.start()
+        response = self.client.patch(url, DOCUMENT[:10], content_type='application/offset+octet-stream')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.send(url, 0, DOCUMENT + b'extra').status_code, 413)
+        self.assertEqual(self.client.get(url).json()['offset'], 0)
+
+    @override_settings(UPLOAD_MAX_BYTES=1000)
+    def test_upload_over_the_limit_is_refused(self):
+        response = self.client.post('/api/uploads/', {'filename': 'big.txt', 'size': 1001}, format='json')
+        self.assertEqual(response.status_code, 413)
+
+    def test_hash_is_rebuilt_when_another_process_took_the_last_chunk(self):
+        url = self.start()
+        self.send(url, 0, DOCUMENT[:300])
+        uploads._hashes.clear()
+        state = self.send(url, 300, DOCUMENT[300:]).json()
+        self.assertEqual(state['sha256'], hashlib.sha256(DOCUMENT).hexdigest())
+
+    def test_identical_files_are_stored_once(self):
+        first = ChunkedUpload.objects.get(pk=self.upload()['id'])
+        second = ChunkedUpload.objects.get(pk=self.upload()['id'])
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertIn(first.sha256, first.file.name)
+
+        response = self.client.post('/api/content/', {
+            'original_file': SimpleUploadedFile('copy.txt', DOCUMENT), 'summary_length': 'short',
+        })
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Content.objects.get(pk=response.json()['id']).original_file.name, first.file.name)
+
+    def test_finished_upload_is_attached_to_new_content(self):
+        upload_id = self.upload()['id']
+        response = self.client.post('/api/content/', {'upload': upload_id, 'summary_length': 'short'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        drain_queue()
+        content = Content.objects.get(pk=response.json()['id'])
+        self.assertEqual(content.status, Content.STATUS_DONE)
+        self.assertEqual(content.extracted_text, DOCUMENT.decode('utf-8'))
+
+    def test_uploads_of_other_users_are_hidden(self):
+        url = self.start()
+        upload_id = self.upload()['id']
+        self.authenticate(self.create_user('bob'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.send(url, 0, DOCUMENT).status_code, 404)
+        response = self.client.post('/api/content/', {'upload': upload_id}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('upload', response.json())
+
+    def test_deleting_an_upload_keeps_a_document_in_use(self):
+        upload_id = self.upload()['id']
+        self.client.post('/api/content/', {'upload': upload_id}, format='json')
+        upload = ChunkedUpload.objects.get(pk=upload_id)
+        self.assertEqual(self.client.delete(f'/api/uploads/{upload_id}/').status_code, 204)
+        self.assertFalse(ChunkedUpload.objects.filter(pk=upload_id).exists())
+        self.assertTrue(upload.file.storage.exists(upload.file.name))
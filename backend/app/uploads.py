@@ -0,0 +1,255 @@
+"""Streaming and resumable uploads of documents.
+
+Multipart uploads go through HashingFileUploadHandler, which writes each file
+straight to a temporary file and hashes it as the data arrives, stopping at
+UPLOAD_MAX_BYTES. Large files can also be sent in chunks over several
+requests, tus-style:
+
+  POST   uploads/        {"filename", "size"} creates a ChunkedUpload
+  PATCH  uploads/<id>/   appends the raw request body at the `Upload-Offset`
+                         header, which must equal the bytes received so far
+  GET    uploads/<id>/   reports the offset, to resume after a dropped connection
+  DELETE uploads/<id>/   aborts the upload
+
+Chunks are written to UPLOAD_PARTS_DIR/<id>.part and fed to a SHA-256 kept in
+process between requests. A chunk that lands on another process, or after a
+restart, rebuilds the hash from the part file first. Once `size` bytes have
+arrived, the file moves into content-addressed storage (see app/storage.py),
+and POST content/ can attach it by reference with `upload=<id>`.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException
+
+from .models import ChunkedUpload, Content
+from .storage import HASH_CHUNK_BYTES, HashedFile
+
+logger = logging.getLogger(__name__)
+
+# Hashes of chunked uploads by id, with the offset they have reached
+MAX_CACHED_HASHES = 1024
+_hashes = OrderedDict()
+_hashes_lock = threading.Lock()
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'The upload is too large.'
+    default_code = 'upload_too_large'
+
+
+class UploadConflict(APIException):
+    """A chunk sent for an offset other than the upload's, or while another chunk is being written"""
+    status_code = status.HTTP_409_CONFLICT
+    default_code = 'upload_offset_mismatch'
+
+    def __init__(self, offset):
+        super().__init__(f'The upload is at offset {offset}.')
+        self.offset = offset
+
+
+def max_upload_bytes():
+    return getattr(settings, 'UPLOAD_MAX_BYTES', 512 * 1024 * 1024)
+
+
+def check_upload_size(size):
+    limit = max_upload_bytes()
+    if limit and size > limit:
+        raise UploadTooLarge(f'Uploads are limited to {limit} bytes.')
+
+
+class HashedUploadedFile(TemporaryUploadedFile):
+    """TemporaryUploadedFile that hashes and counts its bytes as they are written"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.received = 0
+
+    def write_chunk(self, data):
+        self.received += len(data)
+        check_upload_size(self.received)
+        self.hasher.update(data)
+        self.file.write(data)
+
+    @property
+    def sha256(self):
+        return self.hasher.hexdigest()
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """Write every multipart file to disk, hashing it and enforcing UPLOAD_MAX_BYTES on the way.
+
+    Unlike Django's default handlers, small files are not held in memory, and
+    an oversized file fails the request as soon as the limit is passed.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super(TemporaryFileUploadHandler, self).new_file(*args, **kwargs)
+        self.file = HashedUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+
+    def receive_data_chunk(self, raw_data, start):
+        try:
+            self.file.write_chunk(raw_data)
+        except UploadTooLarge:
+            self.upload_interrupted()
+            raise
+
+
+def parts_dir():
+    return Path(getattr(settings, 'UPLOAD_PARTS_DIR', Path(settings.BASE_DIR) / 'upload_parts'))
+
+
+def part_path(upload):
+    return parts_dir() / f'{upload.pk}.part'
+
+
+def start_upload(user, filename, size):
+    """Create a ChunkedUpload and its empty part file"""
+    check_upload_size(size)
+    purge_stale_uploads()
+    upload = ChunkedUpload.objects.create(user=user, filename=filename, size=size)
+    parts_dir().mkdir(parents=True, exist_ok=True)
+    part_path(upload).touch()
+    if not size:
+        finish_upload(upload, hashlib.sha256())
+    return upload
+
+
+def upload_hash(upload):
+    """The SHA-256 of the upload's first `offset` bytes, ready to take the next chunk"""
+    with _hashes_lock:
+        entry = _hashes.pop(upload.pk, None)
+    if entry is not None and entry[0] == upload.offset:
+        return entry[1]
+
+    # Another process took the previous chunk, or this one restarted
+    hasher = hashlib.sha256()
+    remaining = upload.offset
+    with open(part_path(upload), 'rb') as part:
+        while remaining:
+            data = part.read(min(HASH_CHUNK_BYTES, remaining))
+            if not data:
+                break
+            hasher.update(data)
+            remaining -= len(data)
+    return hasher
+
+
+def remember_hash(upload, hasher):
+    with _hashes_lock:
+        _hashes[upload.pk] = (upload.offset, hasher)
+        _hashes.move_to_end(upload.pk)
+        while len(_hashes) > MAX_CACHED_HASHES:
+            _hashes.popitem(last=False)
+
+
+def forget_hash(upload):
+    with _hashes_lock:
+        _hashes.pop(upload.pk, None)
+
+
+def write_chunk(upload, offset, stream, length):
+    """Append `length` bytes read from stream at offset, finishing the upload with the last of them.
+
+    Bytes that arrived before the stream broke off are kept, so the client
+    resumes from the offset the upload then reports.
+    """
+    if upload.complete or offset != upload.offset:
+        raise UploadConflict(upload.offset)
+    if offset + length > upload.size:
+        raise UploadTooLarge('The chunk runs past the declared size of the upload.')
+
+    stale = timezone.now() - timedelta(seconds=getattr(settings, 'UPLOAD_CHUNK_TIMEOUT', 300))
+    claimed = ChunkedUpload.objects.filter(pk=upload.pk, offset=offset, file='').filter(
+        Q(writing_since__isnull=True) | Q(writing_since__lt=stale)
+    ).update(writing_since=timezone.now())
+    if not claimed:
+        upload.refresh_from_db(fields=['offset'])
+        raise UploadConflict(upload.offset)
+
+    hasher = upload_hash(upload)
+    written = 0
+    try:
+        with open(part_path(upload), 'r+b') as part:
+            # Drop anything past the offset left by a chunk that was never recorded
+            part.seek(offset)
+            part.truncate()
+            while written < length:
+                data = stream.read(min(HASH_CHUNK_BYTES, length - written))
+                if not data:
+                    break
+                part.write(data)
+                hasher.update(data)
+                written += len(data)
+    finally:
+        upload.offset = offset + written
+        ChunkedUpload.objects.filter(pk=upload.pk).update(
+            offset=upload.offset, writing_since=None, updated_at=timezone.now()
+        )
+        remember_hash(upload, hasher)
+
+    if upload.offset == upload.size:
+        finish_upload(upload, hasher)
+    return upload
+
+
+def finish_upload(upload, hasher):
+    """Move a fully received part file into document storage"""
+    path = part_path(upload)
+    upload.sha256 = hasher.hexdigest()
+    with HashedFile(path, upload.filename, upload.sha256) as document:
+        upload.file.save(upload.filename, document, save=False)
+    # An identical document was stored before, so the part was not moved
+    path.unlink(missing_ok=True)
+    upload.save(update_fields=['file', 'sha256', 'updated_at'])
+    forget_hash(upload)
+
+
+def discard_upload(upload):
+    """Delete an upload, its part file and its document if nothing else uses it"""
+    part_path(upload).unlink(missing_ok=True)
+    forget_hash(upload)
+    name = upload.file.name
+    upload.delete()
+    if name and not (
+        Content.objects.filter(original_file=name).exists()
+        or ChunkedUpload.objects.filter(file=name).exists()
+    ):
+        upload.file.storage.delete(name)
+
+
+def purge_stale_uploads():
+    """Discard uploads not touched for UPLOAD_EXPIRY seconds; return how many"""
+    cutoff = timezone.now() - timedelta(seconds=getattr(settings, 'UPLOAD_EXPIRY', 24 * 3600))
+    stale = list(ChunkedUpload.objects.filter(updated_at__lt=cutoff)[:100])
+    for upload in stale:
+        discard_upload(upload)
+    return len(stale)
+
+
+def attach_upload(data, user):
+    """Replace the `upload` id of validated content data with that upload's stored document"""
+    upload_id = data.pop('upload', None)
+    if upload_id is None:
+        return
+    name = (
+        ChunkedUpload.objects.filter(pk=upload_id, user=user)
+        .exclude(file='')
+        .values_list('file', flat=True)
+        .first()
+    )
+    if name is None:
+        raise serializers.ValidationError({'upload': ['No finished upload with this id.']})
+    data['original_file'] = name
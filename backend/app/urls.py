@@ -1,10 +1,34 @@
+from django.conf import settings
 from django.urls import path
-from .views import ContentCreateView, ContentDetailView, DownloadContentView, RegisterView, CurrentUserView
-
-urlpatterns = [
-    path('content/', ContentCreateView.as_view(), name='content-list'),
-    path('register/', RegisterView.as_view(), name='auth_register'),
-    path('content/<int:pk>/', ContentDetailView.as_view(), name='content-detail'),
-    path('content/<int:pk>/download/<str:file_format>', DownloadContentView.as_view(), name='content-download'),
-    path('user/', CurrentUserView.as_view(), name='current-user')
-]
\ No newline at end of file
+from .views import AsyncContentDetailView, AsyncContentExportView, AsyncContentListView, AsyncDownloadContentView, CacheStatsView, ContentBatchView, ContentCreateView, ContentDetailView, ContentExportView, ContentResummarizeView, ContentSearchView, ContentStatusView, ContentStreamView, DownloadContentView, MetricsView, RegisterView, CurrentUserView, UploadDetailView, UploadListView
+
+
+def api_patterns(async_views):
+    """URL patterns of the API; under ASGI the content views are async (see ASYNC_VIEWS in core/settings.py)"""
+    if async_views:
+        content_list, content_detail, content_download = AsyncContentListView, AsyncContentDetailView, AsyncDownloadContentView
+        content_export = AsyncContentExportView
+    else:
+        content_list, content_detail, content_download = ContentCreateView, ContentDetailView, DownloadContentView
+        content_export = ContentExportView
+
+    return [
+        path('content/', content_list.as_view(), name='content-list'),
+        path('content/batch/', ContentBatchView.as_view(), name='content-batch'),
+        path('content/search/', ContentSearchView.as_view(), name='content-search'),
+        path('content/stream/', ContentStreamView.as_view(), name='content-stream'),
+        path('content/export/<str:file_format>', content_export.as_view(), name='content-export'),
+        path('uploads/', UploadListView.as_view(), name='upload-list'),
+        path('uploads/<uuid:pk>/', UploadDetailView.as_view(), name='upload-detail'),
+        path('register/', RegisterView.as_view(), name='auth_register'),
+        path('content/<int:pk>/', content_detail.as_view(), name='content-detail'),
+        path('content/<int:pk>/resummarize/', ContentResummarizeView.as_view(), name='content-resummarize'),
+        path('content/<int:pk>/status/', ContentStatusView.as_view(), name='content-status'),
+        path('content/<int:pk>/download/<str:file_format>', content_download.as_view(), name='content-download'),
+        path('user/', CurrentUserView.as_view(), name='current-user'),
+        path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+        path('metrics/', MetricsView.as_view(), name='metrics'),
+    ]
+
+
+urlpatterns = api_patterns(settings.ASYNC_VIEWS)
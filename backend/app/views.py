@@ -1,20 +1,40 @@
-from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from rest_framework.response import Response
 from django.http import FileResponse
-from io import BytesIO
-from docx import Document as DocxDocument
-from .models import Content
-from .serializers import ContentSerializer, UserSerializer, GetUser
-from .utils import extract_text, process_with_gemini
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER
-import re
+from .models import ChunkedUpload, Content, SummaryJob
+from .serializers import ContentSerializer, ContentListSerializer, ContentStatusSerializer, UserSerializer, GetUser
+from .pagination import ContentCursorPagination, SearchPagination
+from .jobs import aenqueue, apply_results, enqueue, resummarize
+from .authentication import CachedJWTAuthentication, user_cache
+from .resilience import get_guard
+from .search import search
+from .export import export_archive, export_queryset, iter_rows
+from .uploads import UploadConflict, attach_upload, discard_upload, start_upload, write_chunk
+from .utils import summary_cache, summary_cache_key
+from . import metrics
+from .metrics import render_prometheus
+from .rendering import RENDERED_FIELDS, RENDERERS, content_version, render_cache, sanitize_filename
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+import asyncio
+import json
+import time
+from django.conf import settings
+from .streaming import iterate_in_thread, stream_summary
 
 
 class RegisterView(generics.CreateAPIView):
@@ -23,142 +43,529 @@ class RegisterView(generics.CreateAPIView):
 
 class DownloadContentView(generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
-    queryset = Content.objects.all()
     serializer_class = ContentSerializer
     lookup_field = 'pk'
 
+    def get_queryset(self):
+        # Only the fields that go into the file and its cache headers
+        return Content.objects.filter(user=self.request.user).only('id', 'updated_at', *RENDERED_FIELDS)
+
     def get(self, request, *args, **kwargs):
         # Retrieve the content object
         content = self.get_object()
-        # Extract format from query parameters
-        fmt = request.query_params.get('format', 'pdf').lower()
-        # Sanitize filename
-        filename = self.sanitize_filename(content.auto_title)
-
-        # Dispatch to the correct generator
-        if fmt == 'docx':
-            return self.generate_docx(content, filename)
-        elif fmt == 'pdf':
-            return self.generate_pdf(content, filename)
-        else:
-            return self.generate_txt(content, filename)
-
-    def sanitize_filename(self, filename):
-        """Remove special characters and collapse spaces to underscores"""
-        filename = re.sub(r'[^\w\s-]', '', filename or '').strip()
-        return re.sub(r'[-\s]+', '_', filename)[:50]
-
-    def generate_docx(self, content, filename):
-        """Generate a .docx file response"""
-        doc = DocxDocument()
-        doc.add_heading(content.auto_title or 'Summary', level=1)
-        if content.summary:
-            for para in content.summary.split('\n'):
-                doc.add_paragraph(para)
-        if content.keywords:
-            doc.add_paragraph()  # blank line
-            doc.add_paragraph(f"Keywords: {content.keywords}")
-
-        buffer = BytesIO()
-        doc.save(buffer)
-        buffer.seek(0)
-
-        return FileResponse(
-            buffer,
-            as_attachment=True,
-            filename=f"{filename}.docx",
-            content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        )
+        fmt = download_format(kwargs.get('file_format', 'pdf'))
 
-    def generate_pdf(self, content, filename):
-        """Generate a .pdf file response"""
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        styles = getSampleStyleSheet()
+        # Let the browser reuse its copy while the summary is unchanged
+        etag, last_modified = download_validators(content, fmt)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = download_file(content, fmt, render_cache.open(content, fmt))
+        return add_download_headers(response, etag, last_modified)
 
-        title_style = ParagraphStyle(
-            'Title', parent=styles['Heading1'], fontSize=18,
-            alignment=TA_CENTER, spaceAfter=20
-        )
-        body_style = ParagraphStyle(
-            'Body', parent=styles['BodyText'], fontSize=12,
-            leading=14, spaceAfter=12
-        )
-        keyword_style = ParagraphStyle(
-            'Keywords', parent=styles['BodyText'], fontSize=12,
-            textColor='#555555', spaceBefore=20
-        )
 
-        story = []
-        story.append(Paragraph(content.auto_title or 'Summary', title_style))
-        story.append(Spacer(1, 12))
+def download_format(file_format):
+    # Format comes from the URL; anything unknown falls back to plain text
+    fmt = file_format.lower()
+    return fmt if fmt in RENDERERS else 'txt'
 
-        if content.summary:
-            for para in content.summary.split('\n'):
-                story.append(Paragraph(para, body_style))
 
-        if content.keywords:
-            story.append(Spacer(1, 12))
-            story.append(Paragraph(f"<b>Keywords:</b> {content.keywords}", keyword_style))
+def download_validators(content, fmt):
+    """ETag and Last-Modified timestamp of one rendering of a content row"""
+    return quote_etag(f"{content.pk}-{fmt}-{content_version(content)}"), int(content.updated_at.timestamp())
 
-        doc.build(story)
-        buffer.seek(0)
 
-        return FileResponse(
-            buffer,
-            as_attachment=True,
-            filename=f"{filename}.pdf",
-            content_type='application/pdf'
-        )
+def download_file(content, fmt, handle):
+    return FileResponse(
+        handle,
+        as_attachment=True,
+        filename=f"{sanitize_filename(content.auto_title)}.{fmt}",
+        content_type=RENDERERS[fmt][1]
+    )
+
+
+def add_download_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class ContentExportView(APIView):
+    """Stream a ZIP of the user's summaries rendered in one format.
+
+    GET content/export/<format>, optionally with `ids=1,2,3` to export only
+    those items. See app/export.py.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, file_format='pdf'):
+        try:
+            ids = export_ids(request.query_params.get('ids'))
+        except ValueError:
+            return Response({'detail': 'ids must be a comma-separated list of ids.'}, status=status.HTTP_400_BAD_REQUEST)
+        # Nothing to export gives an empty archive
+        queryset = export_queryset(request.user, ids)
+        fmt = download_format(file_format)
+        return export_response(export_archive(iter_rows(queryset), fmt), fmt)
+
+
+def export_ids(value):
+    """Ids of an `ids=1,2,3` query parameter, or None when it is absent"""
+    if value is None:
+        return None
+    return [int(part) for part in value.split(',') if part.strip()]
 
-    def generate_txt(self, content, filename):
-        """Generate a plain .txt file response"""
-        parts = [content.auto_title or 'Summary', '']
-        if content.summary:
-            parts.append(content.summary)
-        if content.keywords:
-            parts.extend(['', f"Keywords: {content.keywords}"])
-
-        text_bytes = '\n'.join(parts).encode('utf-8')
-        return FileResponse(
-            BytesIO(text_bytes),
-            as_attachment=True,
-            filename=f"{filename}.txt",
-            content_type='text/plain'
-        )
+
+def export_response(chunks, fmt):
+    response = StreamingHttpResponse(chunks, content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="summaries-{fmt}.zip"'
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 
 class ContentCreateView(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ContentSerializer
+    pagination_class = ContentCursorPagination
+
+    def get_serializer_class(self):
+        # Listing uses the compact serializer; the full payload is on content/<pk>/
+        if self.request.method == 'GET':
+            return ContentListSerializer
+        return ContentSerializer
 
     def get_queryset(self):
         # Filter content by the authenticated user
-        return Content.objects.filter(user=self.request.user)
+        queryset = Content.objects.filter(user=self.request.user)
+        if self.request.method == 'GET':
+            fields = ContentListSerializer.requested_fields(self.request) or ContentListSerializer.Meta.fields
+            queryset = filter_summary_length(queryset.only(*fields, 'created_at'), self.request.query_params)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        # Reading the body parses the upload; time it on its own
+        with metrics.stage_timer('upload'):
+            request.data
+        # Processing happens in the background; poll the status endpoint for the result
+        response = super().create(request, *args, **kwargs)
+        if response.data['status'] != Content.STATUS_DONE:
+            response.status_code = status.HTTP_202_ACCEPTED
+            response['Location'] = reverse('content-status', kwargs={'pk': response.data['id']})
+        return response
 
     def perform_create(self, serializer):
-        # Save the content with the authenticated user
-        instance = serializer.save(user=self.request.user)
+        save_content(serializer, self.request.user)
+
+
+def summary_length_filter(params):
+    """The valid `summary_length` of a list or search request, or None"""
+    length = params.get('summary_length')
+    return length if length in dict(Content.SUMMARY_LENGTH_CHOICES) else None
+
+
+def filter_summary_length(queryset, params):
+    length = summary_length_filter(params)
+    return queryset if length is None else queryset.filter(summary_length=length)
+
+
+def save_content(serializer, user):
+    """Save validated content and queue it, or finish it at once from the cache"""
+    attach_upload(serializer.validated_data, user)
+    # Pasted text we have summarized before is answered straight from the cache
+    text = serializer.validated_data.get('original_text')
+    if text and not serializer.validated_data.get('original_file'):
+        cached = summary_cache.get(
+            summary_cache_key(text, serializer.validated_data.get('summary_length', 'medium'))
+        )
+        if cached is not None:
+            instance = serializer.save(user=user, status=Content.STATUS_DONE, extracted_text=text)
+            apply_results(instance, cached)
+            instance.save()
+            return instance
+
+    # Save the content with the authenticated user and queue it for processing
+    instance = serializer.save(user=user, status=Content.STATUS_PENDING)
+    enqueue(instance)
+    return instance
+
+
+class ContentBatchView(APIView):
+    """Create many content items in one request and stream their results.
+
+    Takes any number of `files` and `texts` parts (or a JSON `texts` list) plus
+    one `summary_length`. Every valid item becomes a queued job, so extraction
+    runs on the worker threads and model calls stay within
+    LLM_MAX_CONCURRENCY. The response is newline-delimited JSON: one
+    `accepted` or `rejected` line per item in request order, then one line per
+    item as it finishes. Under WSGI the response ends after the items already
+    finished, and the others get a `timeout` line to poll their status_url.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        with metrics.stage_timer('upload'):
+            files = request.FILES.getlist('files')
+        texts = request.data.getlist('texts') if hasattr(request.data, 'getlist') else request.data.get('texts', [])
+        if isinstance(texts, str):
+            texts = [texts]
+        summary_length = request.data.get('summary_length', 'medium')
+
+        items = [(f.name, {'original_file': f}) for f in files]
+        items += [(f"text-{index + 1}", {'original_text': text}) for index, text in enumerate(texts)]
+        if not items:
+            return Response({'detail': 'Provide at least one file or text.'}, status=status.HTTP_400_BAD_REQUEST)
+        max_items = getattr(settings, 'BATCH_MAX_ITEMS', 100)
+        if len(items) > max_items:
+            return Response(
+                {'detail': f'A batch can hold at most {max_items} items.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        lines = []
+        accepted = {}
+        for index, (name, data) in enumerate(items):
+            # Items are validated and saved one by one so a bad one only fails itself
+            serializer = ContentSerializer(data={**data, 'summary_length': summary_length})
+            if not serializer.is_valid():
+                lines.append({'index': index, 'name': name, 'event': 'rejected', 'errors': serializer.errors})
+                continue
+            instance = save_content(serializer, request.user)
+            accepted[instance.pk] = (index, name)
+            lines.append({
+                'index': index,
+                'name': name,
+                'event': 'accepted',
+                'id': instance.pk,
+                'status': instance.status,
+                'status_url': reverse('content-status', kwargs={'pk': instance.pk}),
+            })
+
+        if not accepted:
+            return Response({'detail': 'No valid items in the batch.', 'items': lines}, status=status.HTTP_400_BAD_REQUEST)
+
+        if not settings.ASYNC_VIEWS:
+            # A WSGI worker would be held for the whole batch; report what is known now
+            response = HttpResponse(''.join(self.current_results(lines, accepted)),
+                                    content_type='application/x-ndjson', status=status.HTTP_202_ACCEPTED)
+            response['Cache-Control'] = 'no-cache'
+            return response
+        response = StreamingHttpResponse(
+            self.stream_results(lines, accepted),
+            content_type='application/x-ndjson',
+            status=status.HTTP_202_ACCEPTED
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @staticmethod
+    def finished_rows(remaining):
+        return Content.objects.filter(
+            pk__in=remaining,
+            status__in=(Content.STATUS_DONE, Content.STATUS_FAILED)
+        ).values('id', 'status', 'error', 'auto_title', 'keywords', 'summary')
+
+    @staticmethod
+    def finished_line(accepted, remaining, row):
+        remaining.discard(row['id'])
+        index, name = accepted[row['id']]
+        return json.dumps({'index': index, 'name': name, 'event': 'finished', **row}) + '\n'
+
+    @staticmethod
+    def timeout_lines(accepted, remaining):
+        # Anything still queued keeps going; the client can poll status_url
+        for content_id in sorted(remaining, key=lambda pk: accepted[pk][0]):
+            index, name = accepted[content_id]
+            yield json.dumps({'index': index, 'name': name, 'event': 'timeout', 'id': content_id}) + '\n'
+
+    def current_results(self, lines, accepted):
+        """The item lines, then items finished already, without waiting for the rest"""
+        for line in lines:
+            yield json.dumps(line) + '\n'
+        remaining = set(accepted)
+        for row in list(self.finished_rows(remaining)):
+            yield self.finished_line(accepted, remaining, row)
+        yield from self.timeout_lines(accepted, remaining)
+
+    async def stream_results(self, lines, accepted):
+        """The item lines, then each item as it finishes, polled on the event loop"""
+        for line in lines:
+            yield json.dumps(line) + '\n'
+
+        poll_interval = getattr(settings, 'BATCH_POLL_INTERVAL', 0.5)
+        deadline = time.monotonic() + getattr(settings, 'BATCH_STREAM_TIMEOUT', 600)
+        remaining = set(accepted)
+        while remaining:
+            async for row in self.finished_rows(remaining):
+                yield self.finished_line(accepted, remaining, row)
+            if remaining:
+                if time.monotonic() >= deadline:
+                    break
+                await asyncio.sleep(poll_interval)
+
+        for line in self.timeout_lines(accepted, remaining):
+            yield line
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ContentStreamView(View):
+    """Create content and stream its summary back as Server-Sent Events.
+
+    Accepts the same payload as POST /api/content/. Only served through
+    core.asgi: under WSGI the whole summary would run inside the request and
+    the stream be buffered, so clients are told to use POST /api/content/.
+    """
+
+    async def post(self, request):
+        if not settings.ASYNC_VIEWS:
+            return JsonResponse(
+                {'detail': 'Streaming needs the ASGI application; use POST /api/content/.'},
+                status=status.HTTP_501_NOT_IMPLEMENTED
+            )
+        instance, error = await sync_to_async(self.create_content)(request)
+        if error is not None:
+            return error
+
+        response = StreamingHttpResponse(stream_summary(instance), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def create_content(self, request):
+        # Plain Django view, so authenticate and validate the DRF way by hand
+        user, error = authenticate_jwt(request)
+        if error is not None:
+            return None, error
+        data, error = request_payload(request)
+        if error is not None:
+            return None, error
+
+        serializer = ContentSerializer(data=data)
+        if not serializer.is_valid():
+            return None, JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            attach_upload(serializer.validated_data, user)
+        except ValidationError as e:
+            return None, JsonResponse(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        return serializer.save(user=user, status=Content.STATUS_RUNNING), None
+
+
+def authenticate_jwt(request):
+    """JWT authentication for plain Django views: (user, None) or (None, error response)"""
+    try:
+        authenticated = CachedJWTAuthentication().authenticate(request)
+    except APIException as e:
+        return None, JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+    if authenticated is None:
+        return None, JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+    return authenticated[0], None
+
+
+def request_payload(request):
+    """JSON or form body of a plain Django view: (data, None) or (None, error response)"""
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}'), None
+        except ValueError:
+            return None, JsonResponse({'detail': 'Invalid JSON body.'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        with metrics.stage_timer('upload'):
+            return {**request.POST.dict(), **request.FILES.dict()}, None
+    except APIException as e:
+        # Raised by HashingFileUploadHandler for files over UPLOAD_MAX_BYTES
+        return None, JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+
+
+def content_not_found():
+    return JsonResponse({'detail': 'No Content matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+
+
+async def asave_content(serializer, user):
+    """Async save_content; new jobs run on the event loop"""
+    data = serializer.validated_data
+    await sync_to_async(attach_upload)(data, user)
+    text = data.get('original_text')
+    if text and not data.get('original_file'):
+        cached = await sync_to_async(summary_cache.get)(
+            summary_cache_key(text, data.get('summary_length', 'medium'))
+        )
+        if cached is not None:
+            instance = Content(**data, user=user, status=Content.STATUS_DONE, extracted_text=text)
+            apply_results(instance, cached)
+            await instance.asave()
+            return instance
+
+    instance = await Content.objects.acreate(**data, user=user, status=Content.STATUS_PENDING)
+    await aenqueue(instance)
+    return instance
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncContentListView(View):
+    """Async GET and POST content/, used in place of ContentCreateView under ASGI.
+
+    Same requests and responses. A created item is summarized by a task on
+    the event loop, so waiting on the model holds no thread.
+    """
+
+    async def get(self, request):
+        user, error = await sync_to_async(authenticate_jwt)(request)
+        if error is not None:
+            return error
+
+        drf_request = Request(request)
+        fields = ContentListSerializer.requested_fields(drf_request) or ContentListSerializer.Meta.fields
+        queryset = filter_summary_length(Content.objects.filter(user=user).only(*fields, 'created_at'), request.GET)
+        paginator = ContentCursorPagination()
+        try:
+            # DRF's cursor paginator is synchronous; its single query runs in a thread
+            page = await sync_to_async(paginator.paginate_queryset)(queryset, drf_request)
+        except APIException as e:
+            return JsonResponse({'detail': str(e.detail)}, status=e.status_code)
+        return JsonResponse({
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+            'results': ContentListSerializer(page, many=True, context={'request': drf_request}).data,
+        }, encoder=JSONEncoder)
+
+    async def post(self, request):
+        user, error = await sync_to_async(authenticate_jwt)(request)
+        if error is not None:
+            return error
+        # Parsing a multipart body writes the upload to disk
+        data, error = await sync_to_async(request_payload, thread_sensitive=False)(request)
+        if error is not None:
+            return error
 
-        # Extract text from file if provided
-        if instance.original_file:
-            instance.extracted_text = extract_text(instance.original_file, instance.original_file.name)
+        context = {'request': Request(request)}
+        serializer = ContentSerializer(data=data, context=context)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            instance = await asave_content(serializer, user)
+        except ValidationError as e:
+            return JsonResponse(e.detail, status=status.HTTP_400_BAD_REQUEST)
+
+        response = JsonResponse(
+            ContentSerializer(instance, context=context).data,
+            status=status.HTTP_201_CREATED,
+            encoder=JSONEncoder
+        )
+        if instance.status != Content.STATUS_DONE:
+            response.status_code = status.HTTP_202_ACCEPTED
+            response['Location'] = reverse('content-status', kwargs={'pk': instance.pk})
+        return response
+
+
+class AsyncContentDetailView(View):
+    """Async GET content/<pk>/, used in place of ContentDetailView under ASGI"""
+
+    async def get(self, request, pk):
+        user, error = await sync_to_async(authenticate_jwt)(request)
+        if error is not None:
+            return error
+
+        queryset = Content.objects.filter(user=user, pk=pk)
+        # Look up the version only, so unchanged polls never load the full row
+        updated_at = await queryset.values_list('updated_at', flat=True).afirst()
+        if updated_at is None:
+            return content_not_found()
+        if content_etag(pk, updated_at) in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
         else:
-            instance.extracted_text = instance.original_text
+            instance = await queryset.afirst()
+            if instance is None:
+                return content_not_found()
+            await instance.aload_extracted_text()
+            updated_at = instance.updated_at
+            response = JsonResponse(
+                ContentSerializer(instance, context={'request': Request(request)}).data,
+                encoder=JSONEncoder
+            )
+        response['ETag'] = content_etag(pk, updated_at)
+        response['Last-Modified'] = http_date(updated_at.timestamp())
+        return response
+
+
+class AsyncDownloadContentView(View):
+    """Async GET content/<pk>/download/<format>, used in place of DownloadContentView under ASGI"""
+
+    async def get(self, request, pk, file_format='pdf'):
+        user, error = await sync_to_async(authenticate_jwt)(request)
+        if error is not None:
+            return error
 
-        # Process with Gemini
-        results = process_with_gemini(
-            instance.extracted_text,
-            instance.summary_length
+        content = await (
+            Content.objects.filter(user=user, pk=pk)
+            .only('id', 'updated_at', *RENDERED_FIELDS)
+            .afirst()
         )
+        if content is None:
+            return content_not_found()
+        fmt = download_format(file_format)
 
-        instance.summary = results.get('summary', '')
-        instance.keywords = results.get('keywords', '')
-        instance.auto_title = results.get('title', 'Content Summary')
-        instance.save()
+        etag, last_modified = download_validators(content, fmt)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            # Rendering a PDF or DOCX is CPU-bound; keep it off the event loop
+            handle = await sync_to_async(render_cache.open, thread_sensitive=False)(content, fmt)
+            response = download_file(content, fmt, handle)
+        return add_download_headers(response, etag, last_modified)
 
 
-class ContentDetailView(generics.RetrieveAPIView):
+class AsyncContentExportView(View):
+    """Async GET content/export/<format>, used in place of ContentExportView under ASGI"""
+
+    async def get(self, request, file_format='pdf'):
+        user, error = await sync_to_async(authenticate_jwt)(request)
+        if error is not None:
+            return error
+        try:
+            ids = export_ids(request.GET.get('ids'))
+        except ValueError:
+            return JsonResponse(
+                {'detail': 'ids must be a comma-separated list of ids.'}, status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = export_queryset(user, ids)
+        fmt = download_format(file_format)
+        # Queries and rendering block; each piece of the archive is produced in a thread
+        return export_response(iterate_in_thread(export_archive(iter_rows(queryset), fmt), uses_db=True), fmt)
+
+
+def content_etag(pk, updated_at):
+    return quote_etag(f"{pk}-{updated_at.timestamp()}")
+
+
+class ConditionalRetrieveMixin:
+    """Answer GETs with 304 Not Modified while the row's updated_at is unchanged"""
+
+    def get_etag(self, updated_at):
+        return content_etag(self.kwargs['pk'], updated_at)
+
+    def retrieve(self, request, *args, **kwargs):
+        # Look up the version only, so unchanged polls never load the full row
+        updated_at = (
+            self.get_queryset()
+            .filter(pk=self.kwargs['pk'])
+            .values_list('updated_at', flat=True)
+            .first()
+        )
+        if updated_at is not None and self.get_etag(updated_at) in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            instance = self.get_object()
+            updated_at = instance.updated_at
+            response = Response(self.get_serializer(instance).data)
+        response['ETag'] = self.get_etag(updated_at)
+        response['Last-Modified'] = http_date(updated_at.timestamp())
+        return response
+
+
+class ContentDetailView(ConditionalRetrieveMixin, generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = ContentSerializer
 
@@ -167,9 +574,208 @@ class ContentDetailView(generics.RetrieveAPIView):
         return Content.objects.filter(user=self.request.user)
 
 
+class ContentResummarizeView(generics.GenericAPIView):
+    """Switch a summarized content item to another summary length.
+
+    POST content/<pk>/resummarize/ with `summary_length`. A length the item
+    had before, or one whose summary of the same text is cached, is applied
+    at once (200). Any other is derived in the background from the stored
+    text and summaries (202; poll the status endpoint), without extracting
+    the file again.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ContentSerializer
+
+    def get_queryset(self):
+        return Content.objects.filter(user=self.request.user)
+
+    def post(self, request, pk):
+        content = self.get_object()
+        length = request.data.get('summary_length')
+        if length not in dict(Content.SUMMARY_LENGTH_CHOICES):
+            return Response(
+                {'summary_length': [f'"{length}" is not a valid choice.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # A failed length change leaves the previous summary in place
+        if not content.summary or content.status not in (Content.STATUS_DONE, Content.STATUS_FAILED):
+            return Response({'detail': 'Content has no summary to change yet.'}, status=status.HTTP_409_CONFLICT)
+
+        if resummarize(content, length):
+            return Response(self.get_serializer(content).data)
+        response = Response(self.get_serializer(content).data, status=status.HTTP_202_ACCEPTED)
+        response['Location'] = reverse('content-status', kwargs={'pk': content.pk})
+        return response
+
+
+class UploadListView(APIView):
+    """Start a chunked upload: POST uploads/ with `filename` and `size` in bytes"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        filename = str(request.data.get('filename', '')).strip()
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            size = -1
+        errors = {}
+        if not filename or len(filename) > 255:
+            errors['filename'] = ['Enter the file name, at most 255 characters.']
+        if size < 0:
+            errors['size'] = ['Enter the size of the file in bytes.']
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = start_upload(request.user, filename, size)
+        response = Response(upload_state(upload), status=status.HTTP_201_CREATED)
+        response['Location'] = reverse('upload-detail', kwargs={'pk': upload.pk})
+        response['Upload-Offset'] = upload.offset
+        return response
+
+
+class UploadDetailView(APIView):
+    """Resume (GET), continue (PATCH with the raw chunk as body) or abort (DELETE) a chunked upload"""
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self):
+        upload = ChunkedUpload.objects.filter(pk=self.kwargs['pk'], user=self.request.user).first()
+        if upload is None:
+            raise Http404
+        return upload
+
+    def get(self, request, pk):
+        upload = self.get_upload()
+        response = Response(upload_state(upload))
+        response['Upload-Offset'] = upload.offset
+        return response
+
+    def patch(self, request, pk):
+        upload = self.get_upload()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return Response({'detail': 'Send the Upload-Offset header.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            length = int(request.META['CONTENT_LENGTH'])
+        except (KeyError, ValueError):
+            return Response({'detail': 'Send the Content-Length header.'}, status=status.HTTP_411_LENGTH_REQUIRED)
+
+        try:
+            # The body is read here, a piece at a time, never through request.data
+            write_chunk(upload, offset, request.stream, length)
+        except UploadConflict as e:
+            response = Response({'detail': str(e.detail), 'offset': e.offset}, status=e.status_code)
+            response['Upload-Offset'] = e.offset
+            return response
+        response = Response(upload_state(upload))
+        response['Upload-Offset'] = upload.offset
+        return response
+
+    def delete(self, request, pk):
+        discard_upload(self.get_upload())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def upload_state(upload):
+    return {
+        'id': upload.pk,
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'complete': upload.complete,
+        'sha256': upload.sha256 or None,
+    }
+
+
+class ContentSearchView(generics.GenericAPIView):
+    """Ranked full-text search over the user's titles, keywords and summaries.
+
+    GET content/search/?q=<words>&page=<n>&page_size=<n>; `fields` narrows
+    each hit like on the list endpoint, and `summary_length` keeps hits of
+    one length.
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = ContentListSerializer
+    pagination_class = SearchPagination
+
+    def get(self, request):
+        results = search(request.user.pk, request.query_params.get('q', ''), summary_length_filter(request.query_params))
+        if results is None:
+            return Response({'q': ["Enter at least one word to search for."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        with metrics.stage_timer('search'):
+            hits = self.paginate_queryset(results)
+            fields = ContentListSerializer.requested_fields(request) or ContentListSerializer.Meta.fields
+            contents = Content.objects.filter(user=request.user).only(*fields).in_bulk([hit['id'] for hit in hits])
+        hits = [hit for hit in hits if hit['id'] in contents]
+        items = self.get_serializer([contents[hit['id']] for hit in hits], many=True).data
+        for item, hit in zip(items, hits):
+            item['score'] = hit['score']
+            item['highlights'] = hit['highlights']
+        return self.get_paginated_response(items)
+
+
+class ContentStatusView(ConditionalRetrieveMixin, generics.RetrieveAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = ContentStatusSerializer
+
+    def get_queryset(self):
+        return Content.objects.filter(user=self.request.user).only('id', 'status', 'error', 'updated_at')
+
+
+class CacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(summary_cache.stats())
+
+
+def runtime_gauges():
+    """Values read from other components at scrape time for the metrics endpoint"""
+    cache = summary_cache.stats()
+    guard = get_guard().snapshot()
+    yield 'summarizer_summary_cache_hits_total', 'counter', 'Summary cache hits', cache['memory_hits'] + cache['db_hits']
+    yield 'summarizer_summary_cache_misses_total', 'counter', 'Summary cache misses', cache['misses']
+    yield 'summarizer_llm_concurrency_limit', 'gauge', 'Current adaptive limit on model calls in flight', guard['concurrency_limit']
+    yield 'summarizer_llm_in_flight', 'gauge', 'Model calls in flight', guard['in_flight']
+    yield 'summarizer_llm_retries_total', 'counter', 'Model call retries', guard['retries']
+    yield 'summarizer_llm_circuit_open', 'gauge', '1 while the model circuit breaker is open', int(guard['circuit'] != 'closed')
+    users = user_cache.stats()
+    yield 'summarizer_user_cache_hits_total', 'counter', 'Authenticated requests served from the user cache', users['hits']
+    yield 'summarizer_user_cache_misses_total', 'counter', 'Authenticated requests that loaded the user', users['misses']
+    yield 'summarizer_jobs_pending', 'gauge', 'Summary jobs waiting in the queue', SummaryJob.objects.filter(status=Content.STATUS_PENDING).count()
+
+
+class MetricsView(View):
+    """Prometheus scrape endpoint. When METRICS_TOKEN is set it must be sent as a bearer
+    token; otherwise only staff users can read it."""
+
+    def get(self, request):
+        if not metrics.state.enabled:
+            raise Http404
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        if token:
+            if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+                return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+        else:
+            user, error = authenticate_jwt(request)
+            if error:
+                return error
+            if not user.is_staff:
+                return JsonResponse(
+                    {'detail': 'You do not have permission to perform this action.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+        return HttpResponse(
+            render_prometheus(runtime_gauges()),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
 class CurrentUserView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        serializer = GetUser(request.user)
-        return Response(serializer.data)
+        # Serialized once per cache entry of the user, so it follows their changes
+        data = user_cache.memoize(request.user, 'profile', lambda user: dict(GetUser(user).data))
+        return Response(data)
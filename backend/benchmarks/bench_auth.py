@@ -0,0 +1,88 @@
+"""Queries and latency of authenticated API requests with and without the user cache.
+
+    python -m benchmarks.bench_auth [--rows 200] [--repeat 200]
+
+Requests go through the test client with a real access token, against a
+throwaway database holding `rows` documents of one user. `uncached` clears
+user_cache before every request, which leaves the query pattern of plain
+JWTAuthentication (one auth_user lookup per request); `cached` runs with the
+cache warm, as repeated requests within AUTH_USER_CACHE['TTL'] do.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from .common import print_table, sample_text, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200, help='documents of the user')
+    parser.add_argument('--repeat', type=int, default=200, help='timed requests per endpoint and mode')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.db import connection, connections
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import CaptureQueriesContext, setup_test_environment
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+    from app.authentication import user_cache
+    from app.models import Content
+
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-auth-'))
+    connections['default'].settings_dict['TEST']['NAME'] = str(scratch / 'auth.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        user = User.objects.create_user('bench', email='bench@example.com', password='bench')
+        Content.objects.bulk_create([
+            Content(user=user, original_text=sample_text(200, seed=i), status=Content.STATUS_DONE,
+                    summary=sample_text(40, seed=i), auto_title=f'Document {i}')
+            for i in range(args.rows)
+        ])
+        pk = Content.objects.filter(user=user).values_list('pk', flat=True).last()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        endpoints = {
+            'GET /api/user/': '/api/user/',
+            'GET /api/content/': '/api/content/',
+            'GET /api/content/<pk>/': f'/api/content/{pk}/',
+            'GET /api/content/<pk>/status/': f'/api/content/{pk}/status/',
+        }
+
+        def measure(path, cached):
+            samples, queries = [], []
+            for _ in range(args.repeat):
+                if not cached:
+                    user_cache.clear()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = client.get(path)
+                    samples.append((time.perf_counter() - started) * 1000)
+                assert response.status_code == 200, response.status_code
+                queries.append(len(captured))
+            return statistics.median(queries), statistics.median(samples)
+
+        rows = []
+        for label, path in endpoints.items():
+            client.get(path)
+            uncached_queries, uncached_ms = measure(path, cached=False)
+            cached_queries, cached_ms = measure(path, cached=True)
+            rows.append([label, f'{uncached_queries:.0f}', f'{cached_queries:.0f}',
+                         f'{uncached_ms:.2f}', f'{cached_ms:.2f}'])
+        print_table(['endpoint', 'queries uncached', 'queries cached', 'uncached p50 ms', 'cached p50 ms'], rows)
+    finally:
+        runner.teardown_databases(databases)
+        for path in scratch.iterdir():
+            path.unlink()
+        os.rmdir(scratch)
+
+
+if __name__ == '__main__':
+    main()
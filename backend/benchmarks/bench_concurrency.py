@@ -0,0 +1,246 @@
+"""Concurrent summarizations served by one ASGI process and by the WSGI deployment.
+
+    python -m benchmarks.bench_concurrency [--clients 50 200 500] [--latency 0.5]
+                                           [--worker-threads 4 64]
+
+Each server runs as one process on a throwaway database with FakeBackend,
+whose calls take `latency` seconds, and a model concurrency limit high enough
+that the provider is never the bottleneck:
+
+  asgi                uvicorn core.asgi, so the content views are async and
+                      summaries run as tasks on its event loop
+  wsgi (N threads)    gunicorn core.wsgi with one gthread worker of 32 request
+                      threads and SUMMARY_WORKER_THREADS=N
+
+For every client count, that many clients POST /api/content/ at once with
+distinct texts. Completion is read from the database rather than by polling
+the status endpoint, so the servers only handle the creates; `done` is the
+time from a row's creation to its last save. Threads and RSS are sampled from
+the server's process tree while the summaries run. Needs uvicorn and gunicorn.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .common import BACKEND_DIR, print_table, setup_django, sample_text
+
+SETTINGS = """\
+from core.settings import *
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1']
+DATABASES['default']['NAME'] = {database!r}
+LLM_BACKEND = {{'BACKEND': 'app.llm.FakeBackend', 'OPTIONS': {{'latency': {latency}}}}}
+LLM_MAX_CONCURRENCY = 2000
+SUMMARY_WORKER_THREADS = {worker_threads}
+METRICS_ENABLED = False
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_tree(pid):
+    """pid and the pids of all its descendants (Linux /proc)"""
+    pids = [pid]
+    for current in pids:
+        for task in Path(f'/proc/{current}/task').glob('*/children'):
+            pids.extend(int(child) for child in task.read_text().split())
+    return pids
+
+
+def threads_and_rss(pid):
+    """Total threads and resident MB of a process tree"""
+    threads = rss = 0
+    for current in process_tree(pid):
+        try:
+            status = Path(f'/proc/{current}/status').read_text()
+        except OSError:
+            continue
+        for line in status.splitlines():
+            if line.startswith('Threads:'):
+                threads += int(line.split()[1])
+            elif line.startswith('VmRSS:'):
+                rss += int(line.split()[1]) / 1024
+    return threads, rss
+
+
+async def post_json(port, path, token, payload):
+    """POST a JSON body over a fresh connection; return the status and parsed body"""
+    body = json.dumps(payload).encode()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAuthorization: Bearer {token}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    if b'transfer-encoding: chunked' in head.lower():
+        content = b''.join(content.split(b'\r\n')[1::2])
+    return status, json.loads(content or b'null')
+
+
+async def create_all(port, token, texts):
+    """Send every create at once; return (content ids, per-request ms, failures)"""
+    async def create(text):
+        started = time.perf_counter()
+        try:
+            status, data = await post_json(port, '/api/content/', token, {'original_text': text, 'summary_length': 'short'})
+        except (OSError, ValueError):
+            status, data = 0, None
+        return status, data, (time.perf_counter() - started) * 1000
+
+    results = await asyncio.gather(*(create(text) for text in texts))
+    ids = [data['id'] for status, data, _ in results if status in (201, 202)]
+    return ids, [ms for *_, ms in results], len(texts) - len(ids)
+
+
+def start_server(kind, port, env):
+    if kind == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'core.asgi:application', '--port', str(port),
+                   '--log-level', 'warning', '--no-access-log', '--backlog', '4096']
+    else:
+        command = [sys.executable, '-m', 'gunicorn', 'core.wsgi:application', '--bind', f'127.0.0.1:{port}',
+                   '--worker-class', 'gthread', '--workers', '1', '--threads', '32',
+                   '--backlog', '4096', '--log-level', 'warning']
+    server = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, start_new_session=True)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    stop_server(server)
+    raise RuntimeError(f"{kind} server did not start")
+
+
+def stop_server(server):
+    os.killpg(server.pid, signal.SIGTERM)
+    try:
+        server.wait(10)
+    except subprocess.TimeoutExpired:
+        os.killpg(server.pid, signal.SIGKILL)
+        server.wait()
+
+
+def wait_finished(server, ids, timeout):
+    """Wait for the rows to finish; return the peak threads and RSS seen meanwhile"""
+    from app.models import Content
+
+    peak_threads, peak_rss = threads_and_rss(server.pid)
+    pending = set(ids)
+    deadline = time.monotonic() + timeout
+    while pending and time.monotonic() < deadline:
+        threads, rss = threads_and_rss(server.pid)
+        peak_threads, peak_rss = max(peak_threads, threads), max(peak_rss, rss)
+        finished = Content.objects.filter(
+            pk__in=pending, status__in=(Content.STATUS_DONE, Content.STATUS_FAILED)
+        ).values_list('pk', flat=True)
+        pending.difference_update(finished)
+        time.sleep(0.1)
+    return peak_threads, peak_rss
+
+
+def run_load(server, port, token, clients, run, timeout):
+    """One burst of `clients` creates; returns the table cells"""
+    from app.models import Content
+
+    # Load the views, the model backend and the worker pool before timing
+    warm_up, _, _ = asyncio.run(create_all(port, token, [f"Run {run} warm-up. " + sample_text(50)]))
+    wait_finished(server, warm_up, timeout)
+
+    texts = [f"Run {run}, document {i}. " + sample_text(300, seed=i) for i in range(clients)]
+    started = time.perf_counter()
+    ids, create_ms, failed = asyncio.run(create_all(port, token, texts))
+    peak_threads, peak_rss = wait_finished(server, ids, timeout)
+    wall = time.perf_counter() - started
+
+    rows = Content.objects.filter(pk__in=ids).values_list('status', 'created_at', 'updated_at')
+    done = sorted((updated - created).total_seconds() for status, created, updated in rows if status == Content.STATUS_DONE)
+    failed += sum(status != Content.STATUS_DONE for status, _, _ in rows)
+    create_ms.sort()
+    return [
+        clients,
+        f'{statistics.median(create_ms):.0f}', f'{create_ms[int(len(create_ms) * 0.95) - 1]:.0f}',
+        f'{statistics.median(done):.2f}' if done else '-',
+        f'{done[int(len(done) * 0.95) - 1]:.2f}' if done else '-',
+        f'{len(done) / wall:.1f}', failed, peak_threads, f'{peak_rss:.0f}',
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, nargs='+', default=[50, 200, 500])
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds per FakeBackend call')
+    parser.add_argument('--worker-threads', type=int, nargs='*', default=[4, 64],
+                        help='SUMMARY_WORKER_THREADS of the WSGI runs (none to skip WSGI)')
+    parser.add_argument('--timeout', type=float, default=300, help='seconds to wait for one burst')
+    args = parser.parse_args()
+    for module in ('uvicorn', 'gunicorn'):
+        if importlib.util.find_spec(module) is None:
+            sys.exit(f"{module} is not installed")
+
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-concurrency-'))
+    database = scratch / 'concurrency.sqlite3'
+    configs = [('asgi', 'asgi', 4)] + [('wsgi', f'wsgi ({n} threads)', n) for n in args.worker_threads]
+    for kind, _, threads in configs:
+        (scratch / f'bench_settings_{kind}_{threads}.py').write_text(
+            SETTINGS.format(database=str(database), latency=args.latency, worker_threads=threads)
+        )
+    sys.path.insert(0, str(scratch))
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'bench_settings_asgi_4'
+    os.environ.pop('DJANGO_ASYNC_VIEWS', None)
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    try:
+        call_command('migrate', verbosity=0)
+        user = User.objects.create_user('bench', password='bench')
+        table = []
+        run = 0
+        for kind, label, threads in configs:
+            env = {**os.environ, 'DJANGO_SETTINGS_MODULE': f'bench_settings_{kind}_{threads}',
+                   'PYTHONPATH': os.pathsep.join([str(scratch), str(BACKEND_DIR)])}
+            for clients in args.clients:
+                # A fresh process and token per burst, so no run inherits another's backlog
+                token = str(AccessToken.for_user(user))
+                port = free_port()
+                server = start_server(kind, port, env)
+                try:
+                    run += 1
+                    table.append([label] + run_load(server, port, token, clients, run, args.timeout))
+                finally:
+                    stop_server(server)
+        print(f"FakeBackend latency {args.latency}s per call, two calls per summary")
+        print_table(
+            ['server', 'clients', 'create p50 ms', 'create p95 ms', 'done p50 s', 'done p95 s',
+             'summaries/s', 'failed', 'peak threads', 'peak RSS MB'],
+            table,
+        )
+    finally:
+        shutil.rmtree(scratch)
+
+
+if __name__ == '__main__':
+    main()
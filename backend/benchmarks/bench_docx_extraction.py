@@ -0,0 +1,73 @@
+"""Compare the python-docx DOM path with the streaming DOCX extractor.
+
+    python -m benchmarks.bench_docx_extraction [--paragraphs 1000 10000 50000]
+
+Each measurement runs in a fresh subprocess so peak RSS is per run.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from .common import BACKEND_DIR, make_docx, print_table, setup_django
+
+MODES = ('python-docx', 'streaming', 'capped')
+
+
+def measure(mode, path):
+    import os
+    import time
+    setup_django()
+    from docx import Document
+    from app.extraction import collect_text, iter_docx_blocks
+    from .common import peak_rss_mb
+
+    started = time.perf_counter()
+    if mode == 'python-docx':
+        # The original implementation: body paragraphs only, no tables
+        document = Document(path)
+        text = "\n".join([para.text for para in document.paragraphs])
+    elif mode == 'streaming':
+        with open(path, 'rb') as file:
+            text = collect_text(iter_docx_blocks(file), "\n", max_chars=0)
+    else:
+        # What extract_text does: stop at EXTRACT_MAX_CHARS
+        with open(path, 'rb') as file:
+            text = collect_text(iter_docx_blocks(file), "\n")
+    elapsed = time.perf_counter() - started
+    return {
+        'seconds': elapsed,
+        'mb_per_second': os.path.getsize(path) / 1024 / 1024 / elapsed,
+        'chars': len(text),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--paragraphs', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--measure', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(*args.measure)))
+        return
+
+    rows = []
+    for paragraphs in args.paragraphs:
+        path = make_docx(paragraphs)
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_docx_extraction', '--measure', mode, str(path)],
+                cwd=BACKEND_DIR, check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rows.append([
+                paragraphs, mode, f"{result['seconds']:.2f}", f"{result['mb_per_second']:.1f}",
+                result['chars'], f"{result['peak_rss_mb']:.0f}",
+            ])
+    print_table(['paragraphs', 'mode', 'seconds', 'MB/s', 'chars', 'peak RSS MB'], rows)
+
+
+if __name__ == '__main__':
+    main()
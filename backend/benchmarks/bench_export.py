@@ -0,0 +1,138 @@
+"""Bulk export of summaries: one download per item against a streamed ZIP.
+
+    python -m benchmarks.bench_export [--items 100 1000] [--workers 1 4]
+                                      [--format pdf]
+
+Each run creates `items` summarized rows of about 250 words and renders all of
+them with a cold render cache:
+
+  one download each   GET content/<pk>/download/<format> for every row, as a
+                      client had to before
+  ZIP in memory       every rendering written into a ZIP held in a BytesIO,
+                      the obvious way to build an archive
+  streamed, N         GET content/export/<format> with EXPORT_WORKERS = N,
+                      reading the response and dropping each piece
+
+Seconds are measured without tracing; peak MB is the tracemalloc peak of a
+second pass. It counts this process only, not the rendering processes, whose
+own memory holds a few renderings at a time. The pool is started before the
+timed pass.
+"""
+import argparse
+import io
+import shutil
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+from .common import print_table, sample_text, setup_django
+
+MB = 1024 * 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--format', default='pdf', choices=['pdf', 'docx', 'txt'])
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.db import connections
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings, setup_test_environment
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+    from app import export
+    from app.models import Content
+    from app.rendering import RENDERED_FIELDS, render_cache, render_fields
+
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-export-'))
+    connections['default'].settings_dict['TEST']['NAME'] = str(scratch / 'export.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    fmt = args.format
+    rows = []
+    try:
+        # The cache is created at import; point it at the scratch directory
+        render_cache.directory = scratch / 'render_cache'
+        user = User.objects.create_user('bench', password='bench')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        created = 0
+
+        def measure(step):
+            """(result, seconds, peak MB) of step(), timed and traced in separate passes"""
+            render_cache.clear()
+            started = time.perf_counter()
+            result = step()
+            seconds = time.perf_counter() - started
+            render_cache.clear()
+            tracemalloc.start()
+            try:
+                step()
+                peak = tracemalloc.get_traced_memory()[1] / MB
+            finally:
+                tracemalloc.stop()
+            return result, seconds, peak
+
+        for items in args.items:
+            Content.objects.bulk_create(
+                Content(user=user, status=Content.STATUS_DONE, auto_title=f'Quarterly review {index}',
+                        summary=sample_text(250, seed=index), keywords='revenue, margins, hiring')
+                for index in range(created, items)
+            )
+            created = max(created, items)
+            queryset = Content.objects.filter(user=user).order_by('pk')[:items]
+            ids = ','.join(str(pk) for pk in queryset.values_list('pk', flat=True))
+
+            def one_each():
+                total = 0
+                for pk in queryset.values_list('pk', flat=True):
+                    total += len(b''.join(client.get(f'/api/content/{pk}/download/{fmt}').streaming_content))
+                return total
+
+            def in_memory():
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, 'w') as archive:
+                    for content in queryset.only('id', *RENDERED_FIELDS):
+                        data, _ = render_fields(fmt, {field: getattr(content, field) for field in RENDERED_FIELDS})
+                        archive.writestr(export.entry_name(content, fmt), data)
+                return buffer.tell()
+
+            def streamed():
+                response = client.get(f'/api/content/export/{fmt}', {'ids': ids})
+                return sum(len(piece) for piece in response.streaming_content)
+
+            for label, step in (('one download each', one_each), ('ZIP in memory', in_memory)):
+                size, seconds, peak = measure(step)
+                rows.append([items, label, f'{seconds:.2f}', f'{items / seconds:.0f}', f'{peak:.1f}', f'{size / MB:.1f}'])
+
+            for workers in args.workers:
+                with override_settings(EXPORT_WORKERS=workers):
+                    if export._export_pool is not None:
+                        export._export_pool.shutdown()
+                        export._export_pool = None
+                    if workers > 1 and fmt not in export.INLINE_FORMATS:
+                        # Start the processes and import the renderers before timing
+                        list(export.get_export_pool().map(render_fields, [fmt] * workers,
+                                                          [dict.fromkeys(RENDERED_FIELDS, '')] * workers))
+                    size, seconds, peak = measure(streamed)
+                rows.append([items, f'streamed, {workers}', f'{seconds:.2f}', f'{items / seconds:.0f}',
+                             f'{peak:.1f}', f'{size / MB:.1f}'])
+        if export._export_pool is not None:
+            export._export_pool.shutdown()
+            export._export_pool = None
+    finally:
+        runner.teardown_databases(databases)
+        shutil.rmtree(scratch)
+    print(f"{fmt.upper()} renderings of ~250-word summaries, cold render cache")
+    print_table(['items', 'method', 'seconds', 'items/s', 'peak MB', 'output MB'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Extractive pre-compression: speed, coverage and the model work it saves.
+
+    python -m benchmarks.bench_extractive [--chars 20000 100000 500000]
+                                          [--latency 0.3]
+
+Documents are made of SECTIONS parts on different topics: each sentence
+mixes common Zipf-distributed words with words of its own section's topic.
+For every size and summary length the extract is compared with the first
+MAX_PROMPT_CHARS characters, all a prompt held before long documents were
+reduced:
+
+  sections      sections with at least one sentence in the text
+  topic words   share of all the sections' topic words that appear in it
+
+Then process_with_gemini summarizes one document of each size with FakeBackend
+(`latency` seconds per call), a cold summary cache and the two-call path
+(SUMMARY_SINGLE_CALL = False), in three setups: no extractive stage (the
+model condenses long documents section by section), the extract in the
+analysis prompt only, and in both prompts (EXTRACTIVE_SUMMARY_PROMPT).
+"""
+import argparse
+import os
+import re
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from .bench_search import vocabulary
+from .common import print_table, setup_django
+
+SECTIONS = 10
+TOPIC_WORDS = 60
+
+
+def make_document(chars, seed=0):
+    """(text, topic vocabulary of each section)"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    words = np.array(vocabulary(3000 + SECTIONS * TOPIC_WORDS))
+    common = words[:3000]
+    probabilities = 1 / np.arange(1, len(common) + 1)
+    probabilities /= probabilities.sum()
+    topics = [words[3000 + i * TOPIC_WORDS:3000 + (i + 1) * TOPIC_WORDS] for i in range(SECTIONS)]
+
+    sections = []
+    for topic in topics:
+        sentences, size = [], 0
+        while size < chars // SECTIONS:
+            picked = list(rng.choice(common, rng.integers(8, 20), p=probabilities))
+            picked += list(rng.choice(topic, rng.integers(1, 5)))
+            rng.shuffle(picked)
+            sentence = ' '.join(picked).capitalize() + '.'
+            sentences.append(sentence)
+            size += len(sentence) + 1
+        sections.append(' '.join(sentences))
+    return '\n\n'.join(sections), [set(topic) for topic in topics]
+
+
+def coverage(text, topics):
+    present = set(re.findall(r'\w+', text.lower()))
+    sections = sum(bool(topic & present) for topic in topics)
+    words = sum(len(topic & present) for topic in topics) / sum(len(topic) for topic in topics)
+    return sections, words
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chars', type=int, nargs='+', default=[20_000, 100_000, 500_000])
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds per FakeBackend call')
+    parser.add_argument('--repeat', type=int, default=5, help='timed extractions per case')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connections
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings, setup_test_environment
+    from app import metrics
+    from app.extractive import select_sentences
+    from app.llm import get_backend, reset_backend
+    from app.utils import MAX_PROMPT_CHARS, extract_budget, process_with_gemini, summary_cache
+
+    rows = []
+    documents = {chars: make_document(chars, seed=chars) for chars in args.chars}
+    for chars, (text, topics) in documents.items():
+        sections, words = coverage(text[:MAX_PROMPT_CHARS], topics)
+        rows.append([f'{len(text):,}', 'first 15,000 chars', '', f'{min(len(text), MAX_PROMPT_CHARS) // 4:,}',
+                     f'{sections}/{SECTIONS}', f'{words:.0%}'])
+        for length in ('short', 'medium', 'long'):
+            budget = extract_budget(text, length)
+            if budget is None:
+                continue
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                extract = select_sentences(text, budget)
+                samples.append((time.perf_counter() - started) * 1000)
+            sections, words = coverage(extract, topics)
+            rows.append([f'{len(text):,}', f'extract, {length}', f'{statistics.median(samples):.0f}',
+                         f'{metrics.estimate_tokens(extract):,}', f'{sections}/{SECTIONS}', f'{words:.0%}'])
+    print_table(['document chars', 'prompt text', 'extract ms', 'tokens', 'sections', 'topic words'], rows)
+    print()
+
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-extractive-'))
+    connections['default'].settings_dict['TEST']['NAME'] = str(scratch / 'extractive.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    setups = {
+        'no extractive stage': {'EXTRACTIVE_TOKEN_BUDGETS': {}},
+        'extract for analysis': {},
+        'extract for both': {'EXTRACTIVE_SUMMARY_PROMPT': True},
+    }
+    rows = []
+    try:
+        backend = {'BACKEND': 'app.llm.FakeBackend', 'OPTIONS': {'latency': args.latency}}
+        with override_settings(LLM_BACKEND=backend, METRICS_ENABLED=True, SUMMARY_SINGLE_CALL=False):
+            for chars, (text, _) in documents.items():
+                for label, overrides in setups.items():
+                    with override_settings(**{**overrides}):
+                        reset_backend()
+                        summary_cache.clear()
+                        calls = get_backend().stats['calls']
+                        tokens = metrics.llm_tokens.value('prompt')
+                        started = time.perf_counter()
+                        results = process_with_gemini(text, 'medium')
+                        seconds = time.perf_counter() - started
+                        assert 'error' not in results, results
+                        rows.append([f'{len(text):,}', label, get_backend().stats['calls'] - calls,
+                                     f"{metrics.llm_tokens.value('prompt') - tokens:,}", f'{seconds:.2f}'])
+        reset_backend()
+    finally:
+        runner.teardown_databases(databases)
+        for path in scratch.iterdir():
+            path.unlink()
+        os.rmdir(scratch)
+    print(f"process_with_gemini, summary length medium, FakeBackend latency {args.latency}s, "
+          f"budgets {settings.EXTRACTIVE_TOKEN_BUDGETS}")
+    print_table(['document chars', 'setup', 'model calls', 'prompt tokens', 'seconds'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Compare the original substring-scan detect_language with the n-gram identifier.
+
+    python -m benchmarks.bench_language [--prefixes 20 50 0] [--batch 256]
+
+Accuracy is measured on held-out sentences that are not part of the profile
+corpus (app/data/langid_corpus), in full and cut to short prefixes. Throughput
+is measured for one text per call and for batches through identify_languages.
+"""
+import argparse
+import re
+import time
+
+from .common import print_table, setup_django
+
+EVAL_SENTENCES = {
+    'en': [
+        "The hospital hired forty new nurses after the winter, but the waiting lists are still long.",
+        "If you cannot attend the meeting, please send your comments to the secretary by Friday.",
+        "Our new software helps farmers track the weather and plan when to harvest their crops.",
+        "He never expected that a small bakery in his village would become famous across the country.",
+        "Prices for fresh vegetables rose sharply this spring because of the long drought.",
+        "Students may borrow up to ten books at a time and return them at any branch.",
+    ],
+    'es': [
+        "El hospital contrató a cuarenta enfermeras nuevas después del invierno, pero las listas de espera siguen siendo largas.",
+        "Si no puede asistir a la reunión, envíe sus comentarios a la secretaria antes del viernes.",
+        "Nuestro nuevo programa ayuda a los agricultores a seguir el clima y planificar la cosecha.",
+        "Nunca esperó que una pequeña panadería de su pueblo llegara a ser famosa en todo el país.",
+        "Los precios de las verduras frescas subieron mucho esta primavera por la larga sequía.",
+        "Los estudiantes pueden pedir prestados hasta diez libros a la vez y devolverlos en cualquier sucursal.",
+    ],
+    'fr': [
+        "L'hôpital a embauché quarante nouvelles infirmières après l'hiver, mais les listes d'attente restent longues.",
+        "Si vous ne pouvez pas assister à la réunion, envoyez vos commentaires à la secrétaire avant vendredi.",
+        "Notre nouveau logiciel aide les agriculteurs à suivre la météo et à planifier la récolte.",
+        "Il ne s'attendait jamais à ce qu'une petite boulangerie de son village devienne célèbre dans tout le pays.",
+        "Les prix des légumes frais ont fortement augmenté ce printemps à cause de la longue sécheresse.",
+        "Les étudiants peuvent emprunter jusqu'à dix livres à la fois et les rendre dans n'importe quelle agence.",
+    ],
+    'de': [
+        "Das Krankenhaus hat nach dem Winter vierzig neue Pflegekräfte eingestellt, aber die Wartelisten sind immer noch lang.",
+        "Wenn Sie nicht an der Sitzung teilnehmen können, schicken Sie Ihre Anmerkungen bitte bis Freitag an die Sekretärin.",
+        "Unsere neue Software hilft Landwirten, das Wetter zu verfolgen und die Ernte zu planen.",
+        "Er hätte nie gedacht, dass eine kleine Bäckerei in seinem Dorf im ganzen Land berühmt werden würde.",
+        "Die Preise für frisches Gemüse sind in diesem Frühjahr wegen der langen Dürre stark gestiegen.",
+        "Studierende können bis zu zehn Bücher gleichzeitig ausleihen und in jeder Filiale zurückgeben.",
+    ],
+    'it': [
+        "L'ospedale ha assunto quaranta nuove infermiere dopo l'inverno, ma le liste d'attesa sono ancora lunghe.",
+        "Se non potete partecipare alla riunione, inviate i vostri commenti alla segretaria entro venerdì.",
+        "Il nostro nuovo programma aiuta gli agricoltori a seguire il tempo e a pianificare il raccolto.",
+        "Non si sarebbe mai aspettato che un piccolo forno del suo paese diventasse famoso in tutta Italia.",
+        "I prezzi della verdura fresca sono aumentati molto questa primavera a causa della lunga siccità.",
+        "Gli studenti possono prendere in prestito fino a dieci libri alla volta e restituirli in qualsiasi sede.",
+    ],
+    'pt': [
+        "O hospital contratou quarenta novas enfermeiras depois do inverno, mas as listas de espera continuam longas.",
+        "Se não puder comparecer à reunião, envie os seus comentários à secretária até sexta-feira.",
+        "O nosso novo programa ajuda os agricultores a acompanhar o tempo e a planear a colheita.",
+        "Ele nunca imaginou que uma pequena padaria da sua aldeia ficasse famosa em todo o país.",
+        "Os preços dos legumes frescos subiram muito nesta primavera por causa da longa seca.",
+        "Os estudantes podem pedir emprestados até dez livros de cada vez e devolvê-los em qualquer balcão.",
+    ],
+    'nl': [
+        "Het ziekenhuis heeft na de winter veertig nieuwe verpleegkundigen aangenomen, maar de wachtlijsten zijn nog steeds lang.",
+        "Als u de vergadering niet kunt bijwonen, stuur uw opmerkingen dan voor vrijdag naar de secretaris.",
+        "Onze nieuwe software helpt boeren het weer te volgen en de oogst te plannen.",
+        "Hij had nooit verwacht dat een kleine bakkerij in zijn dorp in het hele land beroemd zou worden.",
+        "De prijzen van verse groenten zijn dit voorjaar sterk gestegen door de lange droogte.",
+        "Studenten mogen tot tien boeken tegelijk lenen en ze bij elke vestiging terugbrengen.",
+    ],
+    'ru': [
+        "После зимы больница наняла сорок новых медсестёр, но очереди всё ещё длинные.",
+        "Если вы не можете прийти на собрание, отправьте свои замечания секретарю до пятницы.",
+        "Цены на свежие овощи этой весной сильно выросли из-за долгой засухи.",
+    ],
+    'zh': [
+        "冬天过后，医院招聘了四十名新护士，但候诊名单仍然很长。",
+        "如果您不能参加会议，请在星期五之前把意见发给秘书。",
+        "由于长期干旱，今年春天新鲜蔬菜的价格大幅上涨。",
+    ],
+    'ja': [
+        "冬の後、病院は四十人の新しい看護師を採用しましたが、待ち時間はまだ長いです。",
+        "会議に出席できない場合は、金曜日までに秘書にコメントを送ってください。",
+        "長い干ばつのため、この春は新鮮な野菜の値段が大きく上がりました。",
+    ],
+    'ko': [
+        "겨울이 지난 후 병원은 새 간호사 사십 명을 채용했지만 대기 명단은 여전히 깁니다.",
+        "회의에 참석할 수 없으면 금요일까지 비서에게 의견을 보내 주십시오.",
+        "오랜 가뭄 때문에 올봄 신선한 채소 가격이 크게 올랐습니다.",
+    ],
+    'ar': [
+        "بعد الشتاء وظف المستشفى أربعين ممرضة جديدة، لكن قوائم الانتظار لا تزال طويلة.",
+        "إذا لم تتمكن من حضور الاجتماع، يرجى إرسال ملاحظاتك إلى السكرتيرة قبل يوم الجمعة.",
+        "ارتفعت أسعار الخضروات الطازجة بشكل كبير هذا الربيع بسبب الجفاف الطويل.",
+    ],
+}
+
+
+def legacy_detect_language(text_sample):
+    """The original implementation: script checks, then the first common word found"""
+    if not text_sample.strip():
+        return "en"
+    sample = text_sample[:500]
+    if re.search(r'[一-鿿]', sample):
+        return "zh"
+    if re.search(r'[぀-ゟ゠-ヿ]', sample):
+        return "ja"
+    if re.search(r'[가-힣]', sample):
+        return "ko"
+    if re.search(r'[؀-ۿ]', sample):
+        return "ar"
+    common_words = {
+        'en': ['the', 'and', 'to', 'of', 'in'],
+        'es': ['el', 'la', 'de', 'que', 'y'],
+        'fr': ['le', 'la', 'de', 'et', 'à'],
+        'de': ['der', 'die', 'das', 'und', 'zu'],
+        'ru': ['и', 'в', 'не', 'на', 'я'],
+    }
+    text_lower = sample.lower()
+    for lang, words in common_words.items():
+        if any(word in text_lower for word in words):
+            return lang
+    return "en"
+
+
+def eval_set(prefix):
+    for language, sentences in EVAL_SENTENCES.items():
+        for sentence in sentences:
+            yield language, sentence[:prefix] if prefix else sentence
+
+
+def throughput(func, texts, seconds=0.5):
+    """Texts per second over repeated calls of func(texts)"""
+    done = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        func(texts)
+        done += len(texts)
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--prefixes', type=int, nargs='+', default=[20, 50, 0],
+                        help='characters of each sentence to classify (0 for the whole sentence)')
+    parser.add_argument('--batch', type=int, default=256, help='texts per identify_languages call')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from app.langid import LanguageModel, identify_language, identify_languages
+
+    started = time.perf_counter()
+    LanguageModel.load()
+    print(f"Profiles loaded in {(time.perf_counter() - started) * 1000:.1f} ms")
+    threshold = getattr(settings, 'LANGUAGE_CONFIDENCE_THRESHOLD', 0.9)
+
+    rows = []
+    for prefix in args.prefixes:
+        samples = list(eval_set(prefix))
+        legacy = sum(legacy_detect_language(text) == language for language, text in samples)
+        results = identify_languages([text for _, text in samples])
+        correct = sum(code == language for (language, _), (code, _) in zip(samples, results))
+        confident = [(language, code) for (language, _), (code, confidence) in zip(samples, results)
+                     if confidence >= threshold]
+        confident_correct = sum(language == code for language, code in confident)
+        rows.append([
+            prefix or 'full', len(samples),
+            f'{legacy / len(samples):.0%}', f'{correct / len(samples):.0%}',
+            f'{len(confident) / len(samples):.0%}',
+            f'{confident_correct / len(confident):.0%}' if confident else '-',
+        ])
+    print_table(['chars', 'texts', 'legacy acc', 'n-gram acc', f'conf>={threshold}', 'acc when conf'], rows)
+    print()
+
+    texts = [text for _, text in eval_set(0)]
+    batch = (texts * (args.batch // len(texts) + 1))[:args.batch]
+    rows = [
+        ['legacy, one per call', f'{throughput(lambda t: [legacy_detect_language(x) for x in t], texts):,.0f}'],
+        ['n-gram, one per call', f'{throughput(lambda t: [identify_language(x) for x in t], texts):,.0f}'],
+        [f'n-gram, batches of {len(batch)}', f'{throughput(identify_languages, batch):,.0f}'],
+    ]
+    print_table(['mode', 'texts/s'], rows)
+
+
+if __name__ == '__main__':
+    main()
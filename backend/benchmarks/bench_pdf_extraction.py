@@ -0,0 +1,68 @@
+"""Compare whole-document and streaming PDF extraction.
+
+    python -m benchmarks.bench_pdf_extraction [--pages 10 100 1000]
+
+Each measurement runs in a fresh subprocess so peak RSS is per run.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from .common import BACKEND_DIR, make_pdf, print_table, setup_django
+
+MODES = ('baseline', 'sequential', 'parallel', 'early-stop')
+
+
+def measure(mode, path):
+    """Extract one PDF in this process and return timing and memory figures"""
+    import time
+    setup_django()
+    import PyPDF2
+    from app.extraction import collect_text, iter_pdf_pages
+    from .common import peak_rss_mb
+
+    started = time.perf_counter()
+    if mode == 'baseline':
+        # The original implementation: parse everything, join a full list
+        reader = PyPDF2.PdfReader(path)
+        text = " ".join([page.extract_text() or "" for page in reader.pages])
+    elif mode == 'sequential':
+        text = collect_text(iter_pdf_pages(path, parallel_min_pages=10**9), " ", max_chars=0)
+    elif mode == 'parallel':
+        text = collect_text(iter_pdf_pages(path, parallel_min_pages=1), " ", max_chars=0)
+    else:
+        # Stop once a typical prompt budget is collected
+        text = collect_text(iter_pdf_pages(path, parallel_min_pages=1), " ", max_chars=60_000)
+    elapsed = time.perf_counter() - started
+    return {'seconds': elapsed, 'chars': len(text), 'peak_rss_mb': peak_rss_mb()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--measure', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(*args.measure)))
+        return
+
+    rows = []
+    for pages in args.pages:
+        path = make_pdf(pages)
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_pdf_extraction', '--measure', mode, str(path)],
+                cwd=BACKEND_DIR, check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            rows.append([
+                pages, mode, f"{result['seconds']:.2f}",
+                f"{pages / result['seconds']:.0f}", result['chars'], f"{result['peak_rss_mb']:.0f}",
+            ])
+    print_table(['pages', 'mode', 'seconds', 'pages/s', 'chars', 'peak RSS MB'], rows)
+
+
+if __name__ == '__main__':
+    main()
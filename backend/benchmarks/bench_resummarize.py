@@ -0,0 +1,103 @@
+"""Model work of changing a summary's length: new upload against resummarize.
+
+    python -m benchmarks.bench_resummarize [--chars 3000 12000 60000]
+                                           [--latency 0.2]
+
+Each document is uploaded as pasted text at the medium length and processed
+with FakeBackend (calls wait `latency` seconds). It is then switched to short,
+to long and back to medium in three ways:
+
+  new upload, warm   the text is sent again as a new item at the other
+                     length, as a client had to before; section summaries
+                     and earlier results come from the summary cache
+  new upload, cold   the same with the summary cache cleared first, as once
+                     its entries have expired or been evicted
+  resummarize        POST content/<pk>/resummarize/ plus the job it queues
+
+Each row counts the model calls and estimated prompt tokens of one switch,
+and its time from the request until the new summary is saved.
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from .bench_extractive import make_document
+from .common import print_table, setup_django
+
+SWITCHES = ['short', 'long', 'medium']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chars', type=int, nargs='+', default=[3_000, 12_000, 60_000])
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per FakeBackend call')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.db import connections
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings, setup_test_environment
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+    from app import metrics
+    from app.jobs import drain_queue
+    from app.llm import get_backend, reset_backend
+    from app.utils import summary_cache
+
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-resummarize-'))
+    connections['default'].settings_dict['TEST']['NAME'] = str(scratch / 'resummarize.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    rows = []
+    try:
+        backend = {'BACKEND': 'app.llm.FakeBackend', 'OPTIONS': {'latency': args.latency}}
+        with override_settings(LLM_BACKEND=backend, METRICS_ENABLED=True, SUMMARY_WORKERS_IN_PROCESS=False):
+            reset_backend()
+            user = User.objects.create_user('bench', password='bench')
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+            def measure(request):
+                """(model calls, prompt tokens, seconds) of a request and the jobs it queues"""
+                calls, tokens = get_backend().stats['calls'], metrics.llm_tokens.value('prompt')
+                started = time.perf_counter()
+                response = request()
+                assert response.status_code in (200, 201, 202), response.status_code
+                drain_queue()
+                return (get_backend().stats['calls'] - calls, metrics.llm_tokens.value('prompt') - tokens,
+                        time.perf_counter() - started)
+
+            for chars in args.chars:
+                text = make_document(chars, seed=chars)[0]
+                for label in ('new upload, warm', 'new upload, cold', 'resummarize'):
+                    summary_cache.clear()
+                    created = client.post('/api/content/', {'original_text': text, 'summary_length': 'medium'}, format='json')
+                    drain_queue()
+                    pk = created.json()['id']
+                    for length in SWITCHES:
+                        if label == 'new upload, cold':
+                            summary_cache.clear()
+                        if label != 'resummarize':
+                            request = lambda: client.post(
+                                '/api/content/', {'original_text': text, 'summary_length': length}, format='json')
+                        else:
+                            request = lambda: client.post(
+                                f'/api/content/{pk}/resummarize/', {'summary_length': length}, format='json')
+                        calls, tokens, seconds = measure(request)
+                        rows.append([f'{chars:,}', label, f'-> {length}', calls, f'{tokens:,}', f'{seconds:.2f}'])
+        reset_backend()
+    finally:
+        runner.teardown_databases(databases)
+        for path in scratch.iterdir():
+            path.unlink()
+        os.rmdir(scratch)
+    print(f"FakeBackend latency {args.latency}s per call; uploaded at medium, then switched")
+    print_table(['document chars', 'setup', 'switch', 'model calls', 'prompt tokens', 'seconds'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Latency of GET /api/content/search/ on a large synthetic index.
+
+    python -m benchmarks.bench_search [--rows 100000] [--per-user 1000]
+                                      [--heavy-user 20000] [--queries 30]
+
+Content rows are written with raw SQL into a throwaway file database (the
+triggers of migration 0005 index them as they go), with Zipf-distributed
+words so some terms occur in most documents and others in a few. Searches go
+through the API with the test client, so each timing covers the ranked FTS5
+query, the count, the row lookup and serialization of one page of 20.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from .common import print_table, setup_django
+
+SYLLABLES = ('ka', 'lo', 'mi', 'ne', 'ru', 'ta', 'vo', 'shi', 'den', 'mar', 'pel', 'sto', 'gra', 'bin', 'tur', 'qua')
+
+
+def vocabulary(size):
+    """Distinct pseudo-words, most frequent first"""
+    words = []
+    count = len(SYLLABLES)
+    n = count
+    while len(words) < size:
+        parts = []
+        value = n
+        while value:
+            value, digit = divmod(value, count)
+            parts.append(SYLLABLES[digit])
+        words.append(''.join(parts))
+        n += 1
+    return words
+
+
+def generate_rows(rows, per_user, heavy_user, seed=0):
+    """(user_id, title, keywords, summary) tuples in chunks of 10,000"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    words = np.array(vocabulary(20_000))
+    ranks = np.arange(1, len(words) + 1)
+    probabilities = 1 / ranks
+    probabilities /= probabilities.sum()
+    user_ids = np.concatenate([
+        np.ones(min(heavy_user, rows), dtype=np.int64),
+        2 + np.arange(max(rows - heavy_user, 0)) // per_user,
+    ])
+    for start in range(0, rows, 10_000):
+        size = min(10_000, rows - start)
+        picks = words[rng.choice(len(words), size=(size, 71), p=probabilities)]
+        yield [
+            (int(user_ids[start + i]), ' '.join(row[:5]).capitalize(), ', '.join(row[5:11]), ' '.join(row[11:]) + '.')
+            for i, row in enumerate(picks.tolist())
+        ]
+
+
+def timed(func, repeat):
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--per-user', type=int, default=1000, help='documents of each ordinary user')
+    parser.add_argument('--heavy-user', type=int, default=20_000, help='documents of user 1')
+    parser.add_argument('--queries', type=int, default=30, help='searches timed per query kind')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.db import connection, connections, transaction
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+    from django.utils import timezone
+    from rest_framework.test import APIClient
+    from app.search import reindex
+
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-search-'))
+    database = scratch / 'search.sqlite3'
+    connections['default'].settings_dict['TEST']['NAME'] = str(database)
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        users = 1 + max(args.rows - args.heavy_user, 0) // args.per_user + 1
+        now = timezone.now().isoformat()
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO auth_user (id, password, is_superuser, username, first_name, last_name, "
+                "email, is_staff, is_active, date_joined) VALUES (%s, '!', 0, %s, '', '', '', 0, 1, %s)",
+                [(user_id, f'user{user_id}', now) for user_id in range(1, users + 1)],
+            )
+
+        started = time.perf_counter()
+        for chunk in generate_rows(args.rows, args.per_user, args.heavy_user):
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(
+                    "INSERT INTO app_content (user_id, original_file, original_text, summary_length, "
+                    "created_at, updated_at, status, error, summary, keywords, auto_title) "
+                    "VALUES (%s, '', '', 'medium', %s, %s, 'done', '', %s, %s, %s)",
+                    [(user, now, now, summary, keywords, title) for user, title, keywords, summary in chunk],
+                )
+        insert_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        reindex()
+        reindex_seconds = time.perf_counter() - started
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA page_count")
+            pages = cursor.fetchone()[0]
+            cursor.execute("PRAGMA page_size")
+            size_mb = pages * cursor.fetchone()[0] / 1024 / 1024
+        print(f"{args.rows:,} rows inserted and indexed in {insert_seconds:.1f}s "
+              f"({args.rows / insert_seconds:,.0f} rows/s); reindex {reindex_seconds:.1f}s; "
+              f"database {size_mb:,.0f} MB")
+
+        words = vocabulary(20_000)
+        kinds = {
+            'common word': lambda i: words[i % 5],
+            'mid-frequency word': lambda i: words[200 + i],
+            'rare word': lambda i: words[15_000 + i],
+            'common + mid word': lambda i: f'{words[i % 5]} {words[300 + i]}',
+            'two common words': lambda i: f'{words[i % 5]} {words[5 + i % 5]}',
+        }
+        rows = []
+        for user_id, label in ((1, f'heavy ({min(args.heavy_user, args.rows):,} docs)'),
+                               (2, f'ordinary ({args.per_user:,} docs)')):
+            client = APIClient()
+            client.force_authenticate(User.objects.get(pk=user_id))
+            for kind, query in kinds.items():
+                hits = []
+
+                def run(i):
+                    response = client.get('/api/content/search/', {'q': query(i)})
+                    assert response.status_code == 200, response.status_code
+                    hits.append(response.data['count'])
+                p50, p95 = timed(run, args.queries)
+                rows.append([label, kind, f'{statistics.median(hits):,.0f}', f'{p50:.1f}', f'{p95:.1f}'])
+        print_table(['user', 'query', 'median hits', 'p50 ms', 'p95 ms'], rows)
+    finally:
+        runner.teardown_databases(databases)
+        for path in scratch.iterdir():
+            path.unlink()
+        os.rmdir(scratch)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Model calls, tokens and latency of the single-call JSON mode against two calls.
+
+    python -m benchmarks.bench_single_call [--chars 3000 12000 60000]
+                                           [--documents 20] [--malformed 0.2]
+
+process_with_gemini summarizes `documents` distinct documents of each size
+with FakeBackend, whose calls wait `latency` seconds and then emit
+`tokens_per_second` words per second, in three setups:
+
+  two calls       SUMMARY_SINGLE_CALL = False: analysis and summary prompts in parallel
+  single call     one prompt answered with SUMMARY_SCHEMA JSON
+  single, N% bad  the same with about `malformed` of the replies cut off
+                  (drawn with `seed`), so those documents fall back to the
+                  two calls
+
+Prompt and reply tokens are the estimates of summarizer_llm_tokens_total;
+the fallback rate comes from summarizer_structured_replies_total.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from .bench_extractive import make_document
+from .common import print_table, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--chars', type=int, nargs='+', default=[3_000, 12_000, 60_000])
+    parser.add_argument('--documents', type=int, default=20, help='documents per size and setup')
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds before the first token')
+    parser.add_argument('--tokens-per-second', type=float, default=1000, help='words per second of reply')
+    parser.add_argument('--malformed', type=float, default=0.2, help='share of bad JSON replies in the last setup')
+    parser.add_argument('--seed', type=int, default=1, help='seed of the FakeBackend random draws')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connections
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings, setup_test_environment
+    from app import metrics
+    from app.llm import get_backend, reset_backend
+    from app.utils import process_with_gemini, summary_cache
+
+    options = {'latency': args.latency, 'tokens_per_second': args.tokens_per_second, 'seed': args.seed}
+    setups = {
+        'two calls': ({'SUMMARY_SINGLE_CALL': False}, options),
+        'single call': ({'SUMMARY_SINGLE_CALL': True}, options),
+        f'single, {args.malformed:.0%} bad': ({'SUMMARY_SINGLE_CALL': True}, {**options, 'malformed_rate': args.malformed}),
+    }
+
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-single-call-'))
+    connections['default'].settings_dict['TEST']['NAME'] = str(scratch / 'single_call.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    rows = []
+    try:
+        for chars in args.chars:
+            documents = [make_document(chars, seed=chars + i)[0] for i in range(args.documents)]
+            for label, (overrides, backend_options) in setups.items():
+                backend = {'BACKEND': 'app.llm.FakeBackend', 'OPTIONS': backend_options}
+                with override_settings(LLM_BACKEND=backend, METRICS_ENABLED=True, **overrides):
+                    reset_backend()
+                    summary_cache.clear()
+                    for metric in (metrics.llm_tokens, metrics.structured_replies):
+                        metric.reset()
+                    samples = []
+                    for text in documents:
+                        started = time.perf_counter()
+                        results = process_with_gemini(text, 'short')
+                        samples.append(time.perf_counter() - started)
+                        assert 'error' not in results, results
+                    replies = metrics.structured_replies.value('ok') + metrics.structured_replies.value('fallback')
+                    fallback = metrics.structured_replies.value('fallback') / replies if replies else 0
+                    count = len(documents)
+                    rows.append([
+                        f'{chars:,}', label, f"{get_backend().stats['calls'] / count:.1f}",
+                        f"{metrics.llm_tokens.value('prompt') / count:,.0f}",
+                        f"{metrics.llm_tokens.value('completion') / count:,.0f}",
+                        f'{statistics.median(samples):.2f}', f'{fallback:.0%}' if replies else '-',
+                    ])
+        reset_backend()
+    finally:
+        runner.teardown_databases(databases)
+        for path in scratch.iterdir():
+            path.unlink()
+        os.rmdir(scratch)
+    print(f"FakeBackend: {args.latency}s to first token, {args.tokens_per_second:.0f} words/s; "
+          f"summary length short; per document:")
+    print_table(['document chars', 'setup', 'model calls', 'prompt tokens', 'reply tokens', 'p50 s', 'fallback'], rows)
+
+
+if __name__ == '__main__':
+    main()
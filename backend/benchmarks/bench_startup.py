@@ -0,0 +1,99 @@
+"""Startup cost of a web process, from `python -X importtime`, with a budget.
+
+    python -m benchmarks.bench_startup [--runs 5] [--budget-ms 1000]
+
+Each case runs in fresh interpreters, `runs` times, and reports medians:
+
+  startup          import core.wsgi and core.urls, as a worker does before
+                   its first request
+  first request    the same, then an unauthenticated GET /api/user/ (401)
+                   through the test client, which needs no heavy library
+  first PDF        startup, then one PDF rendering, the first request that
+                   loads reportlab
+
+`import ms` adds up the time -X importtime reports for each module, `wall s` is
+the whole interpreter run.
+Cases run with the default lazy imports and with DJANGO_PRELOAD=1, which loads
+app.preload.HEAVY_MODULES at startup. The lazy startup fails the check, with
+exit status 1, if it imports more than `budget-ms` or any of those modules.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from .common import BACKEND_DIR, print_table
+
+STARTUP = "import core.wsgi, core.urls"
+CASES = {
+    'startup': STARTUP,
+    'first request': STARTUP + (
+        "\nfrom django.test import Client\nfrom django.test.utils import setup_test_environment"
+        "\nsetup_test_environment()\nassert Client().get('/api/user/').status_code == 401"
+    ),
+    'first PDF': STARTUP + (
+        "\nfrom app.rendering import render_fields"
+        "\nrender_fields('pdf', {'auto_title': 'Title', 'summary': 'Summary', 'keywords': 'words'})"
+    ),
+}
+_SELF_US = re.compile(r'^import time:\s+(\d+) \|')
+# importlib.import_module, which app.preload uses, is not reported by -X importtime
+LIST_MODULES = "\nimport sys\nprint('\\n'.join(sys.modules))"
+
+
+def run(code, preload):
+    """(import ms, wall seconds, imported module names) of one fresh interpreter"""
+    env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'core.settings', 'DJANGO_PRELOAD': '1' if preload else '0'}
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code + LIST_MODULES], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode:
+        sys.exit(result.stderr[-2000:])
+    # The sum of every module's own time, whatever imported it
+    total = sum(int(match.group(1)) for match in map(_SELF_US.match, result.stderr.splitlines()) if match)
+    return total / 1000, wall, set(result.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1000, help='import time allowed for the lazy startup')
+    args = parser.parse_args()
+
+    sys.path.insert(0, str(BACKEND_DIR))
+    from app.preload import HEAVY_MODULES
+
+    rows = []
+    lazy_startup = None
+    for preload in (False, True):
+        for label, code in CASES.items():
+            runs = [run(code, preload) for _ in range(args.runs)]
+            import_ms = statistics.median(ms for ms, _, _ in runs)
+            wall = statistics.median(seconds for _, seconds, _ in runs)
+            heavy = [name for name in HEAVY_MODULES if name in runs[0][2]]
+            rows.append([label, 'preload' if preload else 'lazy', f'{import_ms:.0f}', f'{wall:.2f}',
+                         ', '.join(heavy) or '-'])
+            if label == 'startup' and not preload:
+                lazy_startup = import_ms, heavy
+    print(f"median of {args.runs} fresh interpreters")
+    print_table(['case', 'imports', 'import ms', 'wall s', 'heavy modules loaded'], rows)
+
+    import_ms, heavy = lazy_startup
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"startup imports took {import_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    if heavy:
+        failures.append(f"startup imported {', '.join(heavy)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"OK: lazy startup within {args.budget_ms:.0f} ms and free of heavy modules")
+
+
+if __name__ == '__main__':
+    main()
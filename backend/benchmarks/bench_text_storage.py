@@ -0,0 +1,166 @@
+"""Database size and read latency with extracted_text inline and compressed apart.
+
+    python -m benchmarks.bench_text_storage [--rows 20000] [--words 1500]
+                                            [--per-user 1000] [--repeat 30]
+
+A throwaway file database is migrated to 0005, where extracted_text is still a
+column of app_content, and filled with synthetic documents (Zipf-distributed
+pseudo-words, which compress about as well as prose). The same reads are timed
+there with the historical model, then again after migrating to 0006, which
+moves the text into the zlib-compressed ExtractedText table:
+
+  list page    one page of a user's list, with the columns the list view reads
+  detail       one row with its extracted text, as the detail view returns it
+  user rows    every full row of one user, as a plain Content queryset loads it
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from .bench_search import vocabulary
+from .common import print_table, setup_django
+
+BEFORE = ('app', '0005_content_search_index')
+AFTER = ('app', '0006_extracted_text_table')
+LIST_FIELDS = ('id', 'auto_title', 'keywords', 'status', 'summary_length', 'created_at')
+
+
+def generate_texts(rows, words, seed=0):
+    """Extracted texts in chunks of 1,000"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    vocab = np.array(vocabulary(20_000))
+    probabilities = 1 / np.arange(1, len(vocab) + 1)
+    probabilities /= probabilities.sum()
+    for start in range(0, rows, 1000):
+        size = min(1000, rows - start)
+        picks = vocab[rng.choice(len(vocab), size=(size, words), p=probabilities)]
+        yield [' '.join(row) + '.' for row in picks.tolist()]
+
+
+def database_mb(cursor):
+    cursor.execute("PRAGMA page_count")
+    pages = cursor.fetchone()[0]
+    cursor.execute("PRAGMA page_size")
+    return pages * cursor.fetchone()[0] / 1024 / 1024
+
+
+def timed(func, repeat):
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def measure(model, user_ids, last_id, repeat):
+    """Median ms of the three reads, on rows spread over the table"""
+    def list_page(i):
+        user_id = user_ids[i % len(user_ids)]
+        list(model.objects.filter(user_id=user_id).only(*LIST_FIELDS).order_by('-created_at')[:20])
+
+    def detail(i):
+        row = model.objects.get(pk=1 + (i * 7919) % last_id)
+        return len(row.extracted_text)
+
+    def user_rows(i):
+        list(model.objects.filter(user_id=user_ids[i % len(user_ids)]))
+
+    return [timed(list_page, repeat), timed(detail, repeat), timed(user_rows, max(repeat // 5, 3))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--words', type=int, default=1500, help='words of extracted text per row')
+    parser.add_argument('--per-user', type=int, default=1000, help='rows of each user')
+    parser.add_argument('--repeat', type=int, default=30, help='timed runs of each read')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection, connections, transaction
+    from django.db.migrations.executor import MigrationExecutor
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import setup_test_environment
+    from django.utils import timezone
+    from app.models import Content
+
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-text-'))
+    connections['default'].settings_dict['TEST']['NAME'] = str(scratch / 'text.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    try:
+        executor = MigrationExecutor(connection)
+        executor.migrate([BEFORE])
+        legacy_model = executor.loader.project_state(BEFORE).apps.get_model('app', 'Content')
+
+        users = (args.rows + args.per_user - 1) // args.per_user
+        now = timezone.now()
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                "INSERT INTO auth_user (id, password, is_superuser, username, first_name, last_name, "
+                "email, is_staff, is_active, date_joined, last_login) "
+                "VALUES (%s, '!', 0, %s, '', '', '', 0, 1, %s, NULL)",
+                [(user_id, f'user{user_id}', now.isoformat()) for user_id in range(1, users + 1)],
+            )
+        row_id = 0
+        characters = 0
+        for chunk in generate_texts(args.rows, args.words):
+            values = []
+            for text in chunk:
+                # Users' rows interleave, as they do when many people upload at once
+                created = (now + timedelta(seconds=row_id)).isoformat()
+                values.append((1 + row_id % users, created, created, text, text[:400], text[:80]))
+                characters += len(text)
+                row_id += 1
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(
+                    "INSERT INTO app_content (user_id, original_file, original_text, summary_length, "
+                    "created_at, updated_at, status, error, extracted_text, summary, keywords, auto_title) "
+                    "VALUES (%s, '', '', 'medium', %s, %s, 'done', '', %s, %s, '', %s)",
+                    values,
+                )
+        user_ids = list(range(1, users + 1))
+        with connection.cursor() as cursor:
+            cursor.execute("VACUUM")
+            size_before = database_mb(cursor)
+        before = measure(legacy_model, user_ids, row_id, args.repeat)
+
+        started = time.perf_counter()
+        executor = MigrationExecutor(connection)
+        executor.migrate([AFTER])
+        migrate_seconds = time.perf_counter() - started
+        with connection.cursor() as cursor:
+            size_migrated = database_mb(cursor)
+            started = time.perf_counter()
+            cursor.execute("VACUUM")
+            vacuum_seconds = time.perf_counter() - started
+            size_after = database_mb(cursor)
+        after = measure(Content, user_ids, row_id, args.repeat)
+
+        print(f"{args.rows:,} rows, {characters / args.rows / 1024:,.1f} KB of text each; "
+              f"migration {migrate_seconds:.1f}s, VACUUM {vacuum_seconds:.1f}s")
+        print_table(
+            ['', 'database MB', 'list page ms', 'detail ms', 'user rows ms'],
+            [
+                ['inline (0005)', f'{size_before:,.1f}'] + [f'{ms:.2f}' for ms in before],
+                ['migrated, before VACUUM', f'{size_migrated:,.1f}', '', '', ''],
+                ['compressed table (0006)', f'{size_after:,.1f}'] + [f'{ms:.2f}' for ms in after],
+            ],
+        )
+    finally:
+        runner.teardown_databases(databases)
+        for path in scratch.iterdir():
+            path.unlink()
+        os.rmdir(scratch)
+
+
+if __name__ == '__main__':
+    main()
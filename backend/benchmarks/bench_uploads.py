@@ -0,0 +1,155 @@
+"""Memory and time of large uploads: chunked uploads, dedupe and TXT extraction.
+
+    python -m benchmarks.bench_uploads [--megabytes 64 256] [--chunk-megabytes 8]
+
+For each size a plain text file of that many MB is generated on disk, then:
+
+  txt extract        extract_text on the stored file, reading the whole file
+                     and decoding it as before, and streaming it in chunks up
+                     to EXTRACT_MAX_CHARS as now
+  chunked upload     POST uploads/ and PATCH chunks of `chunk-megabytes`
+                     through the test client, hashing as the data arrives
+  resumed upload     the same with every chunk sent in two halves, asking
+                     the upload for its offset in between, as a client
+                     resuming after a dropped connection does
+  duplicate upload   the same bytes once more; the stored document is shared
+
+Peak memory is the tracemalloc peak during the step, which counts Python
+allocations (the test client's request bodies included) but not the OS page
+cache. Needs a few times the largest size free under the temporary directory.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from .common import print_table, sample_text, setup_django
+
+MB = 1024 * 1024
+
+
+def write_text_file(path, megabytes):
+    block = (sample_text(2000) + '\n').encode('utf-8')
+    with open(path, 'wb') as handle:
+        written = 0
+        while written < megabytes * MB:
+            handle.write(block)
+            written += len(block)
+    return os.path.getsize(path)
+
+
+def traced(step):
+    """(result, seconds, peak MB) of step()"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = step()
+        return result, time.perf_counter() - started, tracemalloc.get_traced_memory()[1] / MB
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megabytes', type=int, nargs='+', default=[64, 256])
+    parser.add_argument('--chunk-megabytes', type=int, default=8)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.core.files import File
+    from django.db import connections
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings, setup_test_environment
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+    from app.storage import get_document_storage
+    from app.utils import extract_text
+
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-uploads-'))
+    connections['default'].settings_dict['TEST']['NAME'] = str(scratch / 'uploads.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    chunk = args.chunk_megabytes * MB
+    rows = []
+    try:
+        media = scratch / 'media'
+        with override_settings(MEDIA_ROOT=str(media), UPLOAD_PARTS_DIR=scratch / 'parts',
+                               UPLOAD_MAX_BYTES=max(args.megabytes) * 2 * MB):
+            storage = get_document_storage()
+            # The storage is created once per process; point it at the scratch media root
+            storage.__dict__.pop('base_location', None)
+            storage.__dict__.pop('location', None)
+            user = User.objects.create_user('bench', password='bench')
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+            def upload(path, size, cut=False):
+                url = client.post('/api/uploads/', {'filename': 'document.txt', 'size': size}, format='json')['Location']
+                offset = 0
+                with open(path, 'rb') as source:
+                    while offset < size:
+                        source.seek(offset)
+                        data = source.read(chunk)
+                        if cut and len(data) > 1:
+                            client.patch(url, data[:len(data) // 2], content_type='application/offset+octet-stream',
+                                         HTTP_UPLOAD_OFFSET=str(offset))
+                            offset = client.get(url).json()['offset']
+                            source.seek(offset)
+                            data = source.read(chunk)
+                        state = client.patch(url, data, content_type='application/offset+octet-stream',
+                                             HTTP_UPLOAD_OFFSET=str(offset)).json()
+                        offset = state['offset']
+                assert state['complete'], state
+                return state
+
+            def stored_bytes():
+                return sum(path.stat().st_size for path in media.rglob('*') if path.is_file())
+
+            for megabytes in args.megabytes:
+                path = scratch / f'document-{megabytes}.txt'
+                size = write_text_file(path, megabytes)
+
+                def read_whole():
+                    with open(path, 'rb') as handle:
+                        return handle.read().decode('utf-8')
+
+                def extract():
+                    with open(path, 'rb') as handle:
+                        return extract_text(File(handle), 'document.txt')
+
+                for label, step in (('txt extract, whole file', read_whole), ('txt extract, streamed', extract)):
+                    text, seconds, peak = traced(step)
+                    rows.append([f'{megabytes}', label, f'{seconds:.2f}', f'{peak:.1f}', f'{len(text):,} chars'])
+                    del text
+
+                before = stored_bytes()
+                state, seconds, peak = traced(lambda: upload(path, size))
+                rows.append([f'{megabytes}', 'chunked upload', f'{seconds:.2f}', f'{peak:.1f}',
+                             f'{size / MB / seconds:.0f} MB/s, +{(stored_bytes() - before) / MB:.0f} MB stored'])
+                shutil.rmtree(media / 'documents')
+
+                before = stored_bytes()
+                _, seconds, peak = traced(lambda: upload(path, size, cut=True))
+                rows.append([f'{megabytes}', 'resumed upload', f'{seconds:.2f}', f'{peak:.1f}',
+                             f'{size / MB / seconds:.0f} MB/s, +{(stored_bytes() - before) / MB:.0f} MB stored'])
+
+                before = stored_bytes()
+                duplicate, seconds, peak = traced(lambda: upload(path, size))
+                assert duplicate['sha256'] == state['sha256']
+                rows.append([f'{megabytes}', 'duplicate upload', f'{seconds:.2f}', f'{peak:.1f}',
+                             f'{size / MB / seconds:.0f} MB/s, +{(stored_bytes() - before) / MB:.0f} MB stored'])
+                path.unlink()
+    finally:
+        runner.teardown_databases(databases)
+        shutil.rmtree(scratch)
+    print(f"{args.chunk_megabytes} MB chunks")
+    print_table(['file MB', 'step', 'seconds', 'peak MB', 'notes'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Shared helpers for the benchmark scripts.
+
+Run benchmarks from the backend directory, e.g.
+`python -m benchmarks.bench_pdf_extraction`.
+"""
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FIXTURE_DIR = Path(tempfile.gettempdir()) / 'summarizer-bench-fixtures'
+
+WORDS = (
+    "the report describes revenue growth across regional markets while hiring "
+    "slowed and operating costs rose faster than expected during the second "
+    "half of the year management expects margins to recover as new products "
+    "ship and supply contracts are renegotiated with key partners"
+).split()
+
+
+# Short passages for language detection benchmarks, keyed by language code
+LANGUAGE_SAMPLES = {
+    'en': "The committee reviewed the budget and agreed that the new schedule should be published before the end of the month.",
+    'es': "El comité revisó el presupuesto y acordó que el nuevo calendario debe publicarse antes de que termine el mes.",
+    'fr': "Le comité a examiné le budget et a convenu que le nouveau calendrier doit être publié avant la fin du mois.",
+    'de': "Der Ausschuss hat den Haushalt geprüft und beschlossen, dass der neue Zeitplan vor Ende des Monats veröffentlicht wird.",
+    'ru': "Комитет рассмотрел бюджет и согласился, что новый график должен быть опубликован до конца месяца.",
+    'zh': "委员会审查了预算，并同意新的时间表应在月底之前公布。",
+    'ja': "委員会は予算を検討し、新しい日程を月末までに公表することに合意しました。",
+    'ko': "위원회는 예산을 검토하고 새 일정을 이달 말 이전에 발표하기로 합의했습니다.",
+    'ar': "راجعت اللجنة الميزانية واتفقت على نشر الجدول الجديد قبل نهاية الشهر.",
+}
+
+
+def setup_django():
+    """Configure Django so app modules can be imported"""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+
+
+def sample_text(words, seed=0):
+    """Deterministic pseudo-prose of the given number of words"""
+    out = []
+    for i in range(words):
+        out.append(WORDS[(i * 7 + seed) % len(WORDS)])
+        if i % 17 == 16:
+            out[-1] += '.'
+    return ' '.join(out)
+
+
+def make_pdf(pages, words_per_page=350):
+    """Write (once) and return the path of a synthetic text PDF"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    path = FIXTURE_DIR / f'synthetic-{pages}p.pdf'
+    if path.exists():
+        return path
+
+    pdf = canvas.Canvas(str(path), pagesize=letter)
+    for page in range(pages):
+        text = pdf.beginText(40, 750)
+        words = sample_text(words_per_page, seed=page).split()
+        for start in range(0, len(words), 12):
+            text.textLine(' '.join(words[start:start + 12]))
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return path
+
+
+def make_docx(paragraphs, table_every=50):
+    """Write (once) and return the path of a synthetic .docx with tables"""
+    from docx import Document
+
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    path = FIXTURE_DIR / f'synthetic-{paragraphs}para.docx'
+    if path.exists():
+        return path
+
+    document = Document()
+    for index in range(paragraphs):
+        document.add_paragraph(sample_text(60, seed=index))
+        if index % table_every == table_every - 1:
+            table = document.add_table(rows=4, cols=3)
+            for row in table.rows:
+                for cell in row.cells:
+                    cell.text = sample_text(6, seed=index)
+    document.save(str(path))
+    return path
+
+
+def make_txt(words):
+    """Write (once) and return the path of a synthetic UTF-8 text file"""
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    path = FIXTURE_DIR / f'synthetic-{words}w.txt'
+    if not path.exists():
+        path.write_text(sample_text(words), encoding='utf-8')
+    return path
+
+
+def timeit(func, repeat=3):
+    """Run func repeat times and return (median seconds, last result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and its children, in MB"""
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    for row in [headers, ['-' * width for width in widths], *rows]:
+        print('  '.join(str(cell).rjust(width) for cell, width in zip(row, widths)))
@@ -0,0 +1,284 @@
+"""Regression benchmarks for the hot paths of the service.
+
+    python -m benchmarks.suite [--quick] [--filter TEXT] [--output FILE]
+                               [--baseline FILE] [--save-baseline]
+                               [--threshold 1.25] [--fail-on-regression]
+
+Every case runs in this process against a throwaway test database, with the
+fake model backend standing in for Gemini, so only our own code is timed.
+Results are written as JSON and each median is compared with the stored
+baseline; cases slower than baseline * threshold are flagged.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from .common import (
+    BACKEND_DIR, LANGUAGE_SAMPLES, make_docx, make_pdf, make_txt, print_table,
+    sample_text, setup_django,
+)
+
+RESULTS_DIR = BACKEND_DIR / 'benchmarks' / 'results'
+DEFAULT_BASELINE = BACKEND_DIR / 'benchmarks' / 'baseline.json'
+MIN_SAMPLE_SECONDS = 0.05
+
+
+class Case:
+    """One benchmark: `func` is timed, `setup` runs untimed before each sample"""
+
+    def __init__(self, name, func, setup=None, items=1, unit='calls'):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.items = items
+        self.unit = unit
+
+
+def measure(case, repeat):
+    """Time a case; fast functions without a setup are looped so each sample lasts a while"""
+    if case.setup:
+        case.setup()
+    started = time.perf_counter()
+    case.func()  # warm-up, also used to pick the loop count
+    number = max(1, int(MIN_SAMPLE_SECONDS / max(time.perf_counter() - started, 1e-9)))
+    if case.setup:
+        number = 1  # the setup has to run before every call
+
+    samples = []
+    for _ in range(repeat):
+        if case.setup:
+            case.setup()
+        started = time.perf_counter()
+        for _ in range(number):
+            case.func()
+        samples.append((time.perf_counter() - started) / number)
+    median = statistics.median(samples)
+    return {
+        'median_s': median,
+        'min_s': min(samples),
+        'samples': len(samples),
+        'loops': number,
+        'throughput': case.items / median if median else None,
+        'unit': f'{case.unit}/s',
+    }
+
+
+def extraction_cases(quick):
+    from app.utils import extract_text
+
+    pdf_pages = (10,) if quick else (10, 100)
+    docx_paragraphs = (200,) if quick else (200, 2000)
+    txt_words = (10_000,) if quick else (10_000, 200_000)
+
+    for pages in pdf_pages:
+        path = make_pdf(pages)
+        yield Case(f'extract/pdf-{pages}p', lambda path=path: extract_text(path, path.name), items=pages, unit='pages')
+    for paragraphs in docx_paragraphs:
+        path = make_docx(paragraphs)
+        yield Case(f'extract/docx-{paragraphs}para', lambda path=path: extract_text(path, path.name),
+                   items=paragraphs, unit='paragraphs')
+    for words in txt_words:
+        path = make_txt(words)
+
+        def run(path=path):
+            with open(path, 'rb') as file:
+                return extract_text(file, path.name)
+        yield Case(f'extract/txt-{words}w', run, items=words, unit='words')
+
+
+def language_cases(quick):
+    from app.langid import identify_languages
+    from app.utils import detect_language
+
+    samples = list(LANGUAGE_SAMPLES.values())
+
+    def run():
+        for sample in samples:
+            detect_language(sample)
+    yield Case('language/detect', run, items=len(samples), unit='texts')
+    batch = samples * 30
+    yield Case('language/identify-batch', lambda: identify_languages(batch), items=len(batch), unit='texts')
+
+
+def prompt_cases(quick):
+    from app.utils import prepare_prompts, process_with_gemini, summary_cache
+
+    short = sample_text(800)
+    long = sample_text(6_000 if quick else 25_000)
+    yield Case('prompts/prepare-short', lambda: prepare_prompts(short, 'medium'))
+    # Long documents are condensed through (fake) model calls; start cold each time
+    yield Case('prompts/prepare-long', lambda: prepare_prompts(long, 'medium'), setup=summary_cache.clear)
+    yield Case('prompts/process-with-gemini', lambda: process_with_gemini(short, 'medium'))
+
+
+def render_cases(quick):
+    from app.rendering import render_docx, render_pdf, render_txt
+
+    content = SimpleNamespace(
+        pk=1,
+        auto_title='Quarterly Revenue Review',
+        summary='\n'.join(sample_text(80, seed=i) for i in range(5)),
+        keywords='revenue, growth, margins, hiring, supply',
+    )
+    for name, renderer in (('pdf', render_pdf), ('docx', render_docx), ('txt', render_txt)):
+        yield Case(f'render/{name}', lambda renderer=renderer: renderer(content))
+
+
+def end_to_end_cases(quick):
+    from django.contrib.auth.models import User
+    from rest_framework.test import APIClient
+    from app.jobs import drain_queue
+    from app.models import Content
+
+    user = User.objects.create_user('bench', password='bench')
+    client = APIClient()
+    client.force_authenticate(user)
+    counter = iter(range(10 ** 9))
+
+    def post():
+        # A fresh text every time so the summary cache never answers
+        response = client.post('/api/content/', {
+            'original_text': sample_text(1500, seed=next(counter)),
+            'summary_length': 'medium',
+        }, format='json')
+        assert response.status_code in (201, 202), response.status_code
+        return response
+
+    def post_and_process():
+        post()
+        drain_queue()
+
+    content = Content.objects.create(
+        user=user, status=Content.STATUS_DONE, original_text='x',
+        auto_title='Benchmark', summary=sample_text(400), keywords='benchmark',
+    )
+
+    def download():
+        response = client.get(f'/api/content/{content.pk}/download/pdf')
+        b''.join(response.streaming_content)
+
+    yield Case('e2e/post-content', post)
+    yield Case('e2e/post-and-process', post_and_process)
+    yield Case('e2e/download-pdf-cached', download)
+
+
+GROUPS = (extraction_cases, language_cases, prompt_cases, render_cases, end_to_end_cases)
+
+
+def run(args):
+    os.environ['LLM_BACKEND'] = 'app.llm.FakeBackend'
+    os.environ.setdefault('LLM_BACKEND_OPTIONS', '{}')
+    setup_django()
+    from django.conf import settings
+    from django.db import connections
+    from django.test.runner import DiscoverRunner
+    from django.test.utils import override_settings, setup_test_environment
+    from app.llm import reset_backend
+    from app.rendering import render_cache
+
+    reset_backend()
+    scratch = Path(tempfile.mkdtemp(prefix='summarizer-bench-'))
+    render_cache.directory = scratch / 'render_cache'
+    # A file database, because the model pool threads write to the summary cache too
+    connections['default'].settings_dict['TEST']['NAME'] = str(scratch / 'bench.sqlite3')
+    setup_test_environment()
+    runner = DiscoverRunner(verbosity=0)
+    databases = runner.setup_databases()
+    results = {}
+    try:
+        with override_settings(SUMMARY_WORKERS_IN_PROCESS=False):
+            for group in GROUPS:
+                for case in group(args.quick):
+                    if args.filter and args.filter not in case.name:
+                        continue
+                    results[case.name] = measure(case, args.repeat)
+                    print(f"{case.name:32} {results[case.name]['median_s'] * 1000:10.3f} ms", file=sys.stderr)
+    finally:
+        runner.teardown_databases(databases)
+
+    return {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'quick': args.quick,
+        'llm_backend': settings.LLM_BACKEND['BACKEND'],
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold):
+    """Print current against baseline medians and return the regressed case names"""
+    rows = []
+    regressions = []
+    for name, result in report['results'].items():
+        current = result['median_s'] * 1000
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            rows.append([name, f'{current:.3f}', '-', '-', 'new'])
+            continue
+        before = previous['median_s'] * 1000
+        ratio = current / before if before else 1
+        flag = ''
+        if ratio > threshold:
+            flag = 'REGRESSION'
+            regressions.append(name)
+        elif ratio < 1 / threshold:
+            flag = 'faster'
+        rows.append([name, f'{current:.3f}', f'{before:.3f}', f'{(ratio - 1) * 100:+.0f}%', flag])
+    print_table(['case', 'ms', 'baseline ms', 'change', ''], rows)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='smaller fixtures and fewer samples')
+    parser.add_argument('--repeat', type=int, default=None, help='samples per case (default 5, 3 with --quick)')
+    parser.add_argument('--filter', help='only run cases whose name contains this text')
+    parser.add_argument('--output', type=Path, help='results file (default benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='flag cases slower than baseline * threshold (default 1.25)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='exit with status 1 on a regression')
+    args = parser.parse_args()
+    if args.repeat is None:
+        args.repeat = 3 if args.quick else 5
+
+    report = run(args)
+
+    output = args.output or RESULTS_DIR / f"{report['created'].replace(':', '')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + '\n')
+    print(f"Results written to {output}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + '\n')
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get('quick') != report['quick']:
+        print("Warning: baseline and this run differ in --quick; sizes are not comparable")
+    regressions = compare(report, baseline, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than {args.threshold}x the baseline: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
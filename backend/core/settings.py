@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import json
+import os
 from pathlib import Path
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -46,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
      'corsheaders.middleware.CorsMiddleware',  # Should be at the top
+    'app.metrics.server_timing_middleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -82,6 +86,15 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Take the write lock when a transaction starts; with the default
+            # deferred BEGIN, concurrent transactions that read and then write
+            # fail at once with "database is locked" instead of waiting
+            'transaction_mode': 'IMMEDIATE',
+            # Seconds a write waits for the lock; bursts of hundreds of
+            # concurrent summaries queue longer than the default 5
+            'timeout': 20,
+        },
     }
 }
 
@@ -108,7 +121,7 @@ AUTH_PASSWORD_VALIDATORS = [
 #REST_FRAMEWORK
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'app.authentication.CachedJWTAuthentication',
     ],
 }
 
@@ -117,8 +130,150 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    # Tokens carry a hash of the password, so changing it rejects the tokens issued before
+    'CHECK_REVOKE_TOKEN': True,
+}
+
+
+# Summarization jobs
+# Web processes run a small pool of worker threads; set SUMMARY_WORKERS_IN_PROCESS
+# to False when jobs are handled by `manage.py run_summary_workers` instead.
+SUMMARY_WORKERS_IN_PROCESS = True
+SUMMARY_WORKER_THREADS = 4
+SUMMARY_WORKER_POLL_INTERVAL = 2  # seconds
+SUMMARY_JOB_HEARTBEAT = 60  # seconds between renewals of running jobs' heartbeats
+SUMMARY_JOB_TIMEOUT = 600  # seconds without a heartbeat before a running job is considered stale
+SUMMARY_JOB_MAX_ATTEMPTS = 3
+
+# core.asgi sets DJANGO_ASYNC_VIEWS=1, which routes the content list/create,
+# detail, download and export endpoints to async views. Their summaries run as tasks
+# on the event loop, at most SUMMARY_ASYNC_MAX_JOBS at once; more are left in
+# the queue for the worker threads.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS', '0') == '1'
+SUMMARY_ASYNC_MAX_JOBS = 500
+
+# PDF, DOCX and rendering libraries, numpy and the Gemini client are imported on
+# first use. DJANGO_PRELOAD=1 loads them as Django starts instead, once in the
+# master with `gunicorn --preload core.wsgi`; see app/preload.py
+PRELOAD_MODULES = os.environ.get('DJANGO_PRELOAD', '0') == '1'
+
+# POST /api/content/batch/
+BATCH_MAX_ITEMS = 100
+BATCH_POLL_INTERVAL = 0.5  # seconds between checks for finished items
+BATCH_STREAM_TIMEOUT = 600  # stop streaming after this under ASGI; clients poll the rest
+
+
+# Uploads (see app/uploads.py). Multipart files are hashed and written to disk
+# as they arrive; large files can be sent in chunks through /api/uploads/.
+FILE_UPLOAD_HANDLERS = ['app.uploads.HashingFileUploadHandler']
+UPLOAD_MAX_BYTES = 512 * 1024 * 1024  # per file, multipart or chunked
+UPLOAD_PARTS_DIR = BASE_DIR / 'upload_parts'  # chunked uploads in progress
+UPLOAD_EXPIRY = 24 * 3600  # seconds an upload is kept after its last change
+UPLOAD_CHUNK_TIMEOUT = 300  # seconds before a chunk that never finished stops blocking the next
+
+
+# Text extraction limits
+EXTRACT_MAX_BYTES = 50 * 1024 * 1024
+EXTRACT_MAX_PAGES = 2000
+EXTRACT_MAX_CHARS = 1_000_000  # stop reading once this much text is collected
+PDF_PARALLEL_MIN_PAGES = 40  # smaller PDFs are extracted in the request thread
+PDF_PAGES_PER_TASK = 16
+PDF_WORKERS = None  # defaults to the number of CPUs
+DOCX_MAX_XML_BYTES = 512 * 1024 * 1024  # uncompressed size of one part
+
+
+# Model backend used for all LLM calls (see app/llm.py). For load tests and
+# benchmarks run with LLM_BACKEND=app.llm.FakeBackend and, optionally,
+# LLM_BACKEND_OPTIONS='{"latency": 0.5, "tokens_per_second": 80, "failure_rate": 0.01}'
+LLM_BACKEND = {
+    'BACKEND': os.environ.get('LLM_BACKEND', 'app.llm.GeminiBackend'),
+    'OPTIONS': json.loads(os.environ.get('LLM_BACKEND_OPTIONS', '{}')),
+}
+# Required by GeminiBackend; never commit a key
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+
+# Upper bound on model requests in flight per process
+LLM_MAX_CONCURRENCY = 8
+
+# Flow control around model calls (see app/resilience.py). The in-flight
+# limit starts at LLM_MAX_CONCURRENCY and backs off on 429s and slow replies.
+LLM_RESILIENCE = {
+    'MIN_CONCURRENCY': 1,
+    'RATE': None,  # requests per second, None for no rate limit
+    'BURST': 10,
+    'LATENCY_TARGET': 30.0,  # seconds
+    'ACQUIRE_TIMEOUT': 120.0,
+    'MAX_ATTEMPTS': 4,
+    'BACKOFF_BASE': 0.5,
+    'BACKOFF_MAX': 20.0,
+    'BREAKER_THRESHOLD': 5,
+    'BREAKER_RESET': 30.0,
 }
 
+# Documents longer than one prompt are summarized section by section
+SUMMARY_CHUNK_CHARS = 12000
+SUMMARY_CHUNK_CONCURRENCY = 4  # sections of one document in flight at once
+
+
+# Detected languages at least this confident are not re-checked by the model
+LANGUAGE_CONFIDENCE_THRESHOLD = 0.9
+
+
+# Search words found in more documents than this are ignored, since ranking
+# them means reading their whole posting list (see app/search.py)
+SEARCH_MAX_TERM_DOCUMENTS = 50000
+
+
+# Extractive pre-compression: past its length's budget (in tokens of about
+# four characters), a document reaches the analysis prompt as its
+# highest-ranked sentences in original order. With EXTRACTIVE_SUMMARY_PROMPT
+# the summary prompt gets them too, instead of model-condensed sections.
+# Budgets are capped at the prompt limit, MAX_PROMPT_CHARS / 4 = 3750 tokens.
+EXTRACTIVE_TOKEN_BUDGETS = {
+    'short': 1500,
+    'medium': 2500,
+    'long': 3500,
+}
+EXTRACTIVE_SUMMARY_PROMPT = False
+
+# With SUMMARY_SINGLE_CALL one model call returns the analysis and the summary
+# as JSON; the separate analysis and summary calls are only made when its
+# reply does not parse (summarizer_structured_replies_total{outcome="fallback"}).
+# Streaming always uses the two calls. The one prompt carries a single text, so
+# the extract above only reaches the model with EXTRACTIVE_SUMMARY_PROMPT, when
+# the summary is written from it too. Off by default: two calls keep the
+# summary on the whole text and give the analysis the extract.
+SUMMARY_SINGLE_CALL = False
+
+# Summary cache: in-process LRU in front of the SummaryCacheEntry table
+SUMMARY_CACHE = {
+    'MEMORY_ENTRIES': 256,
+    'MEMORY_BYTES': 16 * 1024 * 1024,
+    'DB_MAX_BYTES': 256 * 1024 * 1024,
+    'TTL': 30 * 24 * 3600,  # seconds
+}
+
+# Users resolved from access tokens are cached per process. Saves and deletes
+# through the ORM drop the entry at once; other changes apply within TTL.
+AUTH_USER_CACHE = {
+    'TTL': 60,  # seconds
+    'MAX_ENTRIES': 10000,
+}
+
+# Per-stage timings and counters, scraped from /api/metrics/ (Prometheus text)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+METRICS_SERVER_TIMING = os.environ.get('METRICS_SERVER_TIMING', '0') == '1'
+# Bearer token of the scraper; when empty, only staff users can read the metrics
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Rendered PDF/DOCX/TXT downloads, kept on disk up to this total size
+RENDER_CACHE_DIR = BASE_DIR / 'render_cache'
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# GET /api/content/export/<format>: ZIP of many renderings
+EXPORT_WORKERS = None  # processes rendering PDF/DOCX; defaults to the number of CPUs
+EXPORT_BATCH_ROWS = 200  # rows read per query
+
 
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
@@ -129,6 +284,10 @@ CORS_ALLOWED_ORIGINS = [
 # Optional: Allow credentials (cookies, authorization headers)
 CORS_ALLOW_CREDENTIALS = True
 
+# Let the frontend revalidate polled content and downloads, resume chunked uploads and read stage timings
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'if-modified-since', 'upload-offset')
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified', 'Location', 'Upload-Offset', 'Server-Timing']
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
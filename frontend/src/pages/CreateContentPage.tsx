@@ -44,6 +44,7 @@ export default function CreateContentPage() {
   const [tabValue, setTabValue] = useState('text');
   const [selectedFile, setSelectedFile] = useState<File | null>(null);
   const [progress, setProgress] = useState(0);
+  const [streamedSummary, setStreamedSummary] = useState('');
   const fileInputRef = useRef<HTMLInputElement>(null);
 
   const form = useForm<CreateContentFormValues>({
@@ -66,6 +67,8 @@ export default function CreateContentPage() {
   const handleSubmit = async (data: CreateContentFormValues) => {
     setIsSubmitting(true);
     setProgress(0);
+    setStreamedSummary('');
+    const appendToken = (text: string) => setStreamedSummary((prev) => prev + text);
     
     const intervalId = setInterval(() => {
       setProgress((prev) => Math.min(prev + 10, 90));
@@ -74,10 +77,10 @@ export default function CreateContentPage() {
     try {
       if (tabValue === 'file' && selectedFile) {
         // File upload submission
-        const response = await contentService.createContent({
+        const response = await contentService.createContentStream({
           original_file: selectedFile,
           summary_length: data.summary_length,
-        });
+        }, appendToken);
         
         toast({
           title: "Content created successfully",
@@ -87,10 +90,10 @@ export default function CreateContentPage() {
         navigate(`/content/${response.id}`);
       } else if (tabValue === 'text' && data.original_text) {
         // Text submission
-        const response = await contentService.createContent({
+        const response = await contentService.createContentStream({
           original_text: data.original_text,
           summary_length: data.summary_length,
-        });
+        }, appendToken);
         
         toast({
           title: "Content created successfully",
@@ -256,6 +259,11 @@ export default function CreateContentPage() {
                   <p className="text-center text-sm text-muted-foreground">
                     Processing your content...
                   </p>
+                  {streamedSummary && (
+                    <p className="whitespace-pre-wrap rounded-lg border p-4 text-sm">
+                      {streamedSummary}
+                    </p>
+                  )}
                 </div>
               )}
 
@@ -1,8 +1,8 @@
 
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { motion, AnimatePresence } from 'framer-motion';
 import { contentService } from '@/services/contentService';
-import { ContentItem, ContentFilter } from '@/types';
+import { ContentListItem, ContentFilter } from '@/types';
 import { Input } from '@/components/ui/input';
 import { Button } from '@/components/ui/button';
 import {
@@ -20,55 +20,63 @@ import { Search } from 'lucide-react';
 
 export default function HomePage() {
   const navigate = useNavigate();
-  const [contentItems, setContentItems] = useState<ContentItem[]>([]);
-  const [filteredItems, setFilteredItems] = useState<ContentItem[]>([]);
+  const [contentItems, setContentItems] = useState<ContentListItem[]>([]);
   const [isLoading, setIsLoading] = useState(true);
+  const [nextPage, setNextPage] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [filter, setFilter] = useState<ContentFilter>({
     search: '',
     length: 'all',
   });
+  // Answers to superseded filters are dropped
+  const latestRequest = useRef(0);
 
   useEffect(() => {
+    const request = ++latestRequest.current;
+    const length = filter.length === 'all' ? undefined : filter.length;
+    const query = filter.search.trim();
+
+    // Filtering happens on the server, so items past the loaded pages are found too
     const fetchContent = async () => {
       try {
-        const data = await contentService.getAllContent();
-        setContentItems(data);
-        setFilteredItems(data);
+        const page = query
+          ? await contentService.searchContent(query, length)
+          : await contentService.getContentPage(length);
+        if (request !== latestRequest.current) return;
+        setContentItems(page.results);
+        setNextPage(page.next);
+        setError(null);
       } catch (err) {
+        if (request !== latestRequest.current) return;
         console.error('Error fetching content:', err);
         setError('Failed to fetch content. Please try again later.');
       } finally {
-        setIsLoading(false);
+        if (request === latestRequest.current) setIsLoading(false);
       }
     };
 
-    fetchContent();
-  }, []);
-
-  useEffect(() => {
-    // Apply filters
-    let result = [...contentItems];
-
-    // Filter by length
-    if (filter.length !== 'all') {
-      result = result.filter((item) => item.summary_length === filter.length);
-    }
+    // Wait for a pause in typing before searching
+    const timer = setTimeout(fetchContent, query ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [filter]);
 
-    // Filter by search term
-    if (filter.search) {
-      const searchTerm = filter.search.toLowerCase();
-      result = result.filter(
-        (item) =>
-          item.auto_title.toLowerCase().includes(searchTerm) ||
-          (Array.isArray(item.keywords)
-            ? item.keywords.some((keyword) => keyword.toLowerCase().includes(searchTerm))
-            : typeof item.keywords === 'string' && item.keywords.toLowerCase().includes(searchTerm))
-      );
+  const loadMore = async () => {
+    if (!nextPage) return;
+    const request = latestRequest.current;
+    setIsLoadingMore(true);
+    try {
+      const page = await contentService.getNextPage<ContentListItem>(nextPage);
+      if (request !== latestRequest.current) return;
+      setContentItems((items) => [...items, ...page.results]);
+      setNextPage(page.next);
+    } catch (err) {
+      console.error('Error fetching more content:', err);
+      setError('Failed to fetch content. Please try again later.');
+    } finally {
+      setIsLoadingMore(false);
     }
-
-    setFilteredItems(result);
-  }, [filter, contentItems]);
+  };
 
   const handleSearch = (e: React.ChangeEvent<HTMLInputElement>) => {
     setFilter({ ...filter, search: e.target.value });
@@ -104,7 +112,7 @@ export default function HomePage() {
         <div className="relative flex-1">
           <Search className="absolute left-3 top-1/2 h-4 w-4 -translate-y-1/2 text-muted-foreground" />
           <Input
-            placeholder="Search by title or keywords..."
+            placeholder="Search titles, keywords and summaries..."
             value={filter.search}
             onChange={handleSearch}
             className="pl-10"
@@ -124,7 +132,7 @@ export default function HomePage() {
       </div>
 
       {/* Content grid */}
-      {filteredItems.length === 0 ? (
+      {contentItems.length === 0 ? (
         <div className="flex h-60 flex-col items-center justify-center rounded-2xl bg-muted/40 p-6 text-center">
           <p className="mb-2 text-xl font-medium">No content found</p>
           <p className="mb-6 text-muted-foreground">
@@ -137,7 +145,7 @@ export default function HomePage() {
       ) : (
         <div className="grid grid-cols-1 gap-6 sm:grid-cols-2 lg:grid-cols-3">
           <AnimatePresence>
-            {filteredItems.map((item) => (
+            {contentItems.map((item) => (
               <motion.div
                 key={item.id}
                 layout
@@ -201,6 +209,14 @@ export default function HomePage() {
           </AnimatePresence>
         </div>
       )}
+
+      {nextPage && (
+        <div className="mt-8 flex justify-center">
+          <Button variant="outline" onClick={loadMore} disabled={isLoadingMore}>
+            {isLoadingMore ? <LoadingSpinner size="sm" /> : 'Load more'}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }
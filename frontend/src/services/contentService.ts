@@ -1,10 +1,49 @@
 
 import axiosInstance from '@/lib/axios';
-import { ContentItem, ContentCreateRequest } from '@/types';
+import {
+  BatchResultLine,
+  ContentItem,
+  ContentCreateRequest,
+  ContentListItem,
+  ContentStatusResponse,
+  CursorPage,
+  SearchHit,
+  SearchPage,
+} from '@/types';
+
+const POLL_INTERVAL_MS = 1500;
+
+// Set once the server answers that it cannot stream (it is not running under ASGI)
+let streamingUnavailable = false;
+
+// Last status response per content id, so polls can be revalidated with ETags
+const statusCache = new Map<number, { etag: string; data: ContentStatusResponse }>();
 
 export const contentService = {
-  getAllContent: async (): Promise<ContentItem[]> => {
-    const response = await axiosInstance.get<ContentItem[]>('/content/');
+  // First page of the compact list, newest first, optionally of one summary length
+  getContentPage: async (summaryLength?: ContentCreateRequest['summary_length']): Promise<CursorPage<ContentListItem>> => {
+    const response = await axiosInstance.get<CursorPage<ContentListItem>>('/content/', {
+      params: summaryLength ? { summary_length: summaryLength } : undefined,
+    });
+    return response.data;
+  },
+
+  // The page after a list or search page, from its `next` URL
+  getNextPage: async <T>(nextUrl: string): Promise<CursorPage<T>> => {
+    const response = await axiosInstance.get<CursorPage<T>>(nextUrl);
+    return response.data;
+  },
+
+  // Ranked full-text search over titles, keywords and summaries
+  searchContent: async (
+    query: string,
+    summaryLength?: ContentCreateRequest['summary_length'],
+    page: number = 1,
+    pageSize: number = 20,
+  ): Promise<SearchPage<SearchHit>> => {
+    const response = await axiosInstance.get<SearchPage<SearchHit>>('/content/search/', {
+      params: { q: query, summary_length: summaryLength, page, page_size: pageSize },
+    });
     return response.data;
   },
 
@@ -38,6 +77,175 @@ export const contentService = {
     return response.data;
   },
 
+  getContentStatus: async (id: number): Promise<ContentStatusResponse> => {
+    const cached = statusCache.get(id);
+    const response = await axiosInstance.get<ContentStatusResponse>(`/content/${id}/status/`, {
+      headers: cached ? { 'If-None-Match': cached.etag } : {},
+      validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+    });
+
+    if (response.status === 304 && cached) {
+      return cached.data;
+    }
+    const etag = response.headers['etag'];
+    if (etag) {
+      statusCache.set(id, { etag, data: response.data });
+    }
+    return response.data;
+  },
+
+  // Poll until the background job has finished, then return the full content
+  waitForContent: async (id: number, intervalMs: number = POLL_INTERVAL_MS): Promise<ContentItem> => {
+    for (;;) {
+      const { status, error } = await contentService.getContentStatus(id);
+      if (status === 'done') {
+        statusCache.delete(id);
+        return contentService.getContentById(id);
+      }
+      if (status === 'failed') {
+        statusCache.delete(id);
+        throw new Error(error || 'Content processing failed');
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+  },
+
+  // Create content and receive the summary token by token over Server-Sent Events.
+  // Servers without ASGI answer 501; the content is then queued and polled instead.
+  createContentStream: async (
+    content: ContentCreateRequest,
+    onToken: (text: string) => void,
+  ): Promise<ContentItem> => {
+    const createAndWait = async () => {
+      const created = await contentService.createContent(content);
+      return created.status === 'done' ? created : contentService.waitForContent(created.id);
+    };
+    if (streamingUnavailable) {
+      return createAndWait();
+    }
+
+    let body: BodyInit;
+    const headers: Record<string, string> = {};
+    const token = localStorage.getItem('access');
+    if (token) {
+      headers.Authorization = `Bearer ${token}`;
+    }
+
+    if (content.original_file) {
+      const formData = new FormData();
+      formData.append('original_file', content.original_file);
+      formData.append('summary_length', content.summary_length);
+      body = formData;
+    } else {
+      headers['Content-Type'] = 'application/json';
+      body = JSON.stringify({
+        original_text: content.original_text,
+        summary_length: content.summary_length,
+      });
+    }
+
+    const response = await fetch(`${axiosInstance.defaults.baseURL}content/stream/`, {
+      method: 'POST',
+      headers,
+      body,
+    });
+    if (response.status === 501) {
+      streamingUnavailable = true;
+      return createAndWait();
+    }
+    if (!response.ok || !response.body) {
+      throw new Error(`Streaming request failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let contentId: number | null = null;
+
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) {
+        break;
+      }
+      buffer += decoder.decode(value, { stream: true });
+
+      // Events are separated by a blank line
+      let boundary = buffer.indexOf('\n\n');
+      while (boundary !== -1) {
+        const message = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf('\n\n');
+
+        const event = message.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(message.match(/^data: (.*)$/m)?.[1] ?? '{}');
+        if (event === 'created') {
+          contentId = data.id;
+        } else if (event === 'token') {
+          onToken(data.text);
+        } else if (event === 'error') {
+          throw new Error(data.error || 'Content processing failed');
+        } else if (event === 'done') {
+          return contentService.getContentById(data.id);
+        }
+      }
+    }
+
+    // The stream ended early; the server finishes the job in the background
+    if (contentId === null) {
+      throw new Error('Streaming response ended before the content was created');
+    }
+    return contentService.waitForContent(contentId);
+  },
+
+  // Upload many files and texts at once; onLine gets each result line as it arrives
+  createContentBatch: async (
+    files: File[],
+    texts: string[],
+    summaryLength: ContentCreateRequest['summary_length'],
+    onLine: (line: BatchResultLine) => void,
+  ): Promise<void> => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    texts.forEach((text) => formData.append('texts', text));
+    formData.append('summary_length', summaryLength);
+
+    const headers: Record<string, string> = {};
+    const token = localStorage.getItem('access');
+    if (token) {
+      headers.Authorization = `Bearer ${token}`;
+    }
+
+    const response = await fetch(`${axiosInstance.defaults.baseURL}content/batch/`, {
+      method: 'POST',
+      headers,
+      body: formData,
+    });
+    if (!response.ok || !response.body) {
+      throw new Error(`Batch upload failed with status ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) {
+        break;
+      }
+      buffer += decoder.decode(value, { stream: true });
+
+      let newline = buffer.indexOf('\n');
+      while (newline !== -1) {
+        const line = buffer.slice(0, newline).trim();
+        buffer = buffer.slice(newline + 1);
+        newline = buffer.indexOf('\n');
+        if (line) {
+          onLine(JSON.parse(line));
+        }
+      }
+    }
+  },
+
   updateContent: async (id: number, content: Partial<ContentCreateRequest>): Promise<ContentItem> => {
     let response;
 
@@ -15,8 +15,19 @@ export interface LoginRequest {
   password: string;
 }
 
+export type ContentStatus = 'pending' | 'running' | 'done' | 'failed';
+
+export interface ContentStatusResponse {
+  id: number;
+  status: ContentStatus;
+  error: string;
+  updated_at: string;
+}
+
 export interface ContentItem {
   id: number;
+  status: ContentStatus;
+  error?: string;
   title?: string;
   auto_title?: string;
   summary: string;
@@ -24,6 +35,30 @@ export interface ContentItem {
   original_text: string;
   summary_length: 'short' | 'medium' | 'long';
   created_at: string;
+  updated_at?: string;
+}
+
+// Compact representation returned by the content list endpoint
+export type ContentListItem = Pick<
+  ContentItem,
+  'id' | 'auto_title' | 'keywords' | 'summary_length' | 'status' | 'created_at' | 'updated_at'
+>;
+
+export interface CursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+export interface SearchHit extends ContentListItem {
+  // Higher is more relevant; null when the query only had very common words
+  score: number | null;
+  // HTML-escaped snippets with matches wrapped in <mark>
+  highlights: Record<'auto_title' | 'keywords' | 'summary', string>;
+}
+
+export interface SearchPage<T> extends CursorPage<T> {
+  count: number;
 }
 
 export interface ContentCreateRequest {
@@ -32,6 +67,21 @@ export interface ContentCreateRequest {
   original_file?: File;
 }
 
+// One line of the newline-delimited batch upload response
+export interface BatchResultLine {
+  index: number;
+  name: string;
+  event: 'accepted' | 'rejected' | 'finished' | 'timeout';
+  id?: number;
+  status?: ContentStatus;
+  status_url?: string;
+  error?: string;
+  errors?: Record<string, string[]>;
+  auto_title?: string;
+  keywords?: string;
+  summary?: string;
+}
+
 export interface ContentFilter {
   search: string;
   length: 'all' | 'short' | 'medium' | 'long';